@@ -0,0 +1,175 @@
+import os
+import math
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+
+logger = logging.getLogger(__name__)
+
+# Per-process limits of the heavy operations: how many run at once, how many may wait
+# for a slot, and how long they wait before giving up. Everything beyond is rejected
+# straight away, so a burst of uploads cannot push the worker into swap and take the
+# lightweight endpoints down with it.
+ADMISSION_LIMITS = {
+    "eda": {
+        "max_concurrent": int(os.getenv("ADMISSION_EDA_CONCURRENCY", "1")),
+        "max_queued": int(os.getenv("ADMISSION_EDA_QUEUE", "2")),
+        "queue_timeout": float(os.getenv("ADMISSION_EDA_QUEUE_TIMEOUT_SECONDS", "60")),
+    },
+    "pdf": {
+        "max_concurrent": int(os.getenv("ADMISSION_PDF_CONCURRENCY", "2")),
+        "max_queued": int(os.getenv("ADMISSION_PDF_QUEUE", "4")),
+        "queue_timeout": float(os.getenv("ADMISSION_PDF_QUEUE_TIMEOUT_SECONDS", "30")),
+    },
+    "gemini": {
+        "max_concurrent": int(os.getenv("ADMISSION_GEMINI_CONCURRENCY", "4")),
+        "max_queued": int(os.getenv("ADMISSION_GEMINI_QUEUE", "8")),
+        "queue_timeout": float(os.getenv("ADMISSION_GEMINI_QUEUE_TIMEOUT_SECONDS", "30")),
+    },
+}
+
+# Recent run times kept per operation to estimate Retry-After
+DURATION_WINDOW = 20
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a heavy operation cannot be admitted.
+
+    status is 429 when the wait queue is full and 503 when the queue timeout
+    passed without a free slot; retry_after is a hint in whole seconds.
+    """
+
+    def __init__(self, operation, status, retry_after, reason):
+        super().__init__(f"{operation} is saturated: {reason}")
+        self.operation = operation
+        self.status = status
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class OperationLimit:
+    """
+    Concurrency limit with a bounded, first-come wait queue for one operation.
+
+    Callers beyond max_concurrent wait, up to max_queued of them and for at
+    most queue_timeout seconds; others are rejected with AdmissionRejected.
+    Waiters hold a ticket in a deque and only the one at its head takes a
+    freed slot, so slots are handed out in arrival order.
+    """
+
+    def __init__(self, name, max_concurrent, max_queued, queue_timeout):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._condition = threading.Condition()
+        self._active = 0
+        self._waiters = deque()
+        self._durations = deque(maxlen=DURATION_WINDOW)
+        self._counters = {"admitted": 0, "completed": 0, "rejected_queue_full": 0, "rejected_timeout": 0}
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+
+    def retry_after(self):
+        """Seconds until a slot is likely to free up, from recent run times and the queue ahead."""
+        average = sum(self._durations) / len(self._durations) if self._durations else 1.0
+        return max(1, math.ceil(average * (len(self._waiters) + 1) / max(self.max_concurrent, 1)))
+
+    def _reject(self, status, counter, reason):
+        self._counters[counter] += 1
+        retry_after = self.retry_after()
+        logger.warning("Rejected %s (%s): %s active, %s queued, retry after %ss",
+                       self.name, reason, self._active, len(self._waiters), retry_after)
+        raise AdmissionRejected(self.name, status, retry_after, reason)
+
+    def acquire(self):
+        """Take a slot, waiting in the queue if needed; raises AdmissionRejected when saturated."""
+        started = time.monotonic()
+        with self._condition:
+            if self._active >= self.max_concurrent or self._waiters:
+                if len(self._waiters) >= self.max_queued:
+                    self._reject(429, "rejected_queue_full", "queue full")
+                ticket = object()
+                self._waiters.append(ticket)
+                deadline = started + self.queue_timeout
+                try:
+                    while self._active >= self.max_concurrent or self._waiters[0] is not ticket:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._reject(503, "rejected_timeout", "queue timeout")
+                        self._condition.wait(remaining)
+                finally:
+                    self._waiters.remove(ticket)
+                    # The next ticket is now at the head and may take a free slot
+                    self._condition.notify_all()
+            self._active += 1
+            self._counters["admitted"] += 1
+            waited = time.monotonic() - started
+            self._wait_seconds_total += waited
+            self._wait_seconds_max = max(self._wait_seconds_max, waited)
+
+    def release(self, duration=None):
+        """Give a slot back; duration is None for a slot that was acquired but never used."""
+        with self._condition:
+            self._active -= 1
+            if duration is not None:
+                self._counters["completed"] += 1
+                self._durations.append(duration)
+            self._condition.notify_all()
+
+    @contextmanager
+    def admit(self):
+        """Hold a slot for the duration of the block."""
+        self.acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    @asynccontextmanager
+    async def admit_async(self):
+        """Async variant of admit; the wait happens off the event loop."""
+        acquiring = asyncio.ensure_future(asyncio.to_thread(self.acquire))
+        try:
+            await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # The thread keeps waiting for its slot; give the slot back once it has one
+            acquiring.add_done_callback(self._release_unused)
+            raise
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    def _release_unused(self, acquiring):
+        if not acquiring.cancelled() and acquiring.exception() is None:
+            logger.info("Releasing %s slot of a cancelled waiter", self.name)
+            self.release()
+
+    def stats(self):
+        with self._condition:
+            admitted = self._counters["admitted"]
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_queued": self.max_queued,
+                "queue_timeout": self.queue_timeout,
+                "active": self._active,
+                "queued": len(self._waiters),
+                **self._counters,
+                "wait_seconds_avg": self._wait_seconds_total / admitted if admitted else 0.0,
+                "wait_seconds_max": self._wait_seconds_max,
+            }
+
+
+limits = {name: OperationLimit(name, **config) for name, config in ADMISSION_LIMITS.items()}
+
+
+def admission_stats():
+    """Slots, queue depth, rejections and queue waits of every heavy operation."""
+    return {name: limit.stats() for name, limit in limits.items()}
@@ -0,0 +1,52 @@
+import os
+import asyncio
+import functools
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+# Maximum concurrent blocking calls per external dependency, shared by every request
+# of the process, so a fan-out cannot flood GCS, Vertex AI or Gemini
+IO_CONCURRENCY = {
+    "gcs": int(os.getenv("ASYNC_GCS_CONCURRENCY", "32")),
+    "vertex": int(os.getenv("ASYNC_VERTEX_CONCURRENCY", "8")),
+    "gemini": int(os.getenv("ASYNC_GEMINI_CONCURRENCY", "4")),
+    "pdf": int(os.getenv("ASYNC_PDF_CONCURRENCY", "2")),
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _pool(dependency):
+    with _pools_lock:
+        if dependency not in _pools:
+            _pools[dependency] = ThreadPoolExecutor(
+                max_workers=IO_CONCURRENCY[dependency], thread_name_prefix=f"io-{dependency}"
+            )
+        return _pools[dependency]
+
+
+async def run_io(dependency, fn, *args, **kwargs):
+    """
+    Await a blocking client call in the bounded thread pool of its dependency.
+
+    The call runs in a copy of the caller's context, so log records keep
+    their request_id. It must not use the database session, which belongs
+    to the request thread.
+
+    Args:
+        dependency (str): one of IO_CONCURRENCY
+    """
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, fn, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(_pool(dependency), call)
+
+
+def io_pool_stats():
+    """Configured limit and queued calls of every dependency pool created so far."""
+    with _pools_lock:
+        return {
+            dependency: {"max_concurrency": IO_CONCURRENCY[dependency], "queued": pool._work_queue.qsize()}
+            for dependency, pool in _pools.items()
+        }
@@ -0,0 +1,179 @@
+import json
+import asyncio
+import logging
+from typing import Dict, Any
+
+from .models import ProjectStatus
+from .storage import get_storage
+from .async_io import run_io
+from .services import (
+    MODEL_ARTIFACTS, SUMMARY_SOURCES, ModelTrainingService, get_job_timings, record_job_transitions,
+)
+from .datasets import STATS_FILE_NAME, latest_version
+from .manifest import load_manifest
+
+logger = logging.getLogger(__name__)
+
+# Dashboard entry -> object name relative to the project folder
+PROJECT_REPORTS = {
+    "eda_report": "eda_report.html",
+    "model_summary": "model_summary.html",
+    "optimization_output": "optimization_output.html",
+}
+PROJECT_SUMMARIES = {
+    "mmm_summary": "MMM_summary.md",
+    "mso_summary": "MSO_summary.md",
+}
+PROJECT_FILES = {
+    "dataset_stats": STATS_FILE_NAME,
+    "model": "saved_mmm.pkl",
+    "sweep_summary": "sweep/summary.json",
+}
+
+
+def _entry(name, objects):
+    stat = objects.get(name)
+    if stat is None:
+        return {"name": name, "available": False}
+    return {
+        "name": name,
+        "available": True,
+        "size": stat["size"],
+        # A string, as in the GCS JSON API: generations exceed the integers JavaScript holds exactly
+        "generation": str(stat["generation"]) if stat["generation"] is not None else None,
+        "updated": stat["updated"],
+        "sha256": stat.get("sha256"),
+    }
+
+
+def manifest_objects(project, manifest):
+    """
+    Objects of a project folder as recorded in its manifest, or None when the
+    manifest cannot be relied on: missing, or written by a project created
+    before the upload stage recorded itself, or lacking the training stage of
+    a project that trained successfully.
+    """
+    if manifest is None or "upload" not in manifest["stages"]:
+        return None
+    status = ProjectStatus(project.status) if isinstance(project.status, str) else project.status
+    if status == ProjectStatus.SUCCESS and "training" not in manifest["stages"]:
+        return None
+    return {
+        name: {
+            "size": entry["size"],
+            "generation": entry.get("generation"),
+            "updated": entry.get("written_at"),
+            "sha256": entry.get("sha256"),
+        }
+        for name, entry in manifest["artifacts"].items()
+    }
+
+
+def listing_objects(project, listing):
+    """Objects of a project folder from a storage.list of it, keyed by name relative to the folder."""
+    prefix = f"{project.gcs_path}/"
+    return {stat["name"][len(prefix):]: stat for stat in listing if stat["name"].startswith(prefix)}
+
+
+def describe_artifacts(objects) -> Dict[str, Any]:
+    """
+    Availability and metadata of every artifact of a project.
+
+    A summary that does not exist yet is marked generatable when its source
+    report exists, since /genai-summary-files creates it on first request.
+
+    Args:
+        objects (dict): name relative to the project folder -> size,
+            generation, update time and, from the manifest, sha256
+
+    Returns:
+        dict: reports, summaries, model_artifacts and files, each mapping an
+            entry to its name, availability, size, generation, update time
+            and content hash
+    """
+    summaries = {}
+    for key, name in PROJECT_SUMMARIES.items():
+        entry = _entry(name, objects)
+        entry["generatable"] = not entry["available"] and SUMMARY_SOURCES[name] in objects
+        summaries[key] = entry
+    return {
+        "reports": {key: _entry(name, objects) for key, name in PROJECT_REPORTS.items()},
+        "summaries": summaries,
+        "model_artifacts": {key: _entry(f"artifacts/{name}", objects) for key, name in MODEL_ARTIFACTS.items()},
+        "files": {key: _entry(name, objects) for key, name in PROJECT_FILES.items()},
+    }
+
+
+def describe_dataset(project) -> Dict[str, Any]:
+    """Current dataset version of a project, or its uploaded file when it was never appended to."""
+    version = latest_version(project)
+    if version is None:
+        return {
+            "version": 0,
+            "source_file_name": project.source_file_name,
+            "parts": [f"{project.gcs_path}/{project.source_file_name}"],
+        }
+    return {
+        "version": version.version,
+        "source_file_name": project.source_file_name,
+        "parts": [version.base_path, *json.loads(version.delta_paths)],
+        "row_count": version.row_count,
+        "geo_column": version.geo_column,
+        "time_column": version.time_column,
+        "updated_at": version.created_at.isoformat(),
+    }
+
+
+async def _refresh_job_status(project):
+    """Poll the project's job if it is still active and record the transition."""
+    status = ProjectStatus(project.status) if isinstance(project.status, str) else project.status
+    if not project.job_id or status not in (ProjectStatus.PENDING, ProjectStatus.RUNNING):
+        return
+    try:
+        transition = await ModelTrainingService().get_job_status_async(project.job_id)
+        record_job_transitions([transition])
+    except Exception as e:
+        logger.warning("Failed to refresh status of job %s: %s", project.job_id, e)
+
+
+async def get_project_dashboard(project) -> Dict[str, Any]:
+    """
+    Everything needed to open a project: its training status, dataset version
+    and the availability of every report, summary and model artifact.
+
+    Artifacts come from the project manifest, read alongside the job status
+    poll, instead of one existence check per file. Projects without a usable
+    manifest are described from one listing of their folder.
+
+    Returns:
+        dict: project, training, dataset, stages (timings recorded in the
+            manifest) and artifacts, with artifacts_source "manifest" or "listing"
+    """
+    manifest, _ = await asyncio.gather(
+        run_io("gcs", load_manifest, project.gcs_path),
+        _refresh_job_status(project),
+    )
+    objects, source = manifest_objects(project, manifest), "manifest"
+    if objects is None:
+        listing = await run_io("gcs", get_storage().list, f"{project.gcs_path}/")
+        objects, source = listing_objects(project, listing), "listing"
+    status = ProjectStatus(project.status) if isinstance(project.status, str) else project.status
+    return {
+        "project": {
+            "project_id": project.id,
+            "name": project.name,
+            "gcs_path": project.gcs_path,
+            "created_at": project.created_at.isoformat(),
+        },
+        "training": {
+            "status": status.value,
+            **(get_job_timings(project) if project.job_id else {"job_id": None}),
+        },
+        "dataset": describe_dataset(project),
+        "stages": {
+            stage: {key: value for key, value in record.items() if key != "artifacts"}
+            for stage, record in (manifest or {}).get("stages", {}).items()
+        },
+        "artifacts_source": source,
+        "artifacts": describe_artifacts(objects),
+    }
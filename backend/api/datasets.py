@@ -0,0 +1,311 @@
+import os
+import json
+import uuid
+import logging
+from typing import Dict, Any
+
+from .db import db
+from .models import DatasetVersion, Project
+from .storage import get_storage
+from .manifest import ManifestStage
+from .services import combine_dataset_parts, read_dataset, scan_dataset
+from .validation import ValidationReport, MAX_EXAMPLES
+
+logger = logging.getLogger(__name__)
+
+# Deltas accumulated on a base before they are folded into a new compacted base
+DATASET_COMPACT_AFTER_DELTAS = int(os.getenv("DATASET_COMPACT_AFTER_DELTAS", "8"))
+
+STATS_FILE_NAME = "dataset_stats.json"
+
+
+class DeltaRejected(Exception):
+    """Raised when a delta does not match the stored dataset; carries the validation report."""
+
+    def __init__(self, report):
+        super().__init__("Delta failed validation")
+        self.report = report
+
+
+def latest_version(project):
+    """The newest DatasetVersion of a project, or None while it only has its uploaded file."""
+    return (DatasetVersion.query.filter_by(project_id=project.id)
+            .order_by(DatasetVersion.version.desc()).first())
+
+
+def get_dataset_parts(project):
+    """
+    Blob paths that make up the current dataset of a project.
+
+    Returns:
+        list: the base file followed by its deltas, in the order they apply
+    """
+    version = latest_version(project)
+    if version is None:
+        return [f"{project.gcs_path}/{project.source_file_name}"]
+    return [version.base_path, *json.loads(version.delta_paths)]
+
+
+def _stats_path(project):
+    return f"{project.gcs_path}/{STATS_FILE_NAME}"
+
+
+def load_dataset_stats(project, parts):
+    """Stored column statistics of a project, scanning the dataset if they were never written."""
+    storage = get_storage()
+    try:
+        return json.loads(storage.read(_stats_path(project)))
+    except FileNotFoundError:
+        logger.info("No stored statistics for project %s, scanning its dataset", project.id)
+        if len(parts) > 1:
+            version = latest_version(project)
+            stats, _ = _compacted_stats(parts, version.geo_column, version.time_column)
+        else:
+            stats = json.loads(json.dumps(scan_dataset(storage.read(parts[0])), default=str))
+        _write_stats(project, stats)
+        return stats
+
+
+def _write_stats(project, stats, stage=None):
+    data = json.dumps(stats, default=str)
+    if stage is not None:
+        stage.write(STATS_FILE_NAME, data, content_type="application/json")
+    else:
+        get_storage().write(_stats_path(project), data, content_type="application/json")
+
+
+def infer_key_columns(stats, geo_column=None, time_column=None):
+    """
+    Resolve the geo and time columns that key a dataset's rows.
+
+    Defaults are a column named geo and the only date column of the stored
+    statistics.
+
+    Raises:
+        ValueError: if a key column cannot be determined
+    """
+    columns = stats["columns"]
+    if not time_column:
+        dates = [name for name, column in columns.items() if column["type"] == "date"]
+        if len(dates) != 1:
+            raise ValueError("timeColumn is required: the dataset does not have exactly one date column")
+        time_column = dates[0]
+    if not geo_column:
+        if "geo" not in columns:
+            raise ValueError("geoColumn is required: the dataset has no column named 'geo'")
+        geo_column = "geo"
+    for column in (geo_column, time_column):
+        if column not in columns:
+            raise ValueError(f"Key column '{column}' is not in the dataset")
+    return geo_column, time_column
+
+
+def check_delta(stats, delta_stats, keys, geo_column, time_column):
+    """
+    Check a delta against the stored schema: same columns, compatible types,
+    complete and unique geo/time keys.
+
+    Returns:
+        ValidationReport
+    """
+    report = ValidationReport()
+    stored, received = stats["columns"], delta_stats["columns"]
+    report.summary["rows"] = delta_stats["rows"]
+
+    missing = [name for name in stored if name not in received]
+    extra = [name for name in received if name not in stored]
+    if missing:
+        report.error("missing_columns", f"Delta is missing columns of the dataset: {missing}", columns=missing)
+    if extra:
+        report.error("unknown_columns", f"Delta has columns the dataset does not: {extra}", columns=extra)
+    if delta_stats["rows"] == 0:
+        report.error("empty_dataset", "The delta has no rows")
+
+    for name, column in stored.items():
+        delta_column = received.get(name)
+        if delta_column is None or delta_column["count"] == 0 or column["count"] == 0:
+            continue
+        if column["type"] in ("numeric", "date") and delta_column["type"] != column["type"]:
+            report.error("type_mismatch", f"Column '{name}' is {column['type']} in the dataset "
+                         f"but {delta_column['type']} in the delta", column=name)
+
+    if keys is not None:
+        for column in (geo_column, time_column):
+            if keys[column].isna().any():
+                report.error("missing_key", f"Column '{column}' has empty values",
+                             column=column, count=int(keys[column].isna().sum()))
+        duplicated = keys.dropna().duplicated(keep=False)
+        if duplicated.any():
+            duplicates = keys.dropna()[duplicated].drop_duplicates()
+            report.error("duplicate_geo_time", "Some geo/time combinations appear more than once in the delta",
+                         count=int(len(duplicates)), examples=duplicates.head(MAX_EXAMPLES).values.tolist())
+    return report
+
+
+def _combine_bounds(first, second, pick):
+    values = [value for value in (first, second) if value is not None]
+    return pick(values) if values else None
+
+
+def merge_dataset_stats(stats, delta_stats, time_column):
+    """
+    Fold the statistics of an appended delta into the dataset's statistics.
+
+    Counts, sums and bounds merge exactly. Distinct counts do too for the
+    time column, whose delta periods all follow the stored ones; for other
+    columns they are unknown (None) until the next compaction.
+    """
+    merged = {"rows": stats["rows"] + delta_stats["rows"], "columns": {}}
+    for name, column in stats["columns"].items():
+        delta_column = delta_stats["columns"].get(name, {})
+        result = dict(column)
+        result["count"] = column["count"] + delta_column.get("count", 0)
+        result["missing"] = column["missing"] + delta_column.get("missing", 0)
+        if name == time_column and column.get("distinct") is not None and delta_column.get("distinct") is not None:
+            result["distinct"] = column["distinct"] + delta_column["distinct"]
+        else:
+            result["distinct"] = None
+        if column["type"] in ("numeric", "date"):
+            result["min"] = _combine_bounds(column.get("min"), delta_column.get("min"), min)
+            result["max"] = _combine_bounds(column.get("max"), delta_column.get("max"), max)
+        if column["type"] == "numeric":
+            result["sum"] = column["sum"] + delta_column.get("sum", 0.0)
+            result["sum_squares"] = column["sum_squares"] + delta_column.get("sum_squares", 0.0)
+            count = result["count"]
+            result["mean"] = result["sum"] / count if count else None
+            result["std"] = max(result["sum_squares"] / count - result["mean"] ** 2, 0.0) ** 0.5 if count else None
+        merged["columns"][name] = result
+    return merged
+
+
+def _read_part(blob_path, key_columns):
+    """Read a stored part losslessly: full-precision numerics and dates kept as written."""
+    return read_dataset(get_storage().read(blob_path), string_columns=key_columns,
+                        categorical=False, downcast=False, parse_dates=False)
+
+
+def _compacted_stats(parts, geo_column, time_column):
+    """Combine the parts into one CSV and scan it; returns (statistics, CSV bytes)."""
+    key_columns = [column for column in (geo_column, time_column) if column]
+    frame = combine_dataset_parts([_read_part(blob_path, key_columns) for blob_path in parts], key_columns)
+    content = frame.to_csv(index=False).encode("utf-8")
+    del frame
+    return json.loads(json.dumps(scan_dataset(content), default=str)), content
+
+
+def compact_dataset(project, parts, geo_column, time_column, version, stage=None, suffix=""):
+    """
+    Fold a base and its deltas into a single CSV base.
+
+    Returns:
+        tuple: (blob path of the new base, its statistics)
+    """
+    stats, content = _compacted_stats(parts, geo_column, time_column)
+    name = f"compacted/dataset_v{version}{suffix}.csv"
+    if stage is not None:
+        base_path = stage.write(name, content, content_type="text/csv")
+    else:
+        base_path = f"{project.gcs_path}/{name}"
+        get_storage().write(base_path, content, content_type="text/csv")
+    logger.info("Compacted %s parts of project %s into %s (%s rows)", len(parts), project.id, base_path, stats["rows"])
+    return base_path, stats
+
+
+def append_dataset_delta(project, delta_file_path, geo_column=None, time_column=None) -> Dict[str, Any]:
+    """
+    Append new rows to a project's dataset as a new dataset version.
+
+    The delta is checked against the stored schema and kept as its own blob;
+    rows whose geo and time match existing rows replace them. Statistics are
+    merged incrementally when the delta only adds later periods. When it
+    revises earlier periods, or DATASET_COMPACT_AFTER_DELTAS deltas have
+    accumulated, the version is compacted into a new base and rescanned.
+
+    Args:
+        project (Project): project to append to
+        delta_file_path (str): local CSV or Parquet file with the new rows
+        geo_column, time_column (str): key columns; inferred when omitted
+
+    Returns:
+        dict: version, rows_appended, row_count, compacted, parts and stats
+
+    Appends to a project are serialised on its row, locked for the whole
+    append (on SQLite, the version insert takes the database write lock and a
+    concurrent append fails with SQLAlchemyError instead). The version row is
+    reserved before anything is uploaded and committed last, after the
+    statistics, so readers only see complete versions. Uploaded blobs are
+    named per attempt, so a failed append never overwrites the blobs of
+    another.
+
+    Raises:
+        ValueError: if the key columns cannot be determined
+        DeltaRejected: if the delta does not match the stored dataset
+        SQLAlchemyError: if another append to the project holds the version
+    """
+    stage = ManifestStage(project.gcs_path, "append")
+    Project.query.filter_by(id=project.id).with_for_update().one()
+    current = latest_version(project)
+    parts = get_dataset_parts(project)
+    stats = load_dataset_stats(project, parts)
+    if current is not None:
+        geo_column, time_column = current.geo_column, current.time_column
+    geo_column, time_column = infer_key_columns(stats, geo_column, time_column)
+
+    delta_stats = json.loads(json.dumps(scan_dataset(delta_file_path), default=str))
+    keys = None
+    if geo_column in delta_stats["columns"] and time_column in delta_stats["columns"]:
+        keys = read_dataset(delta_file_path, columns=[geo_column, time_column],
+                            string_columns=[geo_column, time_column], categorical=False)
+    report = check_delta(stats, delta_stats, keys, geo_column, time_column)
+    if report.errors:
+        db.session.rollback()
+        raise DeltaRejected(report)
+
+    version = (current.version if current else 0) + 1
+    record = DatasetVersion(project_id=project.id, version=version, base_path="",
+                            geo_column=geo_column, time_column=time_column)
+    db.session.add(record)
+    db.session.flush()
+
+    previous_stats, stats_written = stats, False
+    suffix = f"-{uuid.uuid4().hex[:8]}"
+    try:
+        extension = ".parquet" if delta_file_path.endswith(".parquet") else ".csv"
+        delta_path = stage.upload(f"deltas/delta_v{version}{suffix}{extension}", delta_file_path)
+        parts = [*parts, delta_path]
+
+        # Pure appends keep the statistics mergeable; revised periods change rows already counted
+        stored_max = stats["columns"][time_column].get("max")
+        delta_min = delta_stats["columns"][time_column].get("min")
+        appends_only = stored_max is not None and delta_min is not None and str(delta_min) > str(stored_max)
+        compacted = not appends_only or len(parts) - 1 >= DATASET_COMPACT_AFTER_DELTAS
+        if compacted:
+            base_path, stats = compact_dataset(project, parts, geo_column, time_column, version, stage, suffix)
+            parts = [base_path]
+        else:
+            stats = merge_dataset_stats(stats, delta_stats, time_column)
+
+        record.base_path = parts[0]
+        record.delta_paths = json.dumps(parts[1:])
+        record.row_count = stats["rows"]
+        record.rows_appended = delta_stats["rows"]
+        record.compacted = compacted
+        _write_stats(project, stats, stage)
+        stats_written = True
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        if stats_written:
+            _write_stats(project, previous_stats)
+        raise
+    stage.commit(version=version, rows_appended=delta_stats["rows"], row_count=stats["rows"], compacted=compacted)
+    logger.info("Project %s is at dataset version %s: %s rows in %s parts (compacted: %s)",
+                project.id, version, stats["rows"], len(parts), compacted)
+    return {
+        "version": version,
+        "rows_appended": delta_stats["rows"],
+        "row_count": stats["rows"],
+        "compacted": compacted,
+        "parts": parts,
+        "stats": stats,
+    }
@@ -0,0 +1,188 @@
+import os
+import re
+import copy
+import json
+import logging
+from html import escape
+from concurrent.futures import ThreadPoolExecutor
+
+from .storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+# Sectioned EDA report, next to the full eda_report.html in the project folder:
+# eda/index.json lists the sections, eda/overview.html is the page with the overview
+# and a placeholder per fragment, and eda/<section>/<n>.html (or eda/<section>.html)
+# holds each variable, interaction, correlation, missing values and sample fragment.
+EDA_SECTIONS_FOLDER = "eda"
+EDA_INDEX_NAME = f"{EDA_SECTIONS_FOLDER}/index.json"
+EDA_SHELL_NAME = f"{EDA_SECTIONS_FOLDER}/overview.html"
+# Fragments are small objects, so they are written in parallel
+EDA_FRAGMENT_UPLOAD_WORKERS = int(os.getenv("EDA_FRAGMENT_UPLOAD_WORKERS", "8"))
+
+# Rendered in the page itself; every other section is loaded on demand
+_INLINE_SECTIONS = {"overview"}
+# Sections shown as tabs, a select or a list are split into one fragment per item
+_SPLIT_SEQUENCES = {"tabs", "select", "list", "accordion"}
+_FRAGMENT_KEY = re.compile(r"^[A-Za-z0-9_-]+(/[0-9]+)?$")
+
+
+def _slug(anchor_id):
+    return re.sub(r"[^A-Za-z0-9_-]+", "-", anchor_id).strip("-") or "section"
+
+
+def _placeholder(key, name):
+    return f'<div class="eda-fragment" data-fragment="{key}" data-name="{escape(name or "")}"></div>'
+
+
+def fragment_path(gcs_path, key):
+    return f"{gcs_path}/{EDA_SECTIONS_FOLDER}/{key}.html"
+
+
+def split_profile_report(profile):
+    """
+    Render a ydata-profiling report as an overview page plus one HTML fragment
+    per variable, interaction, correlation and remaining section.
+
+    The page is rendered by ydata itself from the report structure with every
+    lazily loaded part replaced by a placeholder <div class="eda-fragment">
+    carrying its fragment key, so tabs, navigation, styles and scripts stay
+    those of the full report.
+
+    Returns:
+        tuple: (page HTML, {fragment key: HTML}, index dict)
+    """
+    from ydata_profiling.report.presentation.core import HTML
+    from ydata_profiling.report.presentation.flavours import HTMLReport
+
+    report = profile.report
+    body = report.content["body"]
+    fragments, sections, page_items = {}, [], []
+
+    def render(renderable):
+        return HTMLReport(copy.deepcopy(renderable)).render()
+
+    for section in body.content["items"]:
+        entry = {"anchor_id": section.anchor_id, "name": section.name}
+        sections.append(entry)
+        if section.anchor_id in _INLINE_SECTIONS:
+            entry["inline"] = True
+            page_items.append(section)
+            continue
+
+        # The variables section is a dropdown of column names wrapping their accordion
+        container = section.content.get("item", section)
+        if getattr(container, "sequence_type", None) not in _SPLIT_SEQUENCES:
+            key = _slug(section.anchor_id)
+            fragments[key] = render(section)
+            entry["fragment"] = key
+            page_items.append(HTML(_placeholder(key, section.name), name=section.name, anchor_id=section.anchor_id))
+            continue
+
+        folder = _slug(container.anchor_id)
+        column_names = section.content.get("items") if container is not section else None
+        entry["items"], placeholders = [], []
+        for position, item in enumerate(container.content["items"]):
+            key = f"{folder}/{position}"
+            name = column_names[position] if column_names else item.content.get("name")
+            fragments[key] = render(item)
+            entry["items"].append({"anchor_id": item.content.get("anchor_id"), "name": name, "fragment": key})
+            placeholders.append(HTML(_placeholder(key, name), name=item.content.get("name"),
+                                     anchor_id=item.content.get("anchor_id")))
+
+        shell_container = copy.copy(container)
+        shell_container.content = dict(container.content, items=placeholders)
+        if container is section:
+            page_items.append(shell_container)
+        else:
+            shell_section = copy.copy(section)
+            shell_section.content = dict(section.content, item=shell_container)
+            page_items.append(shell_section)
+
+    shell_body = copy.copy(body)
+    shell_body.content = dict(body.content, items=page_items)
+    shell = copy.copy(report)
+    shell.content = dict(report.content, body=shell_body)
+    # ydata renders its cached structure with the report's theme, assets and navigation
+    profile._report = shell
+    try:
+        page = profile._render_html()
+    finally:
+        profile._report = report
+
+    index = {
+        "page": EDA_SHELL_NAME,
+        "sections": sections,
+        "fragments": {key: len(html.encode("utf-8")) for key, html in fragments.items()},
+    }
+    return page, fragments, index
+
+
+def write_eda_sections(stage, profile):
+    """
+    Write the sectioned report of a profile through an EDA ManifestStage.
+
+    The index is written last, so an index only ever lists fragments that
+    exist. A report that cannot be split is logged and left to the full
+    eda_report.html, which /eda-report serves when there is no index.
+
+    Returns:
+        dict: the index, or None if the report was not split
+    """
+    try:
+        page, fragments, index = split_profile_report(profile)
+    except Exception as e:
+        logger.warning("EDA report of %s could not be split into sections: %s", stage.gcs_path, e)
+        return None
+
+    with ThreadPoolExecutor(max_workers=EDA_FRAGMENT_UPLOAD_WORKERS, thread_name_prefix="eda-fragments") as pool:
+        writes = [
+            pool.submit(stage.write, f"{EDA_SECTIONS_FOLDER}/{key}.html", html, content_type="text/html")
+            for key, html in fragments.items()
+        ]
+        writes.append(pool.submit(stage.write, EDA_SHELL_NAME, page, content_type="text/html"))
+        for write in writes:
+            write.result()
+    stage.write(EDA_INDEX_NAME, json.dumps(index), content_type="application/json")
+    logger.info("EDA report of %s split into %s fragments", stage.gcs_path, len(fragments))
+    return index
+
+
+def load_eda_index(gcs_path):
+    """The sectioned EDA index of a project folder, or None if its report was not split."""
+    try:
+        return json.loads(get_storage().read(f"{gcs_path}/{EDA_INDEX_NAME}"))
+    except FileNotFoundError:
+        return None
+
+
+def read_eda_section(gcs_path, key=None):
+    """
+    Read the overview page of a project's EDA report, or one fragment of it.
+
+    Projects whose report was not split get their full eda_report.html in
+    place of the overview page.
+
+    Args:
+        gcs_path (str): project folder in the bucket
+        key (str): fragment key from the index or a placeholder, e.g. "variables/3"
+
+    Returns:
+        str: the HTML
+
+    Raises:
+        FileNotFoundError: no such report or fragment
+        ValueError: the key is not a fragment key
+    """
+    storage = get_storage()
+    if key:
+        if not _FRAGMENT_KEY.match(key):
+            raise ValueError(f"Invalid EDA section: {key}")
+        return storage.read(fragment_path(gcs_path, key)).decode("utf-8")
+
+    try:
+        page = storage.read(f"{gcs_path}/{EDA_SHELL_NAME}")
+    except FileNotFoundError:
+        page = storage.read(f"{gcs_path}/eda_report.html")
+    # Same title as /get-report gives eda_report.html
+    return page.decode("utf-8").replace("Pandas Profiling Report", "EDA Report")
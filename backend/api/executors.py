@@ -0,0 +1,256 @@
+import os
+import sys
+import json
+import uuid
+import logging
+import threading
+import subprocess
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+# Job states shared by every executor, following the Vertex AI naming
+JOB_STATE_QUEUED = "JOB_STATE_QUEUED"
+JOB_STATE_RUNNING = "JOB_STATE_RUNNING"
+JOB_STATE_SUCCEEDED = "JOB_STATE_SUCCEEDED"
+JOB_STATE_FAILED = "JOB_STATE_FAILED"
+
+LOCAL_JOB_PREFIX = "local-"
+
+
+class VertexExecutor:
+    """Run the training container as a Vertex AI custom job."""
+
+    name = "vertex"
+
+    def __init__(self, project_id, location, bucket_name):
+        self.project_id = project_id
+        self.location = location
+        self.bucket_name = bucket_name
+        self._aiplatform = None
+        self._init_lock = threading.Lock()
+
+    def _sdk(self):
+        """Import and initialise the Vertex AI SDK on first use."""
+        with self._init_lock:
+            if self._aiplatform is None:
+                from google.cloud import aiplatform
+                aiplatform.init(project=self.project_id)
+                self._aiplatform = aiplatform
+            return self._aiplatform
+
+    def submit(self, display_name: str, worker_pool_specs: list) -> Dict[str, Any]:
+        """Submit a custom job and return its id and display name."""
+        aiplatform = self._sdk()
+        job = aiplatform.CustomJob(
+            display_name=display_name,
+            worker_pool_specs=worker_pool_specs,
+            staging_bucket=f'gs://{self.bucket_name}'
+        )
+
+        job.submit()
+
+        with open("workpool.txt", "a") as f:
+            f.write(job.resource_name + "\n")
+            f.write(str(worker_pool_specs))
+
+        return {
+            "status": "submitted",
+            "job_id": job.resource_name,
+            "display_name": job.display_name,
+        }
+
+    def get_status(self, job_id: str) -> Dict[str, Any]:
+        """Get the state and timestamps of a custom job."""
+        aiplatform = self._sdk()
+        client_options = {"api_endpoint": f"{self.location}-aiplatform.googleapis.com"}
+        client = aiplatform.gapic.JobServiceClient(client_options=client_options)
+        name = client.custom_job_path(
+            project=self.project_id, location=self.location, custom_job=job_id
+        )
+        response = client.get_custom_job(name=name)
+        return {
+            "job_id": response.name,
+            "display_name": response.display_name,
+            "state": response.state.name,
+            "create_time": response.create_time.isoformat() if response.create_time else None,
+            "start_time": response.start_time.isoformat() if response.start_time else None,
+            "end_time": response.end_time.isoformat() if response.end_time else None,
+            "error": response.error.message if response.error else None,
+        }
+
+
+class LocalExecutor:
+    """
+    Run vertez/train.py on CPU in a bounded pool of local training processes.
+
+    A local directory stands in for the bucket: gs:// inputs of the job are
+    staged into it and the training script writes its artifacts there. When
+    a storage backend is given, the artifacts are published back to it once
+    the job succeeds, so the API can serve them as usual. A process running
+    longer than timeout seconds is killed and its job marked failed. Job
+    states are kept in memory and mirrored to <bucket_dir>/_jobs/<job_id>.json.
+    """
+
+    name = "local"
+
+    def __init__(self, bucket_dir, bucket_name=None, storage=None, max_workers=1,
+                 train_script=None, python_executable=None, timeout=None):
+        self.bucket_dir = os.path.abspath(bucket_dir)
+        self.bucket_name = bucket_name
+        self.storage = storage
+        self.train_script = train_script
+        self.python_executable = python_executable or sys.executable
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="local-training")
+        self._jobs = {}
+        self._staged = set()  # Inputs copied from the bucket, never published back
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(self.bucket_dir, "_jobs"), exist_ok=True)
+
+    def _status_path(self, job_id):
+        return os.path.join(self.bucket_dir, "_jobs", f"{job_id}.json")
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.setdefault(job_id, {"job_id": job_id})
+            job.update(fields)
+            snapshot = dict(job)
+        with open(self._status_path(job_id), "w") as f:
+            json.dump(snapshot, f)
+
+    def _localize(self, value):
+        """Rewrite gs://<bucket>/ URIs to local paths, staging missing objects from the bucket."""
+        prefix = f"gs://{self.bucket_name}/"
+        if not self.bucket_name or prefix not in value:
+            return value
+        local_paths = []
+        for uri in value.split(","):
+            if not uri.startswith(prefix):
+                local_paths.append(uri)
+                continue
+            blob_name = uri[len(prefix):]
+            local_path = os.path.join(self.bucket_dir, blob_name)
+            if not os.path.exists(local_path) and self.storage is not None:
+                os.makedirs(os.path.dirname(local_path), exist_ok=True)
+                self.storage.download(blob_name, local_path)
+                logger.info("Staged %s into %s", uri, local_path)
+            local_paths.append(local_path)
+            with self._lock:
+                self._staged.add(local_path)
+        return ",".join(local_paths)
+
+    def _build_command(self, container_args):
+        args = []
+        values = iter(container_args)
+        for flag in values:
+            value = next(values)
+            if flag == "--bucket_name":
+                value = self.bucket_dir
+            else:
+                value = self._localize(value)
+            args.extend([flag, value])
+        return [self.python_executable, self.train_script, *args, "--storage_backend", "local"]
+
+    def _publish(self, container_args):
+        """
+        Upload the job's result folder from the local bucket to the storage backend.
+
+        The local manifest only holds the stages the job ran, so it is merged
+        into the project manifest rather than uploaded over it.
+        """
+        if self.storage is None or not self.bucket_name:
+            return
+        from .manifest import MANIFEST_FILE_NAME, import_stages
+
+        result_dir = container_args[container_args.index("--result_dir") + 1]
+        local_folder = os.path.join(self.bucket_dir, result_dir)
+        local_manifest = os.path.join(local_folder, MANIFEST_FILE_NAME)
+        generations = {}
+        for root, _, files in os.walk(local_folder):
+            for filename in files:
+                local_path = os.path.join(root, filename)
+                if local_path in self._staged or local_path == local_manifest:
+                    continue
+                blob_name = os.path.relpath(local_path, self.bucket_dir).replace(os.sep, "/")
+                generations[blob_name] = self.storage.upload(local_path, blob_name)
+                logger.info("Published %s to %s", local_path, self.storage.uri(blob_name))
+        if os.path.exists(local_manifest):
+            with open(local_manifest) as f:
+                import_stages(result_dir, json.load(f), generations)
+
+    def _run(self, job_id, container_args):
+        log_path = os.path.join(self.bucket_dir, "_jobs", f"{job_id}.log")
+        self._update(job_id, state=JOB_STATE_RUNNING, start_time=_now())
+        try:
+            command = self._build_command(container_args)
+            env = dict(os.environ, CUDA_VISIBLE_DEVICES="")
+            with open(log_path, "w") as log_file:
+                try:
+                    completed = subprocess.run(command, stdout=log_file, stderr=subprocess.STDOUT, env=env,
+                                               timeout=self.timeout)
+                except subprocess.TimeoutExpired:
+                    raise RuntimeError(f"Training timed out after {self.timeout:g}s, see {log_path}")
+            if completed.returncode != 0:
+                raise RuntimeError(f"Training exited with code {completed.returncode}, see {log_path}")
+            self._publish(container_args)
+            self._update(job_id, state=JOB_STATE_SUCCEEDED, end_time=_now())
+            logger.info("Local training job %s succeeded", job_id)
+        except Exception as e:
+            logger.error("Local training job %s failed: %s", job_id, e)
+            self._update(job_id, state=JOB_STATE_FAILED, end_time=_now(), error=str(e))
+
+    def submit(self, display_name: str, worker_pool_specs: list) -> Dict[str, Any]:
+        """Queue the training script with the container args of the first worker pool."""
+        container_args = list(worker_pool_specs[0]["container_spec"]["args"])
+        job_id = f"{LOCAL_JOB_PREFIX}{uuid.uuid4().hex[:12]}"
+        self._update(
+            job_id,
+            display_name=display_name,
+            state=JOB_STATE_QUEUED,
+            create_time=_now(),
+            start_time=None,
+            end_time=None,
+            error=None,
+            owner_pid=os.getpid(),
+        )
+        self._pool.submit(self._run, job_id, container_args)
+        return {
+            "status": "submitted",
+            "job_id": job_id,
+            "display_name": display_name,
+        }
+
+    def get_status(self, job_id: str) -> Dict[str, Any]:
+        """Get the state and timestamps of a local job."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        try:
+            with open(self._status_path(job_id)) as f:
+                job = json.load(f)
+        except FileNotFoundError:
+            raise ValueError(f"Unknown local job: {job_id}")
+        if job["state"] in (JOB_STATE_QUEUED, JOB_STATE_RUNNING) and not _process_alive(job.get("owner_pid")):
+            job.update(state=JOB_STATE_FAILED, error="Local job was interrupted")
+        return job
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _process_alive(pid):
+    """Whether the worker process that owns a local job is still running."""
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
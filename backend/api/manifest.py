@@ -0,0 +1,191 @@
+import os
+import json
+import time
+import random
+import hashlib
+import logging
+from datetime import datetime
+
+from .storage import GenerationMismatch, get_storage
+
+logger = logging.getLogger(__name__)
+
+# Index of a project's artifacts, kept in the project folder and extended by every stage.
+# vertez/train.py writes the same format for the training stage.
+MANIFEST_FILE_NAME = "manifest.json"
+# Concurrent stages (e.g. two summaries) retry a conditional update this many times
+MANIFEST_WRITE_ATTEMPTS = 5
+
+_HASH_BLOCK_BYTES = 1024 ** 2
+
+
+def _manifest_path(gcs_path):
+    return f"{gcs_path}/{MANIFEST_FILE_NAME}"
+
+
+def _generation(value):
+    # A string, as in the GCS JSON API: generations exceed the integers JavaScript holds exactly
+    return str(value) if value is not None else None
+
+
+def file_sha256(local_path):
+    digest = hashlib.sha256()
+    with open(local_path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest(gcs_path):
+    """The manifest of a project folder, or None for projects created before manifests."""
+    try:
+        return json.loads(get_storage().read(_manifest_path(gcs_path)))
+    except FileNotFoundError:
+        return None
+
+
+def _update_manifest(gcs_path, update):
+    """
+    Apply update(manifest) to the stored manifest with a generation precondition,
+    re-reading and retrying when another stage wrote it in between.
+    """
+    storage = get_storage()
+    path = _manifest_path(gcs_path)
+    for attempt in range(1, MANIFEST_WRITE_ATTEMPTS + 1):
+        try:
+            try:
+                data, generation = storage.read_versioned(path)
+                manifest = json.loads(data)
+            except FileNotFoundError:
+                manifest, generation = {"project_folder": gcs_path, "stages": {}, "artifacts": {}}, 0
+            update(manifest)
+            manifest["updated_at"] = datetime.utcnow().isoformat()
+            storage.write(path, json.dumps(manifest, indent=2), content_type="application/json",
+                          if_generation_match=generation)
+            return manifest
+        except GenerationMismatch:
+            if attempt == MANIFEST_WRITE_ATTEMPTS:
+                raise
+            time.sleep(random.uniform(0.05, 0.2) * attempt)
+
+
+def _apply_stage(manifest, stage, artifacts, record):
+    previous = manifest["stages"].get(stage, {})
+    # Stages that run once per artifact (summaries, appends) accumulate their artifacts
+    names = sorted(set(previous.get("artifacts", [])) | set(artifacts))
+    manifest["stages"][stage] = dict(record, artifacts=names)
+    for name, entry in artifacts.items():
+        manifest["artifacts"][name] = dict(entry, stage=stage)
+
+
+def record_stage(gcs_path, stage, artifacts, started_at, finished_at=None, **details):
+    """
+    Record a finished stage and the artifacts it wrote in the project manifest.
+
+    The manifest only indexes artifacts that were already written, so a
+    failed update is logged rather than failing the stage; readers fall back
+    to listing the project folder when a project has no manifest.
+
+    Args:
+        gcs_path (str): project folder in the bucket
+        stage (str): upload, eda, append, training or summarization
+        artifacts (dict): object name relative to the folder -> entry from ManifestStage
+        started_at (datetime): when the stage started
+        finished_at (datetime): when it finished, defaults to now
+        details: extra JSON-friendly fields stored with the stage
+
+    Returns:
+        dict: the updated manifest, or None if it could not be written
+    """
+    finished_at = finished_at or datetime.utcnow()
+    record = {
+        "started_at": started_at.isoformat(),
+        "finished_at": finished_at.isoformat(),
+        "seconds": round((finished_at - started_at).total_seconds(), 3),
+        **details,
+    }
+    try:
+        return _update_manifest(gcs_path, lambda manifest: _apply_stage(manifest, stage, artifacts, record))
+    except Exception as e:
+        logger.error("Failed to record stage %s in the manifest of %s: %s", stage, gcs_path, e)
+        return None
+
+
+def import_stages(gcs_path, manifest, generations):
+    """
+    Merge the stages of a manifest written elsewhere, e.g. by a local training
+    process, into the project manifest once its artifacts have been published.
+
+    Args:
+        gcs_path (str): project folder in the bucket
+        manifest (dict): manifest whose stages and artifacts are merged
+        generations (dict): blob name -> generation the artifact was published at
+    """
+    def update(current):
+        for stage, record in manifest.get("stages", {}).items():
+            artifacts = {}
+            for name in record.get("artifacts", []):
+                entry = dict(manifest["artifacts"][name])
+                entry["generation"] = _generation(generations.get(f"{gcs_path}/{name}", entry.get("generation")))
+                artifacts[name] = entry
+            _apply_stage(current, stage, artifacts, {key: value for key, value in record.items() if key != "artifacts"})
+
+    try:
+        return _update_manifest(gcs_path, update)
+    except Exception as e:
+        logger.error("Failed to import manifest stages into %s: %s", gcs_path, e)
+        return None
+
+
+class ManifestStage:
+    """
+    Write a stage's artifacts to a project folder and record them, with their
+    size, content hash, generation and write time, in the manifest on commit.
+    """
+
+    def __init__(self, gcs_path, stage):
+        self.gcs_path = gcs_path
+        self.stage = stage
+        self.started_at = datetime.utcnow()
+        self.artifacts = {}
+
+    def add(self, name, size, sha256, generation=None, content_type=None, seconds=None):
+        """Record an artifact already written to <gcs_path>/<name>."""
+        self.artifacts[name] = {
+            "size": size,
+            "sha256": sha256,
+            "generation": _generation(generation),
+            "content_type": content_type,
+            "written_at": datetime.utcnow().isoformat(),
+            "seconds": round(seconds, 3) if seconds is not None else None,
+        }
+
+    def add_written(self, name, data, content_type=None):
+        """Record content streamed to <gcs_path>/<name> by other means, e.g. an open_writer."""
+        data = data.encode("utf-8") if isinstance(data, str) else data
+        stat = get_storage().stat(f"{self.gcs_path}/{name}")
+        self.add(name, len(data), hashlib.sha256(data).hexdigest(), stat["generation"] if stat else None,
+                 content_type, (datetime.utcnow() - self.started_at).total_seconds())
+
+    def write(self, name, data, content_type=None):
+        """Store bytes or text as <gcs_path>/<name>; returns its blob path."""
+        data = data.encode("utf-8") if isinstance(data, str) else data
+        started = time.perf_counter()
+        path = f"{self.gcs_path}/{name}"
+        generation = get_storage().write(path, data, content_type=content_type)
+        self.add(name, len(data), hashlib.sha256(data).hexdigest(), generation, content_type,
+                 time.perf_counter() - started)
+        return path
+
+    def upload(self, name, local_path, content_type=None):
+        """Upload a local file as <gcs_path>/<name>; returns its blob path."""
+        started = time.perf_counter()
+        path = f"{self.gcs_path}/{name}"
+        generation = get_storage().upload(local_path, path, content_type=content_type)
+        self.add(name, os.path.getsize(local_path), file_sha256(local_path), generation, content_type,
+                 time.perf_counter() - started)
+        return path
+
+    def commit(self, **details):
+        """Record the stage and its artifacts in the manifest."""
+        return record_stage(self.gcs_path, self.stage, self.artifacts, self.started_at, **details)
@@ -28,3 +28,81 @@ class Project(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     status = db.Column(SQLAlchemyEnum(ProjectStatus), nullable=False, default=ProjectStatus.PENDING)  # Enum column for status
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class ProjectStatusHistory(db.Model):
+    __tablename__ = 'project_status_history'
+    __table_args__ = (
+        db.UniqueConstraint('project_id', 'job_id', 'status', name='uq_status_history_transition'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False, index=True)
+    job_id = db.Column(db.String(100), nullable=False, index=True)
+    status = db.Column(SQLAlchemyEnum(ProjectStatus), nullable=False)
+    job_state = db.Column(db.String(50), nullable=False)  # Raw Vertex AI job state, e.g. JOB_STATE_QUEUED
+    recorded_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # First time the transition was seen
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    job_create_time = db.Column(db.DateTime, nullable=True)
+    job_start_time = db.Column(db.DateTime, nullable=True)
+    job_end_time = db.Column(db.DateTime, nullable=True)
+
+
+class TrainingRun(db.Model):
+    __tablename__ = 'training_runs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False, index=True)
+    job_id = db.Column(db.String(100), nullable=False, unique=True)
+    executor = db.Column(db.String(20), nullable=False)
+    tier = db.Column(db.String(50), nullable=False)
+    machine_type = db.Column(db.String(50), nullable=False)
+    accelerator_type = db.Column(db.String(50), nullable=True)
+    accelerator_count = db.Column(db.Integer, nullable=False, default=0)
+    n_geos = db.Column(db.Integer, nullable=True)
+    n_times = db.Column(db.Integer, nullable=True)
+    n_channels = db.Column(db.Integer, nullable=True)
+    n_chains = db.Column(db.Integer, nullable=False)
+    n_draws = db.Column(db.Integer, nullable=False)  # Of the largest fit when the job is a sweep
+    n_configs = db.Column(db.Integer, nullable=False, default=1, server_default="1")  # Sweep configurations fitted
+    problem_size = db.Column(db.BigInteger, nullable=True)  # None when the dataset could not be inspected
+    submitted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    final_state = db.Column(db.String(50), nullable=True)
+    runtime_seconds = db.Column(db.Float, nullable=True)  # Vertex start to end time
+
+
+class DatasetVersion(db.Model):
+    __tablename__ = 'dataset_versions'
+    __table_args__ = (
+        db.UniqueConstraint('project_id', 'version', name='uq_dataset_version'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False, index=True)
+    version = db.Column(db.Integer, nullable=False)  # Version 0 is the uploaded file, without a row
+    base_path = db.Column(db.String(255), nullable=False)  # Blob of the uploaded or last compacted dataset
+    delta_paths = db.Column(db.Text, nullable=False, default="[]")  # JSON list of delta blobs, applied in order
+    geo_column = db.Column(db.String(100), nullable=False)
+    time_column = db.Column(db.String(100), nullable=False)
+    row_count = db.Column(db.Integer, nullable=True)
+    rows_appended = db.Column(db.Integer, nullable=False, default=0)
+    compacted = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class TrainingSubmission(db.Model):
+    __tablename__ = 'training_submissions'
+
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False, index=True)
+    idempotency_key = db.Column(db.String(200), nullable=True, unique=True)
+    params_hash = db.Column(db.String(64), nullable=False, index=True)  # Training parameters and dataset version
+    # "<project id>:<params hash>" while the job is submitting or running, NULL once it ends,
+    # so the unique constraint admits a single in-flight job per project and parameters
+    in_flight_key = db.Column(db.String(100), nullable=True, unique=True)
+    status = db.Column(db.String(20), nullable=False, default="SUBMITTING")  # SUBMITTING, SUBMITTED, SUCCEEDED, FAILED
+    job_id = db.Column(db.String(100), nullable=True, index=True)
+    response = db.Column(db.Text, nullable=True)  # JSON result returned for the original submission
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,252 @@
+import io
+import os
+import json
+import importlib.util
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any
+
+from .manifest import load_manifest
+from .storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+# Models are accounted by their serialized size, which tracks their in-memory footprint
+MODEL_CACHE_MAX_BYTES = int(os.getenv("MODEL_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+SCENARIO_CACHE_SIZE = int(os.getenv("SCENARIO_CACHE_SIZE", "256"))
+
+SCENARIO_OPTIONS = {
+    "budget", "fixedBudget", "pctOfSpend", "spendConstraintLower", "spendConstraintUpper",
+    "targetRoi", "targetMroi", "startDate", "endDate",
+}
+
+
+class ScenarioUnavailable(Exception):
+    """Raised when the optimization runtime (Meridian) is not installed or cannot load the saved model."""
+
+
+def scenarios_available():
+    """Whether Meridian is installed; it ships with the scenario image only (requirements-scenarios.txt)."""
+    return importlib.util.find_spec("meridian") is not None
+
+
+def check_model_runtime(gcs_path):
+    """
+    Compare the package versions a project's model was saved with to the installed ones.
+
+    train.py records them as model_runtime of the manifest's training stage;
+    models trained before that are loaded unchecked.
+
+    Raises:
+        ScenarioUnavailable: if Meridian, TensorFlow or TensorFlow Probability differ
+    """
+    manifest = load_manifest(gcs_path) or {}
+    saved = manifest.get("stages", {}).get("training", {}).get("model_runtime")
+    if not saved:
+        return
+    from importlib import metadata
+
+    mismatched = []
+    for package, version in saved.items():
+        try:
+            installed = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            installed = None
+        if installed != version:
+            mismatched.append(f"{package} {version} (installed: {installed})")
+    if mismatched:
+        raise ScenarioUnavailable(f"Model was saved with {', '.join(mismatched)}; "
+                                  "serve scenarios from an image with the training image's versions")
+
+
+def _parse_bool(value, name):
+    if isinstance(value, bool):
+        return value
+    raise ValueError(f"{name} must be true or false")
+
+
+class ModelCache:
+    """
+    LRU cache of loaded Meridian models, bounded by their total serialized size.
+
+    Entries are keyed by blob path and generation, so a retrained model is
+    reloaded while the stale copy ages out. Concurrent requests for the same
+    model wait for a single download.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._models = OrderedDict()  # (blob path, generation) -> (model, size)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    def get(self, blob_path):
+        """
+        Return the model stored at blob_path and its generation.
+
+        Raises:
+            FileNotFoundError: if the blob does not exist
+        """
+        storage = get_storage()
+        stat = storage.stat(blob_path)
+        if stat is None:
+            raise FileNotFoundError(f"Saved model not found: {blob_path}")
+        generation = stat["generation"]
+        key = (blob_path, generation)
+
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key][0], generation
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        try:
+            with load_lock:
+                with self._lock:
+                    if key in self._models:
+                        self._models.move_to_end(key)
+                        return self._models[key][0], generation
+                data = storage.read(blob_path)
+                try:
+                    import joblib
+
+                    # save_mmm writes with joblib, whose numpy buffers plain pickle cannot read
+                    mmm = joblib.load(io.BytesIO(data))
+                except ModuleNotFoundError as e:
+                    raise ScenarioUnavailable(f"Meridian is not installed: {e}")
+                logger.info("Loaded model %s (generation %s, %s bytes)", blob_path, generation, len(data))
+                self._put(key, mmm, len(data))
+                return mmm, generation
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+
+    def _put(self, key, mmm, size):
+        with self._lock:
+            self._models[key] = (mmm, size)
+            self._total_bytes += size
+            while self._total_bytes > self.max_bytes and len(self._models) > 1:
+                evicted_key, (_, evicted_size) = self._models.popitem(last=False)
+                self._total_bytes -= evicted_size
+                logger.info("Evicted model %s from cache", evicted_key[0])
+
+    def stats(self):
+        with self._lock:
+            return {
+                "models": len(self._models),
+                "total_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+model_cache = ModelCache(MODEL_CACHE_MAX_BYTES)
+_scenario_results = OrderedDict()
+_scenario_lock = threading.Lock()
+
+
+def _channel_bounds(value, channels, name):
+    """Turn a scalar or {channel: bound} mapping into the per-channel list Meridian expects."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if not isinstance(value, dict):
+        raise ValueError(f"{name} must be a number or a mapping of channel to bound")
+    unknown = set(value) - set(channels)
+    if unknown:
+        raise ValueError(f"Unknown channels in {name}: {sorted(unknown)}")
+    default = 0.3  # Meridian's default spend constraint
+    return [float(value.get(channel, default)) for channel in channels]
+
+
+def _dataset_records(dataset):
+    """Convert an optimization xarray Dataset into JSON-friendly per-channel records."""
+    frame = dataset.to_dataframe().reset_index()
+    return json.loads(frame.to_json(orient="records", date_format="iso"))
+
+
+def _dataset_attrs(dataset):
+    return json.loads(json.dumps(dict(dataset.attrs), default=str))
+
+
+def optimize_scenario(gcs_path, scenario: Dict[str, Any]):
+    """
+    Run a what-if budget optimization against a project's fitted model.
+
+    Args:
+        gcs_path (str): project folder holding saved_mmm.pkl
+        scenario (dict): budget, fixedBudget, pctOfSpend, spendConstraintLower,
+            spendConstraintUpper (number or {channel: bound}), targetRoi,
+            targetMroi, startDate and endDate; all optional
+
+    Returns:
+        tuple: (result dict, whether it was served from the scenario cache)
+
+    Raises:
+        ValueError: for invalid scenario options
+        FileNotFoundError: if the project has no saved model
+        ScenarioUnavailable: if Meridian is not installed or is not the version
+            the model was saved with
+    """
+    if not isinstance(scenario, dict):
+        raise ValueError("Scenario must be an object of optimization options")
+    unknown = set(scenario) - SCENARIO_OPTIONS
+    if unknown:
+        raise ValueError(f"Unknown scenario options: {sorted(unknown)}")
+    fixed_budget = _parse_bool(scenario.get("fixedBudget", True), "fixedBudget")
+    if not scenarios_available():
+        raise ScenarioUnavailable("Meridian is not installed; serve scenarios from the image built with requirements-scenarios.txt")
+
+    check_model_runtime(gcs_path)
+    blob_path = f"{gcs_path}/saved_mmm.pkl"
+    mmm, generation = model_cache.get(blob_path)
+
+    scenario_key = hashlib.sha256(
+        json.dumps([blob_path, generation, scenario], sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+    with _scenario_lock:
+        if scenario_key in _scenario_results:
+            _scenario_results.move_to_end(scenario_key)
+            return _scenario_results[scenario_key], True
+
+    try:
+        from meridian.analysis import optimizer
+    except ImportError as e:
+        raise ScenarioUnavailable(f"Meridian is not installed: {e}")
+
+    channels = [str(channel) for channel in mmm.input_data.media_channel.values]
+    selected_times = None
+    if scenario.get("startDate") or scenario.get("endDate"):
+        selected_times = (scenario.get("startDate"), scenario.get("endDate"))
+
+    optimize_kwargs = {
+        "selected_times": selected_times,
+        "fixed_budget": fixed_budget,
+        "budget": scenario.get("budget"),
+        "pct_of_spend": scenario.get("pctOfSpend"),
+        "target_roi": scenario.get("targetRoi"),
+        "target_mroi": scenario.get("targetMroi"),
+    }
+    for option, name in (("spendConstraintLower", "spend_constraint_lower"),
+                         ("spendConstraintUpper", "spend_constraint_upper")):
+        bounds = _channel_bounds(scenario.get(option), channels, option)
+        if bounds is not None:
+            optimize_kwargs[name] = bounds
+    optimize_kwargs = {key: value for key, value in optimize_kwargs.items() if value is not None}
+
+    logger.info("Optimizing scenario %s for %s", scenario_key[:12], blob_path)
+    results = optimizer.BudgetOptimizer(mmm).optimize(**optimize_kwargs)
+    result = {
+        "channels": channels,
+        "optimized": _dataset_records(results.optimized_data),
+        "optimized_summary": _dataset_attrs(results.optimized_data),
+        "non_optimized": _dataset_records(results.nonoptimized_data),
+        "non_optimized_summary": _dataset_attrs(results.nonoptimized_data),
+    }
+
+    with _scenario_lock:
+        _scenario_results[scenario_key] = result
+        while len(_scenario_results) > SCENARIO_CACHE_SIZE:
+            _scenario_results.popitem(last=False)
+    return result, False
@@ -1,28 +1,50 @@
 import os
 import io
-from google.cloud import aiplatform, storage
-from datetime import datetime
+import sys
+import json
+import itertools
+import threading
+from datetime import datetime, timezone
 import logging
 from typing import Dict, Any
-from api.models import User, Project
+from api.models import User, Project, ProjectStatus, ProjectStatusHistory, TrainingRun
 from .db import db
-import pandas as pd
-from ydata_profiling import ProfileReport
-import base64
-import pdfkit
-import vertexai
-import time
-from vertexai.generative_models import GenerativeModel, Part, SafetySetting
-
+import tempfile
+
+from .storage import get_storage, LocalStorage, LOCAL_BUCKET_DIR
+from .async_io import run_io
+from .admission import limits
+from .manifest import ManifestStage, load_manifest
+from .eda_sections import write_eda_sections
+from .submissions import finish_submissions
+from .executors import VertexExecutor, LocalExecutor, LOCAL_JOB_PREFIX
+from .sizing import estimate_problem_size, select_machine_tier, machine_spec_for_tier, load_machine_tiers
 from .summary_prompt import summary_prompt
 from dotenv import load_dotenv
 load_dotenv()
 
+logger = logging.getLogger(__name__)
 
 BUCKET_NAME = os.getenv("BUCKET_NAME")
-aiplatform.init(project="insightsmix")
-# Initialize GCS client
-client = storage.Client()
+
+# Training execution: "vertex" submits custom jobs, "local" runs vertez/train.py on CPU in-process
+TRAINING_EXECUTOR = os.getenv("TRAINING_EXECUTOR", "vertex")
+LOCAL_TRAINING_WORKERS = int(os.getenv("LOCAL_TRAINING_WORKERS", "1"))
+LOCAL_TRAINING_SCRIPT = os.getenv(
+    "LOCAL_TRAINING_SCRIPT",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "vertez", "train.py")
+)
+LOCAL_TRAINING_PYTHON = os.getenv("LOCAL_TRAINING_PYTHON", sys.executable)
+# A local training process running longer than this is killed and its job failed; 0 disables the limit
+LOCAL_TRAINING_TIMEOUT_SECONDS = float(os.getenv("LOCAL_TRAINING_TIMEOUT_SECONDS", "21600"))
+# Executors a submission may ask for with "executor"; by default only TRAINING_EXECUTOR, so
+# clients cannot run CPU fits on the API host unless the server enables "local"
+ALLOWED_TRAINING_EXECUTORS = {
+    name.strip() for name in os.getenv("ALLOWED_TRAINING_EXECUTORS", "").split(",") if name.strip()
+} | {TRAINING_EXECUTOR}
+
+# pandas, numpy, ydata-profiling, pdfkit and the Vertex AI SDK are imported by the
+# functions that use them, so workers boot without paying for them up front.
 
 
 class GCSUploader:
@@ -44,22 +66,239 @@ class GCSUploader:
         Upload file data to GCS
         """
         try:
-            bucket = client.bucket(BUCKET_NAME)
-            blob = bucket.blob(destination_path)
-            blob.upload_from_string(file_data, content_type='text/csv')
-            return f"gs://{BUCKET_NAME}/{destination_path}"
+            storage = get_storage()
+            storage.write(destination_path, file_data, content_type='text/csv')
+            return storage.uri(destination_path)
         except Exception as e:
             raise Exception(f"GCS Upload Error: {e}")
         
         
 
+# MCMC sampling budgets selectable per training submission
+SAMPLING_PRESETS = {
+    "quick": {"n_chains": 2, "n_adapt": 100, "n_burnin": 100, "n_keep": 200},
+    "standard": {"n_chains": 3, "n_adapt": 200, "n_burnin": 200, "n_keep": 500},
+    "full": {"n_chains": 4, "n_adapt": 500, "n_burnin": 500, "n_keep": 1000},
+}
+DEFAULT_SAMPLING_PRESET = "standard"
+DEFAULT_ROI_PRIOR = {"roi_mu": 0.2, "roi_sigma": 0.9}
+
+# Adaptation and burn-in are shortened when the sampler is seeded from a previous fit
+WARM_START_STEP_FRACTION = 0.25
+WARM_START_MIN_STEPS = 25
+
+
+def resolve_sampling_params(training_params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Resolve the MCMC sampling budget and ROI prior for a training submission.
+
+    Starts from the preset named by "samplingPreset" (quick, standard or full;
+    standard by default) and applies explicit values from the "sampling" dict,
+    e.g. {"n_chains": 2, "n_keep": 300, "roi_sigma": 0.5}. When the run is
+    warm-started ("warmStartProjectId"), adaptation and burn-in default to a
+    fraction of the preset.
+
+    Raises:
+        ValueError: if the preset is unknown or a value is invalid
+    """
+    preset_name = training_params.get("samplingPreset") or DEFAULT_SAMPLING_PRESET
+    if preset_name not in SAMPLING_PRESETS:
+        raise ValueError(f"Unknown sampling preset '{preset_name}', expected one of {sorted(SAMPLING_PRESETS)}")
+
+    params = dict(SAMPLING_PRESETS[preset_name])
+    params.update(DEFAULT_ROI_PRIOR)
+    if training_params.get("warmStartProjectId"):
+        for key in ("n_adapt", "n_burnin"):
+            params[key] = max(WARM_START_MIN_STEPS, int(params[key] * WARM_START_STEP_FRACTION))
+
+    sampling = training_params.get("sampling") or {}
+    if not isinstance(sampling, dict):
+        raise ValueError("Sampling must map sampling options to values")
+    for key, value in sampling.items():
+        if key not in params and key != "n_prior_draws":
+            raise ValueError(f"Unknown sampling option '{key}'")
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid value for sampling option '{key}': {value!r}")
+        if key.startswith("n_"):
+            if not number.is_integer() or number < 1:
+                raise ValueError(f"Sampling option '{key}' must be a positive integer, got {value!r}")
+            number = int(number)
+        if key == "roi_sigma" and number <= 0:
+            raise ValueError("Sampling option 'roi_sigma' must be positive")
+        params[key] = number
+    # Prior draws follow the resolved n_keep unless given explicitly, as in train.py
+    params.setdefault("n_prior_draws", params["n_keep"])
+    return params
+
+
+# Upper bound on the number of fits a single sweep job may run
+MAX_SWEEP_CONFIGS = 16
+
+
+def resolve_sweep_grid(training_params: Dict[str, Any]):
+    """
+    Validate the optional prior/hyperparameter sweep grid of a training submission.
+
+    The "sweep" dict maps sampling options (see resolve_sampling_params) to
+    lists of values, e.g. {"roi_mu": [0.1, 0.2], "roi_sigma": [0.5, 0.9]};
+    the training job fits every combination on the same data.
+
+    Returns:
+        dict: the grid with every value as a list of validated, typed values
+            (int for n_* options, float otherwise), or None when no sweep was requested
+
+    Raises:
+        ValueError: if an option is unknown, a value is invalid or the grid is too large
+    """
+    sweep = training_params.get("sweep")
+    if not sweep:
+        return None
+    if not isinstance(sweep, dict):
+        raise ValueError("Sweep must map sampling options to lists of values")
+
+    grid = {}
+    n_configs = 1
+    for key, values in sweep.items():
+        values = values if isinstance(values, list) else [values]
+        if not values:
+            raise ValueError(f"Sweep option '{key}' has no values")
+        # The job receives the coerced values, e.g. 2 rather than "2"
+        grid[key] = [resolve_sampling_params({**training_params, "sampling": {key: value}})[key] for value in values]
+        n_configs *= len(values)
+    if n_configs > MAX_SWEEP_CONFIGS:
+        raise ValueError(f"Sweep has {n_configs} configurations, at most {MAX_SWEEP_CONFIGS} are allowed")
+    return grid
+
+
+def plan_training_resources(dataset_blob_path, training_params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Estimate the problem size of a training submission and pick a machine tier.
+
+    Geo and time counts come from the stored dataset (a blob path, or the
+    base and delta paths of a dataset version), reading only those two
+    columns; channels from the media mapping; chains and draws from the
+    resolved sampling budget. A sweep job fits every configuration of its
+    grid, so its problem size is the sum over the configurations, and
+    n_chains and n_draws are those of its largest fit.
+
+    Returns:
+        dict: dimensions, n_configs, problem_size (None if the dataset could
+            not be read) and tier
+    """
+    sampling = resolve_sampling_params(training_params)
+    sweep_grid = resolve_sweep_grid(training_params) or {}
+    names = sorted(sweep_grid)
+    configs = [dict(sampling, **dict(zip(names, values)))
+               for values in itertools.product(*(sweep_grid[name] for name in names))]
+    chain_draws = [(config["n_chains"], config["n_adapt"] + config["n_burnin"] + config["n_keep"])
+                   for config in configs]
+    n_chains, n_draws = max(chain_draws, key=lambda pair: pair[0] * pair[1])
+    n_channels = len(training_params.get("media") or [])
+    geo_column = (training_params.get("geo") or [None])[0]
+    time_column = (training_params.get("date") or [None])[0]
+
+    n_geos = n_times = problem_size = None
+    try:
+        columns = [column for column in (geo_column, time_column) if column]
+        keys = read_dataset_parts(dataset_blob_path, columns, columns=columns)
+        n_geos = int(keys[geo_column].nunique()) if geo_column else 1
+        n_times = int(keys[time_column].nunique()) if time_column else len(keys)
+        problem_size = sum(estimate_problem_size(n_geos, n_times, n_channels, chains, draws)
+                           for chains, draws in chain_draws)
+    except Exception as e:
+        logger.warning("Could not estimate problem size for %s: %s", dataset_blob_path, e)
+
+    tier = select_machine_tier(problem_size)
+    logger.info("Problem size %s (%s geos x %s times x %s channels x %s configs of up to %s chains x %s draws) "
+                "-> tier %s", problem_size, n_geos, n_times, n_channels, len(configs), n_chains, n_draws, tier["name"])
+    return {
+        "n_geos": n_geos,
+        "n_times": n_times,
+        "n_channels": n_channels,
+        "n_chains": n_chains,
+        "n_draws": n_draws,
+        "n_configs": len(configs),
+        "problem_size": problem_size,
+        "tier": tier,
+    }
+
+
+def record_training_run(project_id, job_id, executor, plan):
+    """Store the sizing decision of a submitted job so runtimes can calibrate the tier table."""
+    tier = plan["tier"]
+    run = TrainingRun(
+        project_id=project_id,
+        job_id=job_id,
+        executor=executor,
+        tier=tier["name"],
+        machine_type=tier["machine_type"],
+        accelerator_type=tier.get("accelerator_type"),
+        accelerator_count=tier.get("accelerator_count") or 0,
+        n_geos=plan["n_geos"],
+        n_times=plan["n_times"],
+        n_channels=plan["n_channels"],
+        n_chains=plan["n_chains"],
+        n_draws=plan["n_draws"],
+        n_configs=plan["n_configs"],
+        problem_size=plan["problem_size"],
+    )
+    db.session.add(run)
+    db.session.commit()
+    return run
+
+
+def get_sizing_report():
+    """
+    Aggregate recorded runs per tier for calibrating the tier table.
+
+    Returns:
+        list: per tier, run counts by final state, mean runtime and mean
+            runtime per million problem-size units of succeeded runs; sweep
+            runs fit their configurations side by side, so they are counted
+            but left out of the means
+    """
+    report = {}
+    for run in TrainingRun.query.all():
+        entry = report.setdefault(run.tier, {
+            "tier": run.tier,
+            "machine_type": run.machine_type,
+            "accelerator_type": run.accelerator_type,
+            "accelerator_count": run.accelerator_count,
+            "runs": 0,
+            "sweep_runs": 0,
+            "states": {},
+            "_runtimes": [],
+            "_per_million": [],
+        })
+        entry["runs"] += 1
+        state = run.final_state or "IN_PROGRESS"
+        entry["states"][state] = entry["states"].get(state, 0) + 1
+        if (run.n_configs or 1) > 1:
+            entry["sweep_runs"] += 1
+            continue
+        if run.final_state == "JOB_STATE_SUCCEEDED" and run.runtime_seconds is not None:
+            entry["_runtimes"].append(run.runtime_seconds)
+            if run.problem_size:
+                entry["_per_million"].append(run.runtime_seconds / (run.problem_size / 1e6))
+
+    for entry in report.values():
+        runtimes, per_million = entry.pop("_runtimes"), entry.pop("_per_million")
+        entry["mean_runtime_seconds"] = sum(runtimes) / len(runtimes) if runtimes else None
+        entry["mean_seconds_per_million_units"] = sum(per_million) / len(per_million) if per_million else None
+    return list(report.values())
+
+
 class ModelTrainingService:
-    def __init__(self, timestamp_folder="", gcs_path=""):
+    def __init__(self, timestamp_folder="", gcs_path="", warm_start_model_path=None, machine_tier=None):
         self.project_id = "insightsmix"
         self.base_image_uri = "us-central1-docker.pkg.dev/insightsmix/mmm-training/mmm"
         self.location = "us-central1"
         self.timestamp_folder = timestamp_folder
         self.gcs_path = gcs_path
+        self.warm_start_model_path = warm_start_model_path
+        self.machine_tier = machine_tier or select_machine_tier(None)
         
     def _create_worker_pool_specs(self, training_params: Dict[str, Any]) -> list:
         """Create worker pool specifications for the training job."""
@@ -73,13 +312,13 @@ class ModelTrainingService:
         # Convert the mappings to JSON string format
         CORRECT_MEDIA_TO_CHANNEL_JSON = str(CORRECT_MEDIA_TO_CHANNEL).replace("'", '"')
         CORRECT_MEDIA_SPEND_TO_CHANNEL_JSON = str(CORRECT_MEDIA_SPEND_TO_CHANNEL).replace("'", '"')
+        sampling = resolve_sampling_params(training_params)
+        warm_start_args = ["--warm_start_model", self.warm_start_model_path] if self.warm_start_model_path else []
+        sweep_grid = resolve_sweep_grid(training_params)
+        sweep_args = ["--sweep_config", json.dumps(sweep_grid)] if sweep_grid else []
 
         return [{
-            "machine_spec": {
-                "machine_type": "n1-standard-16",
-                "accelerator_type": "NVIDIA_TESLA_T4",
-                "accelerator_count": 2,
-            },
+            "machine_spec": machine_spec_for_tier(self.machine_tier),
             "replica_count": 1,
             "container_spec": {
                 "image_uri": self.base_image_uri,
@@ -99,62 +338,140 @@ class ModelTrainingService:
                     "--media_spend", ",".join(training_params.get('mediaSpend', [])),
                     "--correct_media_to_channel", CORRECT_MEDIA_TO_CHANNEL_JSON,
                     "--correct_media_spend_to_channel", CORRECT_MEDIA_SPEND_TO_CHANNEL_JSON,
+                    "--n_chains", str(sampling["n_chains"]),
+                    "--n_adapt", str(sampling["n_adapt"]),
+                    "--n_burnin", str(sampling["n_burnin"]),
+                    "--n_keep", str(sampling["n_keep"]),
+                    "--n_prior_draws", str(sampling["n_prior_draws"]),
+                    "--roi_mu", str(sampling["roi_mu"]),
+                    "--roi_sigma", str(sampling["roi_sigma"]),
+                    *warm_start_args,
+                    *sweep_args,
                 ]
             }
         }]
 
 
     def start_training_job(self, training_params: Dict[str, Any]) -> Dict[str, Any]:
-        """Start a new training job with the provided parameters."""
+        """
+        Start a new training job with the provided parameters.
+
+        The job runs on the executor named by training_params["executor"]
+        ("vertex" or "local") if the server allows it, else on the machine
+        tier's executor, defaulting to TRAINING_EXECUTOR.
+        """
         try:
+            requested = check_requested_executor(training_params.get("executor"))
             worker_pool_specs = self._create_worker_pool_specs(training_params)
             project_name = training_params.get("projectName")
+            executor = get_training_executor(requested or self.machine_tier.get("executor"))
 
-            job = aiplatform.CustomJob(
-                display_name=f'{project_name}-{datetime.now().strftime("%Y%m%d-%H%M%S")}',
-                worker_pool_specs=worker_pool_specs,
-                staging_bucket=f'gs://{BUCKET_NAME}'
+            result = executor.submit(
+                f'{project_name}-{datetime.now().strftime("%Y%m%d-%H%M%S")}',
+                worker_pool_specs
             )
-            
-            job.submit()
-
-            with open("workpool.txt", "a") as f:
-                f.write(job.resource_name + "\n")
-                f.write(str(worker_pool_specs))
-
-            return {
-                "status": "submitted",
-                "job_id": job.resource_name,
-                "display_name": job.display_name,
-            }
+            result.update(executor=executor.name, sampling=resolve_sampling_params(training_params))
+            return result
             
         except Exception as e:
-            logging.error(f"Error starting training job: {str(e)}")
+            logger.error("Error starting training job: %s", e)
             raise
 
 
     def get_job_status(self, job_id: str) -> Dict[str, Any]:
-        """Get the status of a training job."""
+        """Get the status of a training job from the executor that runs it."""
         try:
-            client_options = {"api_endpoint": "us-central1-aiplatform.googleapis.com"}
-            client = aiplatform.gapic.JobServiceClient(client_options=client_options)
-            name = client.custom_job_path(
-                project=self.project_id, location=self.location, custom_job=job_id
-            )
-            response = client.get_custom_job(name=name)
-            return {
-                "job_id": response.name,
-                "display_name": response.display_name,
-                "state": response.state.name,
-                "create_time": response.create_time.isoformat() if response.create_time else None,
-                "start_time": response.start_time.isoformat() if response.start_time else None,
-                "end_time": response.end_time.isoformat() if response.end_time else None,
-                "error": response.error.message if response.error else None,
-            }
+            executor_name = LocalExecutor.name if job_id.startswith(LOCAL_JOB_PREFIX) else VertexExecutor.name
+            return get_training_executor(executor_name).get_status(job_id)
         except Exception as e:
-            logging.error(f"Error getting job status: {str(e)}")
+            logger.error("Error getting job status: %s", e)
             raise
 
+    async def get_job_status_async(self, job_id: str) -> Dict[str, Any]:
+        """Async variant of get_job_status; the call runs in the bounded Vertex AI pool."""
+        return await run_io("vertex", self.get_job_status, job_id)
+
+
+_training_executors = {}
+_training_executors_lock = threading.Lock()
+
+
+def check_requested_executor(name):
+    """
+    Validate the executor a training submission asks for.
+
+    Raises:
+        ValueError: if the executor is not in ALLOWED_TRAINING_EXECUTORS
+    """
+    if name and name not in ALLOWED_TRAINING_EXECUTORS:
+        raise ValueError(f"Training executor '{name}' is not enabled on this server")
+    return name
+
+
+def get_training_executor(name=None):
+    """
+    Return the shared training executor with the given name.
+
+    Args:
+        name (str): "vertex" or "local"; defaults to TRAINING_EXECUTOR
+
+    Raises:
+        ValueError: for an unknown executor name
+    """
+    name = name or TRAINING_EXECUTOR
+    with _training_executors_lock:
+        if name not in _training_executors:
+            if name == VertexExecutor.name:
+                _training_executors[name] = VertexExecutor("insightsmix", "us-central1", BUCKET_NAME)
+            elif name == LocalExecutor.name:
+                # Local storage already is the executor's bucket directory, so nothing is staged or published
+                storage = get_storage()
+                _training_executors[name] = LocalExecutor(
+                    LOCAL_BUCKET_DIR,
+                    bucket_name=BUCKET_NAME,
+                    storage=storage if BUCKET_NAME and storage.name != LocalStorage.name else None,
+                    max_workers=LOCAL_TRAINING_WORKERS,
+                    train_script=LOCAL_TRAINING_SCRIPT,
+                    python_executable=LOCAL_TRAINING_PYTHON,
+                    timeout=LOCAL_TRAINING_TIMEOUT_SECONDS or None,
+                )
+            else:
+                raise ValueError(f"Unknown training executor '{name}'")
+        return _training_executors[name]
+
+
+def get_warm_start_model_path(user, project_id):
+    """
+    Locate the saved model of a previous project version to seed a new fit.
+
+    Args:
+        user (User): owner of both projects
+        project_id: ID of the previous project version
+
+    Returns:
+        str: gs:// URI of the previous version's saved_mmm.pkl
+
+    Raises:
+        ValueError: if the project does not belong to the user, has not
+            trained successfully, or has no saved model
+    """
+    project = Project.query.filter_by(id=project_id, user_id=user.id).first()
+    if not project:
+        raise ValueError("Warm start project not found for this user")
+    if project.status not in (ProjectStatus.SUCCESS, "SUCCESS"):
+        raise ValueError("Warm start project has not finished training successfully")
+
+    model_blob_path = f"{project.gcs_path}/saved_mmm.pkl"
+    manifest = load_manifest(project.gcs_path)
+    if manifest is not None and "training" in manifest["stages"]:
+        has_model = "saved_mmm.pkl" in manifest["artifacts"]
+    else:
+        # Trained before its training stage wrote the manifest
+        has_model = get_storage().exists(model_blob_path)
+    if not has_model:
+        raise ValueError("Warm start project has no saved model")
+    return f"gs://{BUCKET_NAME}/{model_blob_path}"
+
 
 def get_or_create_user(email):
     """Retrieve a user by email or create a new one."""
@@ -202,30 +519,338 @@ def get_projects_for_user(user_email):
         return projects_data, None
 
     except Exception as e:
-        print(f"Error in get_projects_for_user: {str(e)}")
+        logger.error("Error in get_projects_for_user: %s", e)
         return None, "Error retrieving projects"
 
 
 
 def upload_html_to_gcs(html_content, destination_blob_name):
     """Uploads an HTML string to the Google Cloud Storage bucket."""
-    bucket = client.bucket(BUCKET_NAME)
-    blob = bucket.blob(destination_blob_name)
-    blob.upload_from_string(html_content, content_type="text/html")
-    print(f"HTML content uploaded to {destination_blob_name}.")
+    get_storage().write(destination_blob_name, html_content, content_type="text/html")
+    logger.info("HTML content uploaded to %s.", destination_blob_name)
+
+
+# Text columns with at most this many distinct values per read block become categoricals
+DATASET_CATEGORICAL_MAX_CARDINALITY = 10_000
+# Bytes of CSV parsed per streamed block; only one block is held besides the result
+DATASET_READ_BLOCK_BYTES = 4 * 1024 ** 2
+# Distinct values tracked per column by scan_dataset before it stops counting
+DATASET_SCAN_MAX_DISTINCT = 10_000
+
+
+def _is_parquet(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source[:4]) == b"PAR1"
+    return str(source).endswith(".parquet")
+
+
+def _open_source(source, memory_map=False):
+    """Arrow input for a local path or in-memory file contents."""
+    import pyarrow as pa
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return pa.BufferReader(source)
+    if memory_map:
+        return pa.memory_map(source, "r")
+    return pa.OSFile(source, "r")
+
+
+def read_dataset_header(source):
+    """Column names of a CSV or Parquet dataset, without parsing its rows."""
+    if _is_parquet(source):
+        import pyarrow.parquet as pq
+        with _open_source(source) as f:
+            return pq.read_schema(f).names
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        first_line = bytes(source[:1024 ** 2]).split(b"\n", 1)[0]
+    else:
+        with open(source, "rb") as f:
+            first_line = f.readline()
+    import csv
+    return next(csv.reader([first_line.decode("utf-8-sig").rstrip("\r\n")]), [])
 
 
-def create_and_upload_eda(data_file_path, timestamp_folder):
+def _iter_csv_batches(source, memory_map=False, **convert_options):
+    """
+    Record batches of a CSV dataset, parsed block by block.
+
+    Column types are inferred from the first block, so a later block that does
+    not fit them (a float after integers, text in a numeric column) raises
+    pyarrow.ArrowInvalid.
+    """
+    from pyarrow import csv as pa_csv
+
+    read_options = pa_csv.ReadOptions(block_size=DATASET_READ_BLOCK_BYTES)
+    with _open_source(source, memory_map) as f:
+        yield from pa_csv.open_csv(f, read_options=read_options,
+                                   convert_options=pa_csv.ConvertOptions(**convert_options))
+
+
+def _narrow_floats(batch):
+    import pyarrow as pa
+
+    columns = [column.cast(pa.float32()) if pa.types.is_float64(column.type) else column
+               for column in batch.columns]
+    return pa.RecordBatch.from_arrays(columns, names=batch.schema.names)
+
+
+def _narrow_integers(table):
+    """Narrow integer columns to the smallest type that holds their values."""
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    for index, field in enumerate(table.schema):
+        if not pa.types.is_integer(field.type) or table.column(index).null_count == len(table):
+            continue
+        bounds = pc.min_max(table.column(index)).as_py()
+        for candidate in (pa.int8(), pa.int16(), pa.int32()):
+            info = np.iinfo(candidate.to_pandas_dtype())
+            if candidate.bit_width < field.type.bit_width and info.min <= bounds["min"] and bounds["max"] <= info.max:
+                table = table.set_column(index, field.with_type(candidate), table.column(index).cast(candidate))
+                break
+    return table
+
+
+def read_dataset(source, columns=None, string_columns=None, categorical=True, downcast=True,
+                 parse_dates=True, memory_map=False):
+    """
+    Read a CSV or Parquet dataset column-wise into a compact DataFrame.
+
+    CSV is parsed by Arrow block by block rather than by pandas' object
+    engine, and each block is narrowed before the next one is read, so peak
+    memory stays close to the size of the result. Low-cardinality text
+    columns (geos, channels) come back as categoricals, YYYY-MM-DD columns as
+    datetimes, integers in the smallest type that holds them and floats as
+    float32, which is ample for profiling and sizing.
+
+    Args:
+        source: local file path, or the file contents as bytes
+        columns (list): optional subset of columns to read
+        string_columns (list): columns kept as plain strings, e.g. keys to validate
+        categorical (bool): dictionary-encode low-cardinality text columns
+        downcast (bool): narrow numeric columns
+        parse_dates (bool): parse ISO dates; when False they stay strings
+        memory_map (bool): memory-map a local file instead of reading it into memory
+
+    Returns:
+        pandas.DataFrame
+    """
+    import pyarrow as pa
+
+    string_columns = list(string_columns or [])
+    if _is_parquet(source):
+        import pyarrow.parquet as pq
+        with _open_source(source, memory_map) as f:
+            table = pq.read_table(f, columns=columns)
+        for name in string_columns:
+            if name in table.column_names:
+                index = table.column_names.index(name)
+                table = table.set_column(index, name, table.column(index).cast(pa.string()))
+        if downcast and table.num_rows:
+            table = pa.Table.from_batches([_narrow_floats(batch) for batch in table.to_batches()])
+    else:
+        convert_options = dict(
+            include_columns=columns,
+            column_types={name: pa.string() for name in string_columns},
+            strings_can_be_null=True,
+            auto_dict_encode=categorical,
+            auto_dict_max_cardinality=DATASET_CATEGORICAL_MAX_CARDINALITY,
+        )
+        try:
+            batches = [_narrow_floats(batch) if downcast else batch
+                       for batch in _iter_csv_batches(source, memory_map, **convert_options)]
+        except pa.ArrowInvalid as e:
+            logger.info("Types differ between blocks, reading the dataset in one pass: %s", e)
+            batches = None
+        if batches:
+            table = pa.Table.from_batches(batches)
+        else:
+            # Infer types from the whole file (also covers a header without rows)
+            from pyarrow import csv as pa_csv
+            with _open_source(source, memory_map) as f:
+                table = pa_csv.read_csv(f, convert_options=pa_csv.ConvertOptions(**convert_options))
+            if downcast and table.num_rows:
+                table = pa.Table.from_batches([_narrow_floats(batch) for batch in table.to_batches()])
+
+    if not parse_dates:
+        for index, field in enumerate(table.schema):
+            if pa.types.is_temporal(field.type):
+                table = table.set_column(index, field.name, table.column(index).cast(pa.string()))
+    if downcast:
+        table = _narrow_integers(table)
+    return table.to_pandas(date_as_object=False, self_destruct=True, split_blocks=True)
+
+
+class _ColumnStats:
+    """Running statistics of one column across record batches."""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.count = 0
+        self.missing = 0
+        self.min = None
+        self.max = None
+        self.sum = 0.0
+        self.sum_squares = 0.0
+        self.distinct = set()
+        self.distinct_overflow = False
+
+    def update(self, array):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        self.missing += array.null_count
+        self.count += len(array) - array.null_count
+        if self.kind == "numeric":
+            values = array.cast(pa.float64())
+            self.sum += pc.sum(values).as_py() or 0.0
+            self.sum_squares += pc.sum(pc.multiply(values, values)).as_py() or 0.0
+        if self.kind in ("numeric", "date"):
+            bounds = pc.min_max(array).as_py()
+            if bounds["min"] is not None:
+                self.min = bounds["min"] if self.min is None else min(self.min, bounds["min"])
+                self.max = bounds["max"] if self.max is None else max(self.max, bounds["max"])
+        if not self.distinct_overflow:
+            if pa.types.is_dictionary(array.type):
+                array = array.dictionary_decode()
+            unique = pc.unique(array.drop_null())
+            if len(unique) + len(self.distinct) > DATASET_SCAN_MAX_DISTINCT:
+                self.distinct_overflow = True
+                self.distinct = set()
+            else:
+                self.distinct.update(unique.to_pylist())
+
+    def to_dict(self):
+        stats = {"type": self.kind, "count": self.count, "missing": self.missing,
+                 "distinct": None if self.distinct_overflow else len(self.distinct)}
+        if self.kind in ("numeric", "date"):
+            stats.update(min=self.min, max=self.max)
+        if self.kind == "numeric":
+            mean = self.sum / self.count if self.count else None
+            variance = self.sum_squares / self.count - mean ** 2 if self.count else None
+            stats.update(sum=self.sum, sum_squares=self.sum_squares, mean=mean,
+                         std=max(variance, 0.0) ** 0.5 if variance is not None else None)
+        return stats
+
+
+def _column_kind(arrow_type):
+    import pyarrow as pa
+
+    if pa.types.is_dictionary(arrow_type):
+        arrow_type = arrow_type.value_type
+    if pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type) or pa.types.is_decimal(arrow_type):
+        return "numeric"
+    if pa.types.is_temporal(arrow_type):
+        return "date"
+    return "text"
+
+
+def _scan_batches(batches):
+    rows, columns = 0, {}
+    for batch in batches:
+        rows += batch.num_rows
+        for field, array in zip(batch.schema, batch.columns):
+            columns.setdefault(field.name, _ColumnStats(_column_kind(field.type))).update(array)
+    return {"rows": rows, "columns": {name: stats.to_dict() for name, stats in columns.items()}}
+
+
+def scan_dataset(source) -> Dict[str, Any]:
+    """
+    Row count and per-column statistics of a dataset in one streaming pass.
+
+    Only one block is held in memory at a time. If a later block does not
+    match the types inferred from the first one (text in a numeric column),
+    the dataset is read whole and scanned from memory instead.
+
+    Returns:
+        dict: rows, and columns mapping each name to its type (numeric, date
+            or text), count, missing and distinct values (None past
+            DATASET_SCAN_MAX_DISTINCT), plus min and max for numeric and date
+            columns and sum, sum_squares, mean and std for numeric ones
+    """
+    import pyarrow as pa
+
+    try:
+        if _is_parquet(source):
+            import pyarrow.parquet as pq
+            with _open_source(source, memory_map=True) as f:
+                return _scan_batches(pq.ParquetFile(f).iter_batches())
+        # Integers are widened up front so a float in a later block does not end the stream
+        with _open_source(source, memory_map=True) as f:
+            from pyarrow import csv as pa_csv
+            schema = pa_csv.open_csv(f, read_options=pa_csv.ReadOptions(block_size=DATASET_READ_BLOCK_BYTES)).schema
+        column_types = {field.name: pa.float64() for field in schema if pa.types.is_integer(field.type)}
+        return _scan_batches(_iter_csv_batches(source, memory_map=True, column_types=column_types,
+                                               strings_can_be_null=True))
+    except pa.ArrowInvalid as e:
+        logger.warning("Streaming scan failed, scanning the materialized dataset instead: %s", e)
+        table = pa.Table.from_pandas(read_dataset(source, downcast=False), preserve_index=False)
+        return _scan_batches(table.to_batches())
+
+
+def combine_dataset_parts(frames, key_columns):
+    """
+    Concatenate a base dataset and its deltas, later parts replacing earlier rows.
+
+    A row is dropped when a later part has a row with the same key values;
+    duplicates within a single part are kept so they can still be reported.
+    """
+    import pandas as pd
+
+    if len(frames) == 1:
+        return frames[0]
+    key_columns = [column for column in key_columns if column in frames[0].columns]
+    combined = pd.concat([frame.assign(_part=index) for index, frame in enumerate(frames)], ignore_index=True)
+    if key_columns:
+        keys = [combined[column].astype(str) for column in key_columns]
+        latest = combined.groupby(keys, sort=False, dropna=False)["_part"].transform("max")
+        combined = combined[combined["_part"] == latest]
+    return combined.drop(columns="_part").reset_index(drop=True)
+
+
+def read_dataset_parts(blob_paths, key_columns, **read_options):
+    """Read the stored parts of a dataset with read_dataset and combine them by key."""
+    if isinstance(blob_paths, str):
+        blob_paths = [blob_paths]
+    frames = [read_dataset(get_storage().read(blob_path), **read_options) for blob_path in blob_paths]
+    return combine_dataset_parts(frames, key_columns)
+
+
+def create_and_upload_eda(data_file_path, timestamp_folder, stats=None):
+    """
+    Profile a local dataset file and upload the HTML report and column statistics.
+
+    Besides the full eda_report.html, the report is stored split into an
+    overview page and per-section fragments (see eda_sections) that
+    /eda-report serves on demand.
+
+    Args:
+        data_file_path (str): local CSV or Parquet file
+        timestamp_folder (str): project folder in the bucket
+        stats (dict): scan_dataset result if the caller already computed it
+    """
+    stage = ManifestStage(timestamp_folder, "eda")
     try:
-        df = pd.read_csv(data_file_path)
+        from ydata_profiling import ProfileReport
+
+        stats = stats or scan_dataset(data_file_path)
+        stage.write("dataset_stats.json", json.dumps(stats, default=str), content_type="application/json")
+
+        df = read_dataset(data_file_path, memory_map=True)
+        logger.info("Profiling %s rows x %s columns (%.1f MB in memory)",
+                    len(df), len(df.columns), df.memory_usage(deep=True).sum() / 1024 ** 2)
         profile = ProfileReport(df, title="Pandas Profiling Report", explorative=True)
+        del df
         html_content = profile.to_html()
 
-        destination_blob_name = f"{timestamp_folder}/eda_report.html"
-        upload_html_to_gcs(html_content, destination_blob_name)
+        destination_blob_name = stage.write("eda_report.html", html_content, content_type="text/html")
+        logger.info("HTML content uploaded to %s.", destination_blob_name)
+        write_eda_sections(stage, profile)
     except:
-        import logging
-        logging.exception("Message")
+        logger.exception("Message")
+    # Whatever was written is indexed, so a failed profile still lists the statistics
+    stage.commit()
 
 
 def store_or_update_user_and_project(user_email, project_name, timestamp_folder, data_file_name, status="PENDING"):
@@ -243,192 +868,398 @@ def store_or_update_user_and_project(user_email, project_name, timestamp_folder,
     return project.id
 
 
-def update_job_status(state, job_id):
-    # Retrieve the project using the job_id
-    project = Project.query.filter_by(job_id=job_id).first()
+# Vertex AI job states mapped to project statuses; other states are ignored
+JOB_STATE_TO_STATUS = {
+    "JOB_STATE_QUEUED": ProjectStatus.PENDING,
+    "JOB_STATE_PENDING": ProjectStatus.PENDING,
+    "JOB_STATE_RUNNING": ProjectStatus.RUNNING,
+    "JOB_STATE_SUCCEEDED": ProjectStatus.SUCCESS,
+    "JOB_STATE_FAILED": ProjectStatus.FAILED,
+    "JOB_STATE_CANCELLED": ProjectStatus.FAILED,
+    "JOB_STATE_EXPIRED": ProjectStatus.FAILED,
+}
+
+# Statuses only move forward within a job, so out-of-order polls cannot regress a project
+STATUS_RANK = {
+    ProjectStatus.PENDING: 0,
+    ProjectStatus.RUNNING: 1,
+    ProjectStatus.SUCCESS: 2,
+    ProjectStatus.FAILED: 2,
+}
+
+
+def _parse_job_time(value):
+    """Convert an ISO 8601 timestamp from get_job_status into a naive UTC datetime."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def record_job_transitions(transitions):
+    """
+    Record many job state transitions and update project statuses in one transaction.
+
+    Each transition is upserted into the status history (one row per project,
+    job and status), so repeated polls only refresh timestamps.
 
-    new_status = None
-    if state == "JOB_STATE_SUCCEEDED":
-        new_status = "SUCCESS"
-    elif state == "JOB_STATE_FAILED":
-        new_status = "FAILED"
+    Args:
+        transitions (list): dicts with "job_id" and "state" plus optional
+            "create_time", "start_time" and "end_time", as returned by
+            ModelTrainingService.get_job_status
 
-    if project and new_status:
-        # Update the status of the project
-        project.status = new_status
+    Returns:
+        int: number of projects whose status changed
+    """
+    latest = {}
+    for transition in transitions:
+        status = JOB_STATE_TO_STATUS.get(transition.get("state"))
+        if transition.get("job_id") and status:
+            latest[str(transition["job_id"]).split("/")[-1]] = (transition, status)
+    if not latest:
+        return 0
+
+    try:
+        projects = Project.query.filter(Project.job_id.in_(list(latest))).all()
+        history = ProjectStatusHistory.query.filter(ProjectStatusHistory.job_id.in_(list(latest))).all()
+        existing = {(row.project_id, row.job_id, row.status): row for row in history}
+        reached = {}
+        for row in history:
+            key = (row.project_id, row.job_id)
+            reached[key] = max(reached.get(key, 0), STATUS_RANK[row.status])
+
+        runs = {run.job_id: run for run in TrainingRun.query.filter(TrainingRun.job_id.in_(list(latest))).all()}
+
+        changed = 0
+        for project in projects:
+            transition, status = latest[project.job_id]
+            row = existing.get((project.id, project.job_id, status))
+            if row is None:
+                row = ProjectStatusHistory(project_id=project.id, job_id=project.job_id, status=status)
+                db.session.add(row)
+            row.job_state = transition["state"]
+            row.job_create_time = _parse_job_time(transition.get("create_time")) or row.job_create_time
+            row.job_start_time = _parse_job_time(transition.get("start_time")) or row.job_start_time
+            row.job_end_time = _parse_job_time(transition.get("end_time")) or row.job_end_time
+
+            run = runs.get(project.job_id)
+            if run is not None and status in (ProjectStatus.SUCCESS, ProjectStatus.FAILED):
+                run.final_state = transition["state"]
+                if row.job_start_time and row.job_end_time:
+                    run.runtime_seconds = (row.job_end_time - row.job_start_time).total_seconds()
+
+            current = ProjectStatus(project.status) if isinstance(project.status, str) else project.status
+            if STATUS_RANK[status] >= reached.get((project.id, project.job_id), 0) and current != status:
+                project.status = status
+                changed += 1
+
+        finish_submissions({job_id: status for job_id, (_, status) in latest.items()})
         db.session.commit()
-        print(f"Updated project {job_id} status to {new_status}.")
+        logger.info("Recorded %s job transitions, %s project statuses changed", len(latest), changed)
+        return changed
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def update_job_status(state, job_id, job_status=None):
+    """
+    Record a single job state transition.
+
+    Args:
+        state (str): Vertex AI job state, e.g. JOB_STATE_SUCCEEDED
+        job_id (str): ID of the training job
+        job_status (dict): optional full get_job_status result carrying the job timestamps
+    """
+    transition = dict(job_status or {})
+    transition.update({"job_id": job_id, "state": state})
+    return record_job_transitions([transition])
+
+
+def get_job_timings(project):
+    """
+    Summarise the status history of a project's current job.
+
+    Returns:
+        dict: transitions plus queue wait and run time in seconds (None when unknown)
+    """
+    rows = ProjectStatusHistory.query.filter_by(
+        project_id=project.id, job_id=project.job_id
+    ).order_by(ProjectStatusHistory.recorded_at).all()
+
+    create_time = next((row.job_create_time for row in rows if row.job_create_time), None)
+    start_time = next((row.job_start_time for row in rows if row.job_start_time), None)
+    end_time = next((row.job_end_time for row in rows if row.job_end_time), None)
+
+    return {
+        "job_id": project.job_id,
+        "transitions": [
+            {
+                "status": row.status.value,
+                "job_state": row.job_state,
+                "recorded_at": row.recorded_at.isoformat(),
+                "updated_at": row.updated_at.isoformat(),
+            }
+            for row in rows
+        ],
+        "create_time": create_time.isoformat() if create_time else None,
+        "start_time": start_time.isoformat() if start_time else None,
+        "end_time": end_time.isoformat() if end_time else None,
+        "queue_wait_seconds": (start_time - create_time).total_seconds() if create_time and start_time else None,
+        "run_seconds": (end_time - start_time).total_seconds() if start_time and end_time else None,
+    }
+
+
+def find_user_project(project_id, user_email):
+    """
+    Look up a project owned by a user.
+
+    Returns:
+        tuple: (project, None), or (None, (error dict, HTTP status)) if the
+            user or the project does not exist
+    """
+    user = User.query.filter_by(email=user_email).first()
+    if not user:
+        return None, ({'error': 'User not found'}, 404)
+    project = Project.query.filter_by(id=project_id, user_id=user.id).first()
+    if not project:
+        return None, ({'error': 'Project not found for this user'}, 404)
+    return project, None
+
+
+def _normalize_report(gcs_file_name, file_content):
+    if gcs_file_name == "MMM_summary.md" or gcs_file_name == "MSO_summary.md":
+        file_content = file_content.replace("\n*\n", "*").replace("\n**\n", "**")
+
+    if gcs_file_name == "eda_report.html":
+        file_content = file_content.replace("Pandas Profiling Report", "EDA Report")
+    return file_content
 
 
 def get_report_from_gcs(project_id, user_email, gcs_file_name):
     try:
-        user = User.query.filter_by(email=user_email).first()
-        if not user:
-            return {'error': 'User not found'}, 404
-        project = Project.query.filter_by(id=project_id, user_id=user.id).first()
-        if not project:
-            return {'error': 'Project not found for this user'}, 404
-        gcs_path = project.gcs_path
-        file_path_in_gcs = os.path.join(gcs_path, gcs_file_name)
-
-        bucket = client.bucket(BUCKET_NAME)
-        blob = bucket.blob(file_path_in_gcs)
+        project, error = find_user_project(project_id, user_email)
+        if error:
+            return error
+        file_path_in_gcs = os.path.join(project.gcs_path, gcs_file_name)
 
-        if not blob.exists():
+        # Download and decode the content with proper encoding
+        try:
+            file_content = get_storage().read(file_path_in_gcs).decode('utf-8')
+        except FileNotFoundError:
             return {'error': 'File not found in GCS'}, 404
+        return {"file_content": _normalize_report(gcs_file_name, file_content)}, 200
 
-        # Download and decode the content with proper encoding
-        file_content = blob.download_as_text(encoding='utf-8')
-        
-        if gcs_file_name == "MMM_summary.md" or gcs_file_name == "MSO_summary.md":
-            file_content = file_content.replace("\n*\n", "*").replace("\n**\n", "**")
+    except Exception as e:
+        logger.error("Error in get_eda_report_from_gcs: %s", e)
+        return {'error': 'Internal server error occurred'}, 500
 
-        if gcs_file_name == "eda_report.html":
-            file_content = file_content.replace("Pandas Profiling Report", "EDA Report")
-        return {"file_content": file_content}, 200
+
+async def get_report_from_gcs_async(project_id, user_email, gcs_file_name):
+    """Async variant of get_report_from_gcs; the download runs in the bounded GCS pool."""
+    try:
+        project, error = find_user_project(project_id, user_email)
+        if error:
+            return error
+        file_path_in_gcs = os.path.join(project.gcs_path, gcs_file_name)
+
+        try:
+            file_content = (await run_io("gcs", get_storage().read, file_path_in_gcs)).decode('utf-8')
+        except FileNotFoundError:
+            return {'error': 'File not found in GCS'}, 404
+        return {"file_content": _normalize_report(gcs_file_name, file_content)}, 200
 
     except Exception as e:
-        print(f"Error in get_eda_report_from_gcs: {str(e)}")
+        logger.error("Error in get_report_from_gcs_async: %s", e)
         return {'error': 'Internal server error occurred'}, 500
 
 
+def _render_pdf(html_path, pdf_path):
+    """Convert a local HTML file to PDF with wkhtmltopdf."""
+    import pdfkit
+
+    # Configure pdfkit options
+    options = {
+        'encoding': 'UTF-8',
+        'enable-local-file-access': True,
+        'disable-external-links': True
+    }
+
+    # config = pdfkit.configuration(wkhtmltopdf='/usr/local/bin/wkhtmltopdf')
+    pdfkit.from_file(html_path, pdf_path, options=options)
+
+
+def _stream_summary(pdf_path, summary_file_path):
+    """
+    Summarise a PDF with Gemini, streaming the response to summary_file_path.
+
+    Returns:
+        str: the summary as written
+    """
+    import vertexai
+    from vertexai.generative_models import GenerativeModel, Part, SafetySetting
+
+    with open(pdf_path, 'rb') as pdf_file:
+        pdf_content = pdf_file.read()
+
+    # Initialize Vertex AI
+    vertexai.init(project="insightsmix", location="us-central1")
+    model = GenerativeModel("gemini-1.5-pro-002")
+
+    # Create document part from PDF
+    document1 = Part.from_data(
+        mime_type="application/pdf",
+        data=pdf_content
+    )
+
+    # Define prompt for analysis
+    text1 = summary_prompt
+
+    # Configure generation parameters
+    generation_config = {
+        "max_output_tokens": 8192,
+        "temperature": 1,
+        "top_p": 0.95,
+    }
+
+    # Configure safety settings
+    safety_settings = [
+        SafetySetting(
+            category=SafetySetting.HarmCategory.HARM_CATEGORY_HATE_SPEECH,
+            threshold=SafetySetting.HarmBlockThreshold.OFF
+        ),
+        SafetySetting(
+            category=SafetySetting.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT,
+            threshold=SafetySetting.HarmBlockThreshold.OFF
+        ),
+        SafetySetting(
+            category=SafetySetting.HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT,
+            threshold=SafetySetting.HarmBlockThreshold.OFF
+        ),
+        SafetySetting(
+            category=SafetySetting.HarmCategory.HARM_CATEGORY_HARASSMENT,
+            threshold=SafetySetting.HarmBlockThreshold.OFF
+        ),
+    ]
+
+    # Generate content
+    responses = model.generate_content(
+        [document1, text1],
+        generation_config=generation_config,
+        safety_settings=safety_settings,
+        stream=True,
+    )
+
+    written = []
+    line_count = 0
+    with get_storage().open_writer(summary_file_path) as file:
+        for response in responses:
+            if line_count:
+                # Write each response to the file on GCS
+                chunk = response.text + "\n"
+                line_count += 1
+            else:
+                chunk = response.text
+            file.write(chunk)
+            written.append(chunk)
+    return "".join(written)
+
+
 def generate_pdf_summary(input_file_path, summary_file_path):
     """
     Download HTML from GCS, convert to PDF, and generate summary using Gemini
 
     Args:
-        file_path (str): Path to the HTML file in the bucket
+        input_file_path (str): Path to the HTML file in the bucket
+        summary_file_path (str): Path of the markdown summary written to the bucket
+
+    Returns:
+        str: the generated summary
+
+    Raises:
+        AdmissionRejected: if too many conversions or Gemini calls are in flight
     """
-    try:
-        # Initialize GCS client
-        bucket = client.bucket(BUCKET_NAME)
-        blob = bucket.blob(input_file_path)
-        
-        # Create a temporary file to store the HTML content
-        temp_html = 'temp_output.html'
-        temp_pdf = 'temp_output.pdf'
-
-        # Download the file from GCS
-        blob.download_to_filename(temp_html)
-
-        # Configure pdfkit options
-        options = {
-            'encoding': 'UTF-8',
-            'enable-local-file-access': True,
-            'disable-external-links': True
-        }
+    stage = ManifestStage(os.path.dirname(summary_file_path), "summarization")
+    # Each call gets its own scratch files so concurrent summaries cannot clobber each other
+    with tempfile.TemporaryDirectory() as work_dir:
+        temp_html = os.path.join(work_dir, 'input.html')
+        temp_pdf = os.path.join(work_dir, 'input.pdf')
+        try:
+            get_storage().download(input_file_path, temp_html)
+            with limits["pdf"].admit():
+                _render_pdf(temp_html, temp_pdf)
+            with limits["gemini"].admit():
+                summary = _stream_summary(temp_pdf, summary_file_path)
+        except Exception as e:
+            logger.error("Error processing file: %s", e)
+            raise
+    _record_summary(stage, summary_file_path, summary)
+    return summary
 
-        # config = pdfkit.configuration(wkhtmltopdf='/usr/local/bin/wkhtmltopdf')
-        pdfkit.from_file(temp_html, temp_pdf, options=options)
 
-        # Read PDF file and encode to base64
-        with open(temp_pdf, 'rb') as pdf_file:
-            pdf_content = base64.b64encode(pdf_file.read()).decode()
+async def generate_pdf_summary_async(input_file_path, summary_file_path):
+    """Async variant of generate_pdf_summary; each step runs in the pool of its dependency."""
+    stage = ManifestStage(os.path.dirname(summary_file_path), "summarization")
+    with tempfile.TemporaryDirectory() as work_dir:
+        temp_html = os.path.join(work_dir, 'input.html')
+        temp_pdf = os.path.join(work_dir, 'input.pdf')
+        try:
+            await run_io("gcs", get_storage().download, input_file_path, temp_html)
+            # Admission bounds how many conversions and Gemini calls may wait for the pools
+            async with limits["pdf"].admit_async():
+                await run_io("pdf", _render_pdf, temp_html, temp_pdf)
+            async with limits["gemini"].admit_async():
+                summary = await run_io("gemini", _stream_summary, temp_pdf, summary_file_path)
+        except Exception as e:
+            logger.error("Error processing file: %s", e)
+            raise
+    await run_io("gcs", _record_summary, stage, summary_file_path, summary)
+    return summary
 
-        # Initialize Vertex AI
-        vertexai.init(project="insightsmix", location="us-central1")
-        model = GenerativeModel("gemini-1.5-pro-002")
 
-        # Create document part from PDF
-        document1 = Part.from_data(
-            mime_type="application/pdf",
-            data=base64.b64decode(pdf_content)
-        )
+def _record_summary(stage, summary_file_path, summary):
+    """Index a streamed summary in its project's manifest."""
+    stage.add_written(os.path.basename(summary_file_path), summary, content_type="text/markdown")
+    stage.commit()
 
-        # Define prompt for analysis
-        text1 = summary_prompt
 
-        # Configure generation parameters
-        generation_config = {
-            "max_output_tokens": 8192,
-            "temperature": 1,
-            "top_p": 0.95,
-        }
+# Gemini summaries and the report each one is generated from
+SUMMARY_SOURCES = {
+    "MMM_summary.md": "model_summary.html",
+    "MSO_summary.md": "optimization_output.html",
+}
 
-        # Configure safety settings
-        safety_settings = [
-            SafetySetting(
-                category=SafetySetting.HarmCategory.HARM_CATEGORY_HATE_SPEECH,
-                threshold=SafetySetting.HarmBlockThreshold.OFF
-            ),
-            SafetySetting(
-                category=SafetySetting.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT,
-                threshold=SafetySetting.HarmBlockThreshold.OFF
-            ),
-            SafetySetting(
-                category=SafetySetting.HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT,
-                threshold=SafetySetting.HarmBlockThreshold.OFF
-            ),
-            SafetySetting(
-                category=SafetySetting.HarmCategory.HARM_CATEGORY_HARASSMENT,
-                threshold=SafetySetting.HarmBlockThreshold.OFF
-            ),
-        ]
 
-        # Generate content
-        responses = model.generate_content(
-            [document1, text1],
-            generation_config=generation_config,
-            safety_settings=safety_settings,
-            stream=True,
-        )
-        bucket = client.get_bucket(BUCKET_NAME)
-
-        # Define the file path in GCS
-        blob = bucket.blob(summary_file_path)
-        line_count = 0
-        with blob.open("w") as file:
-            for response in responses:
-                if line_count:
-                    # Write each response to the file on GCS
-                    file.write(response.text + "\n")
-                    line_count += 1
-                else:
-                    file.write(response.text)
-    
-    except Exception as e:
-        print(f"Error processing file: {str(e)}")
-        raise
-    finally:
-        try:
-            if os.path.exists(temp_html):
-                os.remove(temp_html)
-            if os.path.exists(temp_pdf):
-                os.remove(temp_pdf)
-        except:
-            pass
+async def get_summary_files_async(project_id, user_email, gcs_file_name):
+    """
+    Return a Gemini summary, generating it from its source report on first request.
 
+    The generated text is returned directly instead of being re-downloaded.
 
-def get_summary_files(project_id, user_email, gcs_file_name):
+    Returns:
+        tuple: (dict with file_content or error, HTTP status)
+    """
+    project, error = find_user_project(project_id, user_email)
+    if error:
+        return error
+
+    summary_file_path = os.path.join(project.gcs_path, gcs_file_name)
     try:
-        result, status = get_report_from_gcs(project_id, user_email, gcs_file_name)
-
-        # If there was an error, return it
-        if 'error' in result:
-            if gcs_file_name == "MMM_summary.md":
-                file_name = "model_summary.html"
-            if gcs_file_name == "MSO_summary.md":
-                file_name = "optimization_output.html"
-
-            user = User.query.filter_by(email=user_email).first()
-            if not user:
-                return {'error': 'User not found'}, 404
-            
-            project = Project.query.filter_by(id=project_id, user_id=user.id).first()
-            if not project:
-                return {'error': 'Project not found for this user'}, 404
-
-            gcs_path = project.gcs_path
-            input_file_path = os.path.join(gcs_path, file_name)
-            summary_file_path = os.path.join(gcs_path, gcs_file_name) 
-
-            generate_pdf_summary(input_file_path, summary_file_path)
-            time.sleep(10)
-            result, status = get_report_from_gcs(project_id, user_email, gcs_file_name)
-        return result, status
-    except:
-        import logging
-        logging.exception("Message")
+        file_content = (await run_io("gcs", get_storage().read, summary_file_path)).decode('utf-8')
+    except FileNotFoundError:
+        if gcs_file_name not in SUMMARY_SOURCES:
+            return {'error': 'File not found in GCS'}, 404
+        input_file_path = os.path.join(project.gcs_path, SUMMARY_SOURCES[gcs_file_name])
+        try:
+            file_content = await generate_pdf_summary_async(input_file_path, summary_file_path)
+        except FileNotFoundError:
+            return {'error': 'Report to summarise not found in GCS'}, 404
+    return {"file_content": _normalize_report(gcs_file_name, file_content)}, 200
 
 
 def get_csv_from_gcs(user_email, project_id):
@@ -450,18 +1281,78 @@ def get_csv_from_gcs(user_email, project_id):
         filename = project.source_file_name
         source_file_path = f"{timestamp_folder}/{filename}"
         
-        bucket = client.get_bucket(BUCKET_NAME)
-        blob = bucket.blob(source_file_path)
-        
-        # Download as string
-        content = blob.download_as_string()
-        # Read CSV content
-        df = pd.read_csv(io.StringIO(content.decode('utf-8')))
-        return df.columns.tolist()
+        # Only the header is needed for the mapping options
+        content = get_storage().read(source_file_path)
+        return read_dataset_header(content)
     except Exception as e:
         raise Exception(f"Error reading CSV from GCS: {str(e)}")
 
 
+# Compact model artifacts exported by the training job under <project>/artifacts/
+MODEL_ARTIFACTS = {
+    "posterior_summary": "posterior_summary.parquet",
+    "response_curves": "response_curves.parquet",
+    "roi_intervals": "roi_intervals.parquet",
+    "roi_draws": "roi_draws.npz",
+}
+
+
+def get_model_artifact(gcs_path, artifact, channels=None, columns=None, filters=None, max_draws=None):
+    """
+    Read a slice of a compact model artifact.
+
+    Args:
+        gcs_path (str): project folder in the bucket
+        artifact (str): one of MODEL_ARTIFACTS
+        channels (list): optional channels to keep
+        columns (list): optional columns to return (Parquet artifacts)
+        filters (dict): optional column -> value equality filters (Parquet artifacts)
+        max_draws (int): optional cap on the number of evenly spaced ROI draws
+
+    Returns:
+        list or dict: records of a Parquet artifact, or ROI draws per channel
+
+    Raises:
+        ValueError: for an unknown artifact or column
+        FileNotFoundError: if the artifact has not been exported for this project
+    """
+    if artifact not in MODEL_ARTIFACTS:
+        raise ValueError(f"Unknown artifact '{artifact}', expected one of {sorted(MODEL_ARTIFACTS)}")
+    import numpy as np
+    import pandas as pd
+
+    try:
+        data = get_storage().read(f"{gcs_path}/artifacts/{MODEL_ARTIFACTS[artifact]}")
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Artifact {artifact} not found for this project")
+
+    if artifact == "roi_draws":
+        with np.load(io.BytesIO(data)) as npz:
+            roi, channel_names = npz["roi"], [str(name) for name in npz["channel"]]
+        draws = roi.reshape(-1, roi.shape[-1])
+        if max_draws and len(draws) > max_draws:
+            draws = draws[np.linspace(0, len(draws) - 1, max_draws).astype(int)]
+        return {
+            name: draws[:, index].tolist()
+            for index, name in enumerate(channel_names)
+            if not channels or name in channels
+        }
+
+    df = pd.read_parquet(io.BytesIO(data))
+    for column, value in (filters or {}).items():
+        if column not in df.columns:
+            raise ValueError(f"Unknown column '{column}'")
+        df = df[df[column].astype(str) == str(value)]
+    if channels and "channel" in df.columns:
+        df = df[df["channel"].astype(str).isin(channels)]
+    if columns:
+        unknown = set(columns) - set(df.columns)
+        if unknown:
+            raise ValueError(f"Unknown columns: {sorted(unknown)}")
+        df = df[columns]
+    return json.loads(df.to_json(orient="records"))
+
+
 def is_project_already_exist(user_email, project_name):
     user = User.query.filter_by(email=user_email).first()
     if not user:
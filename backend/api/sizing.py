@@ -0,0 +1,94 @@
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Machine tiers ordered by capacity. A tier is chosen for the smallest
+# max_problem_size that fits geos x time periods x media channels x chains x draws.
+# Override with TRAINING_MACHINE_TIERS (a JSON list, or a path to a JSON file);
+# a tier may also set "executor": "local" to run in place instead of on Vertex AI.
+DEFAULT_MACHINE_TIERS = [
+    {
+        "name": "small",
+        "max_problem_size": 5_000_000,
+        "machine_type": "n1-standard-8",
+        "accelerator_type": None,
+        "accelerator_count": 0,
+    },
+    {
+        "name": "medium",
+        "max_problem_size": 100_000_000,
+        "machine_type": "n1-standard-8",
+        "accelerator_type": "NVIDIA_TESLA_T4",
+        "accelerator_count": 1,
+    },
+    {
+        "name": "large",
+        "max_problem_size": 1_000_000_000,
+        "machine_type": "n1-standard-16",
+        "accelerator_type": "NVIDIA_TESLA_T4",
+        "accelerator_count": 2,
+    },
+    {
+        "name": "xlarge",
+        "max_problem_size": None,
+        "machine_type": "n1-highmem-32",
+        "accelerator_type": "NVIDIA_TESLA_T4",
+        "accelerator_count": 4,
+    },
+]
+
+# Used when the problem size cannot be estimated; matches the historical fixed machine
+FALLBACK_TIER_NAME = "large"
+
+
+def load_machine_tiers():
+    """Load the tier table from TRAINING_MACHINE_TIERS, falling back to the defaults."""
+    config = os.getenv("TRAINING_MACHINE_TIERS")
+    if not config:
+        return DEFAULT_MACHINE_TIERS
+    try:
+        if os.path.isfile(config):
+            with open(config) as f:
+                tiers = json.load(f)
+        else:
+            tiers = json.loads(config)
+        return sorted(tiers, key=lambda tier: float("inf") if tier.get("max_problem_size") is None
+                      else tier["max_problem_size"])
+    except (OSError, ValueError) as e:
+        logger.error("Invalid TRAINING_MACHINE_TIERS, using defaults: %s", e)
+        return DEFAULT_MACHINE_TIERS
+
+
+def estimate_problem_size(n_geos, n_times, n_channels, n_chains, n_draws):
+    """Number of per-draw cell evaluations the sampler performs across all chains."""
+    return max(n_geos, 1) * max(n_times, 1) * max(n_channels, 1) * max(n_chains, 1) * max(n_draws, 1)
+
+
+def select_machine_tier(problem_size, tiers=None):
+    """
+    Pick the smallest tier whose max_problem_size covers problem_size.
+
+    Args:
+        problem_size (int): estimate from estimate_problem_size, or None if unknown
+
+    Returns:
+        dict: the selected tier
+    """
+    tiers = tiers or load_machine_tiers()
+    if problem_size is None:
+        return next((tier for tier in tiers if tier["name"] == FALLBACK_TIER_NAME), tiers[-1])
+    for tier in tiers:
+        if tier.get("max_problem_size") is None or problem_size <= tier["max_problem_size"]:
+            return tier
+    return tiers[-1]
+
+
+def machine_spec_for_tier(tier):
+    """Build the Vertex AI machine_spec of a tier."""
+    machine_spec = {"machine_type": tier["machine_type"]}
+    if tier.get("accelerator_type") and tier.get("accelerator_count"):
+        machine_spec["accelerator_type"] = tier["accelerator_type"]
+        machine_spec["accelerator_count"] = tier["accelerator_count"]
+    return machine_spec
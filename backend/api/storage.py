@@ -0,0 +1,552 @@
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from google.api_core.exceptions import NotFound, PreconditionFailed
+
+logger = logging.getLogger(__name__)
+
+BUCKET_NAME = os.getenv("BUCKET_NAME")
+
+# "gcs" reads and writes the bucket, "local" uses LOCAL_BUCKET_DIR as the bucket
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "gcs")
+LOCAL_BUCKET_DIR = os.getenv("LOCAL_BUCKET_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "local_bucket"))
+# Read-through disk cache in front of GCS; STORAGE_CACHE_MAX_BYTES=0 disables it
+STORAGE_CACHE_DIR = os.getenv("STORAGE_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "storage_cache"))
+STORAGE_CACHE_MAX_BYTES = int(os.getenv("STORAGE_CACHE_MAX_BYTES", str(1024 ** 3)))
+# Cached objects younger than this are served without checking their generation
+STORAGE_CACHE_REVALIDATE_SECONDS = float(os.getenv("STORAGE_CACHE_REVALIDATE_SECONDS", "5"))
+
+
+class GenerationMismatch(Exception):
+    """Raised when a conditional read or write finds the object at another generation."""
+
+
+def _blob_stat(blob):
+    return {
+        "name": blob.name,
+        "size": blob.size,
+        "generation": blob.generation,
+        "updated": blob.updated.isoformat() if getattr(blob, "updated", None) else None,
+        "content_type": getattr(blob, "content_type", None),
+    }
+
+
+@contextmanager
+def _directory_lock(directory):
+    """Exclusive lock on a directory, held against every process writing under it (POSIX only)."""
+    import fcntl
+
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _local_generation(info):
+    """
+    Generation of a local file from its os.stat result.
+
+    Every write replaces the file with a fresh temp file, so the inode
+    changes even when the coarse filesystem clock leaves the mtime as it was.
+    Keep in sync with vertez/train.py.
+    """
+    return (info.st_ino << 64) | info.st_mtime_ns
+
+
+class GCSStorage:
+    """Objects stored in a GCS bucket. Paths are blob names."""
+
+    name = "gcs"
+
+    def __init__(self, bucket_name, client=None):
+        self.bucket_name = bucket_name
+        self._client = client
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        with self._client_lock:
+            if self._client is None:
+                # Imported and authenticated on first use rather than at worker boot
+                from google.cloud import storage as gcs
+                self._client = gcs.Client()
+            return self._client
+
+    def _bucket(self):
+        return self.client.bucket(self.bucket_name)
+
+    def uri(self, path):
+        return f"gs://{self.bucket_name}/{path}"
+
+    def exists(self, path):
+        return self._bucket().blob(path).exists()
+
+    def stat(self, path):
+        """Size, generation and update time of an object, or None if it does not exist."""
+        blob = self._bucket().get_blob(path)
+        return _blob_stat(blob) if blob is not None else None
+
+    def list(self, prefix):
+        return [_blob_stat(blob) for blob in self.client.list_blobs(self.bucket_name, prefix=prefix)]
+
+    def read(self, path):
+        try:
+            return self._bucket().blob(path).download_as_bytes()
+        except NotFound:
+            raise FileNotFoundError(f"Object not found: {path}")
+
+    def read_versioned(self, path):
+        """Read an object and return (bytes, generation) of the same version."""
+        blob = self._bucket().get_blob(path)
+        if blob is None:
+            raise FileNotFoundError(f"Object not found: {path}")
+        try:
+            return blob.download_as_bytes(if_generation_match=blob.generation), blob.generation
+        except NotFound:
+            raise FileNotFoundError(f"Object not found: {path}")
+        except PreconditionFailed:
+            raise GenerationMismatch(f"Object changed while it was read: {path}")
+
+    def write(self, path, data, content_type=None, if_generation_match=None):
+        """
+        Store bytes or text at path and return the new generation.
+
+        With if_generation_match, the write only succeeds if the object is
+        still at that generation (0: does not exist yet) and raises
+        GenerationMismatch otherwise.
+        """
+        blob = self._bucket().blob(path)
+        try:
+            blob.upload_from_string(data, content_type=content_type, if_generation_match=if_generation_match)
+        except PreconditionFailed:
+            raise GenerationMismatch(f"Object is no longer at generation {if_generation_match}: {path}")
+        return blob.generation
+
+    def upload(self, local_path, path, content_type=None):
+        blob = self._bucket().blob(path)
+        blob.upload_from_filename(local_path, content_type=content_type)
+        return blob.generation
+
+    def download(self, path, local_path):
+        """Copy an object to a local file and return the generation that was copied."""
+        blob = self._bucket().get_blob(path)
+        if blob is None:
+            raise FileNotFoundError(f"Object not found: {path}")
+        try:
+            # The blob carries its generation, so the download cannot mix two versions
+            blob.download_to_filename(local_path)
+        except NotFound:
+            raise FileNotFoundError(f"Object not found: {path}")
+        return blob.generation
+
+    def copy(self, source_path, destination_path):
+        bucket = self._bucket()
+        return bucket.copy_blob(bucket.blob(source_path), bucket, destination_path).generation
+
+    def open_writer(self, path):
+        """Text-mode file object streaming to the object at path."""
+        return self._bucket().blob(path).open("w")
+
+
+class _AtomicTextWriter:
+    """Text file written next to its target and renamed into place on close."""
+
+    def __init__(self, path):
+        self.path = path
+        self.temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        self._file = open(self.temp_path, "w", encoding="utf-8")
+
+    def write(self, text):
+        return self._file.write(text)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+            os.replace(self.temp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            os.remove(self.temp_path)
+
+
+class LocalStorage:
+    """Objects stored as files under a root directory, e.g. for development without GCP."""
+
+    name = "local"
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, path):
+        local_path = os.path.abspath(os.path.join(self.root, path))
+        if os.path.commonpath([self.root, local_path]) != self.root:
+            raise ValueError(f"Path escapes the storage root: {path}")
+        return local_path
+
+    def _prepare(self, path):
+        local_path = self._path(path)
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        return local_path
+
+    def uri(self, path):
+        return self._path(path)
+
+    def exists(self, path):
+        return os.path.isfile(self._path(path))
+
+    def stat(self, path):
+        try:
+            info = os.stat(self._path(path))
+        except FileNotFoundError:
+            return None
+        return {
+            "name": path,
+            "size": info.st_size,
+            "generation": _local_generation(info),
+            "updated": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(info.st_mtime)),
+            "content_type": None,
+        }
+
+    def list(self, prefix):
+        stats = []
+        # Only walk the deepest directory the prefix is known to be under
+        start = self._path(prefix.rsplit("/", 1)[0]) if "/" in prefix else self.root
+        for root, _, files in os.walk(start):
+            for filename in files:
+                if filename.endswith(".tmp"):
+                    continue
+                name = os.path.relpath(os.path.join(root, filename), self.root).replace(os.sep, "/")
+                if name.startswith(prefix):
+                    stat = self.stat(name)
+                    if stat is not None:
+                        stats.append(stat)
+        return sorted(stats, key=lambda stat: stat["name"])
+
+    def read(self, path):
+        with open(self._path(path), "rb") as f:
+            return f.read()
+
+    def read_versioned(self, path):
+        local_path = self._path(path)
+        if not os.path.isdir(os.path.dirname(local_path)):
+            raise FileNotFoundError(f"Object not found: {path}")
+        with _directory_lock(os.path.dirname(local_path)):
+            generation = _local_generation(os.stat(local_path))
+            with open(local_path, "rb") as f:
+                return f.read(), generation
+
+    def write(self, path, data, content_type=None, if_generation_match=None):
+        local_path = self._prepare(path)
+        temp_path = f"{local_path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data.encode("utf-8") if isinstance(data, str) else data)
+        if if_generation_match is None:
+            os.replace(temp_path, local_path)
+            return _local_generation(os.stat(local_path))
+        # The directory lock makes check and replace atomic, also against vertez/train.py
+        with _directory_lock(os.path.dirname(local_path)):
+            stat = self.stat(path)
+            if (stat["generation"] if stat else 0) != if_generation_match:
+                os.remove(temp_path)
+                raise GenerationMismatch(f"Object is no longer at generation {if_generation_match}: {path}")
+            os.replace(temp_path, local_path)
+            return _local_generation(os.stat(local_path))
+
+    def upload(self, local_path, path, content_type=None):
+        destination = self._prepare(path)
+        temp_path = f"{destination}.{uuid.uuid4().hex}.tmp"
+        shutil.copyfile(local_path, temp_path)
+        os.replace(temp_path, destination)
+        return _local_generation(os.stat(destination))
+
+    def download(self, path, local_path):
+        source = self._path(path)
+        generation = _local_generation(os.stat(source))
+        shutil.copyfile(source, local_path)
+        return generation
+
+    def copy(self, source_path, destination_path):
+        return self.upload(self._path(source_path), destination_path)
+
+    def open_writer(self, path):
+        return _AtomicTextWriter(self._prepare(path))
+
+
+class CachedStorage:
+    """
+    Size-capped, read-through disk cache in front of another storage backend.
+
+    Reads are served from cache_dir when the cached copy's generation still
+    matches the backend; the generation is re-checked at most every
+    revalidate_seconds. Writes go through to the backend and refresh the
+    cached copy. The least recently read objects are evicted once the
+    cache exceeds max_bytes. Metadata operations are not cached.
+
+    Cache files are named by path and generation, so a file only ever holds
+    the bytes of one generation, even when another process sharing
+    cache_dir stores a different generation of the same path.
+    """
+
+    def __init__(self, backend, cache_dir, max_bytes, revalidate_seconds=STORAGE_CACHE_REVALIDATE_SECONDS):
+        self.backend = backend
+        self.name = backend.name
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
+        self.revalidate_seconds = revalidate_seconds
+        self._entries = OrderedDict()  # path -> {"generation", "size", "checked"}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._loading = {}
+        self._counters = {"hits": 0, "revalidated": 0, "misses": 0, "evictions": 0}
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _cache_file(self, path, generation):
+        key = f"{path}\0{generation}"
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode("utf-8")).hexdigest())
+
+    def _load_index(self):
+        """Adopt objects cached by an earlier process; they are revalidated on first read."""
+        found = []
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith(".json"):
+                continue
+            meta_path = os.path.join(self.cache_dir, filename)
+            try:
+                with open(meta_path) as f:
+                    meta = json.load(f)
+                if self._cache_file(meta["path"], meta["generation"]) != meta_path[:-len(".json")]:
+                    # Cached before files were named by generation
+                    for file_path in (meta_path[:-len(".json")], meta_path):
+                        if os.path.exists(file_path):
+                            os.remove(file_path)
+                    continue
+                data_stat = os.stat(meta_path[:-len(".json")])
+            except (OSError, ValueError, KeyError):
+                continue
+            found.append((data_stat.st_atime, meta["path"], meta["generation"], data_stat.st_size))
+        for _, path, generation, size in sorted(found):
+            previous = self._entries.pop(path, None)
+            if previous:
+                # An older generation left behind by another process; keep the most recently read one
+                self._total_bytes -= previous["size"]
+                self._remove_files(path, previous["generation"])
+            self._entries[path] = {"generation": generation, "size": size, "checked": 0.0}
+            self._total_bytes += size
+        self._evict()
+
+    def _evict(self):
+        # Called with the lock held
+        while self._total_bytes > self.max_bytes and self._entries:
+            path, entry = self._entries.popitem(last=False)
+            self._total_bytes -= entry["size"]
+            self._counters["evictions"] += 1
+            self._remove_files(path, entry["generation"])
+
+    def _remove_files(self, path, generation):
+        cache_file = self._cache_file(path, generation)
+        for file_path in (cache_file, f"{cache_file}.json"):
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+
+    def _store(self, path, temp_path, generation):
+        size = os.path.getsize(temp_path)
+        if generation is None or size > self.max_bytes:
+            os.remove(temp_path)
+            self.invalidate(path)
+            return
+        cache_file = self._cache_file(path, generation)
+        with self._lock:
+            previous = self._entries.pop(path, None)
+            if previous:
+                self._total_bytes -= previous["size"]
+                if previous["generation"] != generation:
+                    self._remove_files(path, previous["generation"])
+            os.replace(temp_path, cache_file)
+            with open(f"{cache_file}.json", "w") as f:
+                json.dump({"path": path, "generation": generation}, f)
+            self._entries[path] = {"generation": generation, "size": size, "checked": time.monotonic()}
+            self._total_bytes += size
+            self._evict()
+
+    def invalidate(self, path):
+        with self._lock:
+            entry = self._entries.pop(path, None)
+            if entry:
+                self._total_bytes -= entry["size"]
+                self._remove_files(path, entry["generation"])
+
+    def _fresh_entry(self, path):
+        """Return the cache entry for path if it is known to match the backend, revalidating it if needed."""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                return None
+            self._entries.move_to_end(path)
+            if time.monotonic() - entry["checked"] < self.revalidate_seconds:
+                self._counters["hits"] += 1
+                return entry
+            generation = entry["generation"]
+
+        stat = self.backend.stat(path)
+        if stat is None:
+            self.invalidate(path)
+            raise FileNotFoundError(f"Object not found: {path}")
+        if stat["generation"] != generation:
+            return None
+        with self._lock:
+            entry["checked"] = time.monotonic()
+            self._counters["revalidated"] += 1
+        return entry
+
+    def _ensure_cached(self, path):
+        """Return (local file, generation) of the current version of path, or None if it is not cached."""
+        for _ in range(2):
+            entry = self._fresh_entry(path)
+            if entry is not None:
+                generation = entry["generation"]
+                cache_file = self._cache_file(path, generation)
+                if os.path.exists(cache_file):
+                    return cache_file, generation
+                self.invalidate(path)  # Evicted by another process sharing the cache directory
+
+            with self._lock:
+                load_lock = self._loading.setdefault(path, threading.Lock())
+            try:
+                with load_lock:
+                    with self._lock:
+                        entry = self._entries.get(path)
+                        if entry is not None and time.monotonic() - entry["checked"] < self.revalidate_seconds:
+                            continue  # Another thread fetched it while we waited
+                    temp_path = os.path.join(self.cache_dir, f"{uuid.uuid4().hex}.tmp")
+                    try:
+                        generation = self.backend.download(path, temp_path)
+                    except Exception:
+                        if os.path.exists(temp_path):
+                            os.remove(temp_path)
+                        raise
+                    with self._lock:
+                        self._counters["misses"] += 1
+                    self._store(path, temp_path, generation)
+                    with self._lock:
+                        cached = self._entries.get(path, {}).get("generation") == generation
+                    return (self._cache_file(path, generation), generation) if cached else None
+            finally:
+                with self._lock:
+                    self._loading.pop(path, None)
+        return None
+
+    def uri(self, path):
+        return self.backend.uri(path)
+
+    def exists(self, path):
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and time.monotonic() - entry["checked"] < self.revalidate_seconds:
+                return True
+        return self.backend.exists(path)
+
+    def stat(self, path):
+        return self.backend.stat(path)
+
+    def list(self, prefix):
+        return self.backend.list(prefix)
+
+    def read(self, path):
+        cached = self._ensure_cached(path)
+        if cached is None:
+            return self.backend.read(path)  # Too large to cache
+        try:
+            with open(cached[0], "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return self.backend.read(path)
+
+    def download(self, path, local_path):
+        cached = self._ensure_cached(path)
+        if cached is None:
+            return self.backend.download(path, local_path)
+        try:
+            shutil.copyfile(cached[0], local_path)
+        except FileNotFoundError:
+            return self.backend.download(path, local_path)
+        return cached[1]
+
+    def read_versioned(self, path):
+        # Conditional updates need the current version, never a cached one
+        return self.backend.read_versioned(path)
+
+    def write(self, path, data, content_type=None, if_generation_match=None):
+        generation = self.backend.write(path, data, content_type=content_type,
+                                        if_generation_match=if_generation_match)
+        temp_path = os.path.join(self.cache_dir, f"{uuid.uuid4().hex}.tmp")
+        with open(temp_path, "wb") as f:
+            f.write(data.encode("utf-8") if isinstance(data, str) else data)
+        self._store(path, temp_path, generation)
+        return generation
+
+    def upload(self, local_path, path, content_type=None):
+        self.invalidate(path)
+        return self.backend.upload(local_path, path, content_type=content_type)
+
+    def copy(self, source_path, destination_path):
+        self.invalidate(destination_path)
+        return self.backend.copy(source_path, destination_path)
+
+    def open_writer(self, path):
+        self.invalidate(path)
+        return self.backend.open_writer(path)
+
+    def stats(self):
+        with self._lock:
+            return dict(
+                self._counters,
+                objects=len(self._entries),
+                total_bytes=self._total_bytes,
+                max_bytes=self.max_bytes,
+            )
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """
+    Return the storage backend shared by the process.
+
+    STORAGE_BACKEND selects GCS (default) or the LOCAL_BUCKET_DIR directory;
+    GCS reads go through the disk cache unless STORAGE_CACHE_MAX_BYTES is 0.
+    """
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            if STORAGE_BACKEND == LocalStorage.name:
+                _storage = LocalStorage(LOCAL_BUCKET_DIR)
+            elif STORAGE_BACKEND == GCSStorage.name:
+                _storage = GCSStorage(BUCKET_NAME)
+                if STORAGE_CACHE_MAX_BYTES > 0:
+                    _storage = CachedStorage(_storage, STORAGE_CACHE_DIR, STORAGE_CACHE_MAX_BYTES)
+            else:
+                raise ValueError(f"Unknown storage backend '{STORAGE_BACKEND}'")
+            logger.info("Using %s storage", STORAGE_BACKEND)
+        return _storage
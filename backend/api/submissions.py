@@ -0,0 +1,203 @@
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from .db import db
+from .models import ProjectStatus, TrainingSubmission
+
+logger = logging.getLogger(__name__)
+
+# A claim still SUBMITTING after this long belongs to a request that died mid-submit
+SUBMISSION_CLAIM_TIMEOUT_SECONDS = int(os.getenv("SUBMISSION_CLAIM_TIMEOUT_SECONDS", "600"))
+
+SUBMITTING = "SUBMITTING"
+SUBMITTED = "SUBMITTED"
+SUCCEEDED = "SUCCEEDED"
+FAILED = "FAILED"
+
+# Payload fields that identify the request rather than the training run
+_REQUEST_FIELDS = {"projectId", "userEmail", "idempotencyKey", "force"}
+
+
+class SubmissionConflict(Exception):
+    """Raised when a submission cannot proceed; carries the HTTP status and the submission involved."""
+
+    def __init__(self, message, status, submission=None):
+        super().__init__(message)
+        self.status = status
+        self.submission = submission
+
+
+def training_params_hash(training_params, dataset_parts):
+    """Hash of the training parameters and the dataset version they apply to."""
+    params = {key: value for key, value in training_params.items() if key not in _REQUEST_FIELDS}
+    payload = json.dumps({"params": params, "dataset": list(dataset_parts)}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _in_flight_key(project, params_hash):
+    return f"{project.id}:{params_hash}"
+
+
+def submission_result(submission):
+    """The result stored for a submission, as returned to its original request."""
+    return json.loads(submission.response) if submission.response else {"job_id": submission.job_id}
+
+
+def find_existing_submission(project, params_hash, idempotency_key=None, force=False, refresh_job=None):
+    """
+    Find a submission a new request should be answered with instead of starting a job.
+
+    Checked in order: the same idempotency key, a job in flight for the same
+    project and parameters, and (unless force) the job whose results the
+    project currently holds if it succeeded with the same parameters.
+
+    A job replaced as its project's job is no longer polled, so before
+    answering "in_flight" with a submitted job, refresh_job(job_id) is called
+    to record its current state, which releases the claim if the job ended.
+
+    Returns:
+        tuple: (submission, reason) with reason "idempotent_replay",
+            "in_flight" or "reused_results", or (None, None)
+
+    Raises:
+        SubmissionConflict: 422 if the idempotency key was used for other parameters
+    """
+    if idempotency_key:
+        submission = TrainingSubmission.query.filter_by(idempotency_key=idempotency_key).first()
+        if submission is not None:
+            if submission.project_id != project.id or submission.params_hash != params_hash:
+                raise SubmissionConflict("Idempotency key was already used with different parameters", 422, submission)
+            if submission.status != FAILED and not _is_stale(submission):
+                return submission, "idempotent_replay"
+
+    submission = TrainingSubmission.query.filter_by(in_flight_key=_in_flight_key(project, params_hash)).first()
+    if submission is not None and not _is_stale(submission) and _still_in_flight(submission, refresh_job):
+        return submission, "in_flight"
+
+    if not force and project.job_id:
+        current = ProjectStatus(project.status) if isinstance(project.status, str) else project.status
+        submission = TrainingSubmission.query.filter_by(
+            project_id=project.id, job_id=project.job_id, status=SUCCEEDED, params_hash=params_hash
+        ).first()
+        if submission is not None and current == ProjectStatus.SUCCESS:
+            return submission, "reused_results"
+    return None, None
+
+
+def _still_in_flight(submission, refresh_job):
+    if submission.status != SUBMITTED or refresh_job is None:
+        return True
+    try:
+        refresh_job(submission.job_id)
+    except Exception as e:
+        logger.warning("Failed to refresh job %s of submission %s: %s", submission.job_id, submission.id, e)
+        return True
+    return submission.in_flight_key is not None
+
+
+def _is_stale(submission):
+    # A claim that recorded its job id has a job running, however old the claim is
+    if submission.status != SUBMITTING or submission.job_id is not None:
+        return False
+    return datetime.utcnow() - submission.created_at > timedelta(seconds=SUBMISSION_CLAIM_TIMEOUT_SECONDS)
+
+
+def claim_submission(project, params_hash, idempotency_key=None):
+    """
+    Claim the single in-flight slot of a project and parameters before submitting a job.
+
+    Returns:
+        TrainingSubmission: the claim, in status SUBMITTING
+
+    Raises:
+        SubmissionConflict: 409 if another request holds the claim and has
+            not submitted its job yet
+    """
+    key = _in_flight_key(project, params_hash)
+    stale = TrainingSubmission.query.filter_by(in_flight_key=key).first()
+    if stale is not None and _is_stale(stale):
+        logger.warning("Releasing stale submission claim %s of project %s", stale.id, project.id)
+        stale.in_flight_key = None
+        stale.status = FAILED
+        stale.error = "Submission did not complete"
+        db.session.flush()
+    if idempotency_key:
+        # A failed attempt leaves its key behind; the retry takes it over
+        TrainingSubmission.query.filter_by(idempotency_key=idempotency_key, status=FAILED).update(
+            {"idempotency_key": None})
+
+    submission = TrainingSubmission(
+        project_id=project.id,
+        idempotency_key=idempotency_key,
+        params_hash=params_hash,
+        in_flight_key=key,
+        status=SUBMITTING,
+    )
+    db.session.add(submission)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        holder = TrainingSubmission.query.filter(
+            (TrainingSubmission.in_flight_key == key)
+            | ((TrainingSubmission.idempotency_key == idempotency_key) & (TrainingSubmission.idempotency_key.isnot(None)))
+        ).first()
+        raise SubmissionConflict("An identical training submission is in progress", 409, holder)
+    return submission
+
+
+def complete_submission(submission, job_id, result):
+    """Record the job started for a claim and the result returned to the client, in its own commit."""
+    submission.job_id = job_id
+    submission.status = SUBMITTED
+    submission.response = json.dumps(result, default=str)
+    db.session.commit()
+
+
+def record_submitted_job(submission, job_id):
+    """
+    Record at least the job id of a claim whose completion failed after its job started.
+
+    A claim with a job id is never released as stale, so the running job is
+    not submitted a second time by a retry.
+    """
+    try:
+        submission.job_id = job_id
+        submission.status = SUBMITTED
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Failed to record job %s on submission claim %s: %s", job_id, submission.id, e)
+
+
+def release_submission(submission, error):
+    """Give up a claim whose job could not be submitted, so a retry can claim again."""
+    try:
+        submission.in_flight_key = None
+        submission.status = FAILED
+        submission.error = str(error)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Failed to release submission claim %s: %s", submission.id, e)
+
+
+def finish_submissions(job_statuses):
+    """
+    Clear the in-flight claims of jobs that reached a terminal status, in the caller's transaction.
+
+    Args:
+        job_statuses (dict): job id -> ProjectStatus
+    """
+    terminal = {job_id: status for job_id, status in job_statuses.items()
+                if status in (ProjectStatus.SUCCESS, ProjectStatus.FAILED)}
+    if not terminal:
+        return
+    for submission in TrainingSubmission.query.filter(TrainingSubmission.job_id.in_(list(terminal))).all():
+        submission.status = SUCCEEDED if terminal[submission.job_id] == ProjectStatus.SUCCESS else FAILED
+        submission.in_flight_key = None
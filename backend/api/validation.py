@@ -0,0 +1,224 @@
+import time
+import logging
+from typing import Dict, Any
+
+from .storage import get_storage
+from .services import combine_dataset_parts, read_dataset, read_dataset_header
+
+logger = logging.getLogger(__name__)
+
+# Training parameter -> (role in the report, whether it must map exactly one column)
+MAPPING_FIELDS = {
+    "date": ("time", True),
+    "geo": ("geo", True),
+    "kpi": ("kpi", True),
+    "population": ("population", True),
+    "revenuePerKpi": ("revenue_per_kpi", False),
+    "media": ("media", False),
+    "mediaSpend": ("media_spend", False),
+    "control_variable": ("controls", False),
+}
+REQUIRED_FIELDS = ("date", "geo", "kpi", "population", "media", "mediaSpend")
+
+# Meridian needs enough periods to fit adstock and trend; fewer only warns
+MIN_TIME_PERIODS = 52
+MAX_EXAMPLES = 5
+
+
+class ValidationReport:
+    """Collects errors and warnings of a dataset check into a JSON-friendly report."""
+
+    def __init__(self):
+        self.errors = []
+        self.warnings = []
+        self.summary = {}
+
+    def error(self, code, message, **details):
+        self.errors.append({"code": code, "message": message, **details})
+
+    def warning(self, code, message, **details):
+        self.warnings.append({"code": code, "message": message, **details})
+
+    def to_dict(self, started):
+        return {
+            "valid": not self.errors,
+            "errors": self.errors,
+            "warnings": self.warnings,
+            "summary": self.summary,
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+        }
+
+
+def _mapped(training_params, field):
+    value = training_params.get(field) or []
+    return [value] if isinstance(value, str) else list(value)
+
+
+def check_mapping(training_params: Dict[str, Any], report: ValidationReport):
+    """
+    Check the shape of the column mapping.
+
+    Returns:
+        dict: role -> list of mapped columns
+    """
+    mapping = {}
+    for field, (role, single) in MAPPING_FIELDS.items():
+        columns = _mapped(training_params, field)
+        mapping[role] = columns
+        if field in REQUIRED_FIELDS and not columns:
+            report.error("missing_mapping", f"No column mapped for '{field}'", field=field)
+        elif single and len(columns) > 1:
+            report.error("multiple_columns", f"'{field}' must map exactly one column, got {len(columns)}",
+                         field=field, columns=columns)
+
+    if len(mapping["media"]) != len(mapping["media_spend"]):
+        report.error(
+            "media_spend_mismatch",
+            f"{len(mapping['media'])} media columns but {len(mapping['media_spend'])} media spend columns; "
+            "each media channel needs exactly one spend column",
+        )
+
+    seen = {}
+    for role, columns in mapping.items():
+        for column in columns:
+            if column in seen and seen[column] != role:
+                report.warning("column_reused", f"Column '{column}' is mapped as both {seen[column]} and {role}",
+                               column=column)
+            seen.setdefault(column, role)
+    return mapping
+
+
+def check_frame(df, mapping, report: ValidationReport):
+    """Vectorised checks of the mapped columns against Meridian's input requirements."""
+    import numpy as np
+    import pandas as pd
+
+    time_column = next((column for column in mapping["time"] if column in df.columns), None)
+    geo_column = next((column for column in mapping["geo"] if column in df.columns), None)
+    report.summary["rows"] = int(len(df))
+    if df.empty:
+        report.error("empty_dataset", "The dataset has no rows")
+        return
+
+    # Keys
+    for column in (time_column, geo_column):
+        if column and df[column].isna().any():
+            report.error("missing_key", f"Column '{column}' has empty values",
+                         column=column, count=int(df[column].isna().sum()))
+    if time_column:
+        times = pd.to_datetime(df[time_column], format="%Y-%m-%d", errors="coerce")
+        bad_times = times.isna() & df[time_column].notna()
+        if bad_times.any():
+            report.error("invalid_date", f"Column '{time_column}' has values that are not YYYY-MM-DD dates",
+                         column=time_column, count=int(bad_times.sum()),
+                         examples=df.loc[bad_times, time_column].head(MAX_EXAMPLES).tolist())
+        unique_times = np.sort(times.dropna().unique())
+        report.summary["n_times"] = int(len(unique_times))
+        if 0 < len(unique_times) < MIN_TIME_PERIODS:
+            report.warning("few_time_periods",
+                           f"Only {len(unique_times)} time periods; at least {MIN_TIME_PERIODS} are recommended")
+        if len(unique_times) > 2:
+            intervals = pd.Series(np.diff(unique_times)).value_counts()
+            if len(intervals) > 1:
+                report.warning("irregular_time_intervals",
+                               f"Time periods are not evenly spaced ({len(intervals)} distinct intervals)")
+
+    if time_column and geo_column:
+        keys = df[[geo_column, time_column]].dropna()
+        duplicated = keys.duplicated(keep=False)
+        if duplicated.any():
+            report.error("duplicate_geo_time", "Some geo/time combinations appear more than once",
+                         count=int(keys[duplicated].drop_duplicates().shape[0]),
+                         examples=keys[duplicated].drop_duplicates().head(MAX_EXAMPLES).values.tolist())
+        n_geos = int(keys[geo_column].nunique())
+        n_times = int(keys[time_column].nunique())
+        report.summary["n_geos"] = n_geos
+        missing = n_geos * n_times - int(keys.drop_duplicates().shape[0])
+        if missing > 0:
+            examples = []
+            if n_geos * n_times <= 1_000_000:
+                expected = pd.MultiIndex.from_product([keys[geo_column].unique(), keys[time_column].unique()])
+                present = pd.MultiIndex.from_frame(keys.drop_duplicates())
+                examples = expected.difference(present)[:MAX_EXAMPLES].tolist()
+            report.error("missing_geo_time", f"{missing} geo/time combinations are missing; "
+                         "every geo needs a row for every time period",
+                         count=missing, examples=[list(example) for example in examples])
+
+    # Values
+    numeric_roles = ("kpi", "population", "revenue_per_kpi", "media", "media_spend", "controls")
+    for role in numeric_roles:
+        for column in mapping[role]:
+            if column not in df.columns:
+                continue
+            values = pd.to_numeric(df[column], errors="coerce")
+            non_numeric = values.isna() & df[column].notna()
+            if non_numeric.any():
+                report.error("non_numeric", f"Column '{column}' ({role}) has non-numeric values",
+                             column=column, count=int(non_numeric.sum()),
+                             examples=df.loc[non_numeric, column].astype(str).head(MAX_EXAMPLES).tolist())
+            missing_values = df[column].isna()
+            if missing_values.any():
+                report.error("missing_values", f"Column '{column}' ({role}) has empty values",
+                             column=column, count=int(missing_values.sum()))
+            if role in ("media", "media_spend", "population") and (values < 0).any():
+                report.error("negative_values", f"Column '{column}' ({role}) has negative values",
+                             column=column, count=int((values < 0).sum()))
+            if role == "population" and (values == 0).any():
+                report.error("zero_population", f"Column '{column}' has zero population",
+                             column=column, count=int((values == 0).sum()))
+            if role in ("media", "media_spend") and values.notna().any():
+                if (values.fillna(0) == 0).all():
+                    report.warning("all_zero_channel", f"Column '{column}' ({role}) is zero everywhere",
+                                   column=column)
+                elif values.nunique(dropna=True) == 1:
+                    report.warning("constant_channel", f"Column '{column}' ({role}) never varies", column=column)
+
+    population_column = (mapping["population"] or [None])[0]
+    if population_column and geo_column and population_column in df.columns:
+        per_geo = pd.to_numeric(df[population_column], errors="coerce").groupby(df[geo_column]).nunique()
+        if (per_geo > 1).any():
+            report.warning("varying_population", f"Column '{population_column}' changes over time within a geo",
+                           column=population_column, count=int((per_geo > 1).sum()))
+    report.summary["n_channels"] = len(mapping["media"])
+
+
+def validate_training_dataset(dataset_blob_path, training_params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Check a stored dataset against a training submission's column mapping.
+
+    Reads the header and then only the mapped columns, in one columnar pass,
+    and reports every problem that would otherwise fail the training job
+    after a GPU has been provisioned. dataset_blob_path may also be the base
+    and delta paths of a dataset version, combined as training combines them.
+
+    Returns:
+        dict: valid, errors and warnings (each with a code and message,
+            plus column, count and examples where relevant), a summary of
+            rows, geos, time periods and channels, and elapsed_seconds
+    """
+    started = time.perf_counter()
+    report = ValidationReport()
+    mapping = check_mapping(training_params, report)
+
+    blob_paths = [dataset_blob_path] if isinstance(dataset_blob_path, str) else list(dataset_blob_path)
+    contents = [get_storage().read(blob_path) for blob_path in blob_paths]
+    header = read_dataset_header(contents[0])
+    mapped_columns = list(dict.fromkeys(column for columns in mapping.values() for column in columns))
+    absent = [column for column in mapped_columns if column not in header]
+    if absent:
+        report.error("unknown_columns", f"Mapped columns not found in the dataset: {absent}", columns=absent)
+    columns = [column for column in mapped_columns if column in header]
+    if columns:
+        key_columns = [column for column in mapping["time"] + mapping["geo"] if column in columns]
+        # Plain strings rather than categoricals, so bad values can be reported as read
+        df = combine_dataset_parts(
+            [read_dataset(content, columns=columns, string_columns=key_columns, categorical=False)
+             for content in contents],
+            key_columns,
+        )
+        check_frame(df, mapping, report)
+
+    result = report.to_dict(started)
+    logger.info("Validated %s in %.3fs: %s errors, %s warnings", blob_paths[-1],
+                result["elapsed_seconds"], len(report.errors), len(report.warnings))
+    return result
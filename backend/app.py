@@ -1,4 +1,8 @@
 # app.py
+import time
+_boot_started = time.perf_counter()
+
+import logging
 from flask import Flask
 from flask_cors import CORS
 from flask_migrate import Migrate
@@ -13,7 +17,9 @@ CORS(app)  # Allow cross-origin requests from React frontend
 app.config['UPLOAD_FOLDER'] = './api/uploaded_files'
 app.config['ALLOWED_EXTENSIONS'] = {'csv', 'excel'}
 
-if os.getenv('ENV') == 'production':
+if os.getenv('DATABASE_URL'):
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL')
+elif os.getenv('ENV') == 'production':
     app.config['SQLALCHEMY_DATABASE_URI'] = (
         f"mysql+pymysql://{os.getenv('GOOGLE_SQL_USER')}:{os.getenv('GOOGLE_SQL_PASSWORD')}@/"
         f"{os.getenv('GOOGLE_SQL_DATABASE')}?unix_socket=/cloudsql/{os.getenv('GOOGLE_SQL_INSTANCE_CONNECTION_NAME')}"
@@ -37,5 +43,8 @@ app.register_blueprint(api, url_prefix='/api')
 with app.app_context():
     db.create_all()
 
+# Tracked to keep worker boot fast: heavy SDKs are imported on first use, not here
+logging.getLogger(__name__).info("App ready in %.2fs", time.perf_counter() - _boot_started)
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=os.getenv('ENV') != 'production')
@@ -0,0 +1,403 @@
+"""
+In-process stand-ins for the external services the API calls.
+
+They implement only the parts of the client libraries that api.services
+uses, with configurable latency, so the API can be load-tested without a
+GCP project.
+"""
+import os
+import time
+import uuid
+import types
+import threading
+from datetime import datetime, timezone
+
+from api.executors import JOB_STATE_QUEUED, JOB_STATE_RUNNING, JOB_STATE_SUCCEEDED
+
+
+def _sleep_ms(latency_ms):
+    if latency_ms:
+        time.sleep(latency_ms / 1000.0)
+
+
+# Serialises conditional reads and writes, which GCS applies atomically
+_generation_lock = threading.Lock()
+
+
+class FakeBlob:
+    """A blob backed by a file under the bucket directory."""
+
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.path = os.path.join(bucket.root, name)
+
+    @property
+    def generation(self):
+        if not os.path.exists(self.path):
+            return None
+        # Writes replace the file, so the inode changes even within one mtime tick
+        info = os.stat(self.path)
+        return (info.st_ino << 64) | info.st_mtime_ns
+
+    @property
+    def size(self):
+        return os.path.getsize(self.path) if os.path.exists(self.path) else None
+
+    def reload(self):
+        _sleep_ms(self.bucket.latency_ms)
+
+    def exists(self):
+        _sleep_ms(self.bucket.latency_ms)
+        return os.path.exists(self.path)
+
+    def _check_generation(self, if_generation_match):
+        if if_generation_match is not None and (self.generation or 0) != if_generation_match:
+            from google.api_core.exceptions import PreconditionFailed
+            raise PreconditionFailed(f"{self.name} is not at generation {if_generation_match}")
+
+    def _write(self, data, if_generation_match=None):
+        _sleep_ms(self.bucket.latency_ms)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Write then rename so concurrent readers never see a partial object
+        temp_path = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        with _generation_lock:
+            try:
+                self._check_generation(if_generation_match)
+            except Exception:
+                os.remove(temp_path)
+                raise
+            os.replace(temp_path, self.path)
+
+    def upload_from_string(self, data, content_type=None, if_generation_match=None):
+        self._write(data.encode("utf-8") if isinstance(data, str) else data, if_generation_match)
+
+    def upload_from_filename(self, filename, content_type=None):
+        with open(filename, "rb") as f:
+            self._write(f.read())
+
+    def download_as_bytes(self, if_generation_match=None):
+        _sleep_ms(self.bucket.latency_ms)
+        try:
+            with _generation_lock:
+                self._check_generation(if_generation_match)
+                with open(self.path, "rb") as f:
+                    return f.read()
+        except FileNotFoundError:
+            raise self.bucket.not_found(self.name)
+
+    download_as_string = download_as_bytes
+
+    def download_as_text(self, encoding="utf-8"):
+        return self.download_as_bytes().decode(encoding)
+
+    def download_to_filename(self, filename):
+        with open(filename, "wb") as f:
+            f.write(self.download_as_bytes())
+
+    def open(self, mode="r", **kwargs):
+        _sleep_ms(self.bucket.latency_ms)
+        if "w" in mode:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        return open(self.path, mode, **({} if "b" in mode else {"encoding": "utf-8"}))
+
+
+class FakeBucket:
+    def __init__(self, root, name, latency_ms=0):
+        self.root = os.path.join(root, name)
+        self.name = name
+        self.latency_ms = latency_ms
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def not_found(name):
+        from google.api_core.exceptions import NotFound
+        return NotFound(f"No such object: {name}")
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+    def get_blob(self, name):
+        blob = FakeBlob(self, name)
+        return blob if blob.exists() else None
+
+    def list_blobs(self, prefix=""):
+        _sleep_ms(self.latency_ms)
+        blobs = []
+        for root, _, files in os.walk(self.root):
+            for filename in files:
+                if filename.endswith(".tmp"):
+                    continue
+                name = os.path.relpath(os.path.join(root, filename), self.root).replace(os.sep, "/")
+                if name.startswith(prefix):
+                    blobs.append(FakeBlob(self, name))
+        return sorted(blobs, key=lambda blob: blob.name)
+
+
+class FakeStorageClient:
+    """Filesystem bucket: gs://<bucket>/<name> is stored as <root>/<bucket>/<name>."""
+
+    def __init__(self, root, latency_ms=0):
+        self.root = root
+        self.latency_ms = latency_ms
+
+    def bucket(self, name):
+        return FakeBucket(self.root, name, self.latency_ms)
+
+    def get_bucket(self, name):
+        _sleep_ms(self.latency_ms)
+        return self.bucket(name)
+
+    def list_blobs(self, bucket_name, prefix=""):
+        return self.bucket(bucket_name).list_blobs(prefix=prefix)
+
+
+class FakeJobService:
+    """
+    Training executor whose jobs advance through queued, running and succeeded on a timer.
+
+    Every call sleeps latency_ms, standing in for the job service round trip.
+    """
+
+    name = "vertex"
+
+    def __init__(self, latency_ms=0, queue_seconds=5.0, run_seconds=30.0):
+        self.latency_ms = latency_ms
+        self.queue_seconds = queue_seconds
+        self.run_seconds = run_seconds
+        self._created = {}
+        self._lock = threading.Lock()
+
+    def register(self, job_id, created=None):
+        with self._lock:
+            self._created[job_id] = created or time.time()
+
+    def submit(self, display_name, worker_pool_specs):
+        _sleep_ms(self.latency_ms)
+        job_id = str(uuid.uuid4().int)[:19]
+        self.register(job_id)
+        return {
+            "status": "submitted",
+            "job_id": f"projects/insightsmix/locations/us-central1/customJobs/{job_id}",
+            "display_name": display_name,
+        }
+
+    def get_status(self, job_id):
+        _sleep_ms(self.latency_ms)
+        with self._lock:
+            created = self._created.setdefault(job_id, time.time())
+        elapsed = time.time() - created
+        started = created + self.queue_seconds
+        ended = started + self.run_seconds
+        if elapsed < self.queue_seconds:
+            state = JOB_STATE_QUEUED
+        elif elapsed < self.queue_seconds + self.run_seconds:
+            state = JOB_STATE_RUNNING
+        else:
+            state = JOB_STATE_SUCCEEDED
+        return {
+            "job_id": job_id,
+            "display_name": job_id,
+            "state": state,
+            "create_time": _iso(created),
+            "start_time": _iso(started) if state != JOB_STATE_QUEUED else None,
+            "end_time": _iso(ended) if state == JOB_STATE_SUCCEEDED else None,
+            "error": None,
+        }
+
+
+def _iso(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """Streams a canned markdown summary in fixed-size chunks with a delay per chunk."""
+
+    chunks = 20
+    chunk_latency_ms = 50
+    first_chunk_latency_ms = 500
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    def generate_content(self, contents, generation_config=None, safety_settings=None, stream=False):
+        def stream_chunks():
+            _sleep_ms(self.first_chunk_latency_ms)
+            for index in range(self.chunks):
+                if index:
+                    _sleep_ms(self.chunk_latency_ms)
+                yield _Chunk(f"**Section {index + 1}**\n* Channel_{index % 5} drove incremental outcome.")
+        if stream:
+            return stream_chunks()
+        return _Chunk("\n".join(chunk.text for chunk in stream_chunks()))
+
+
+class FakePart:
+    @staticmethod
+    def from_data(mime_type=None, data=None):
+        return {"mime_type": mime_type, "size": len(data or b"")}
+
+
+class FakeSafetySetting:
+    class HarmCategory:
+        HARM_CATEGORY_HATE_SPEECH = "HARM_CATEGORY_HATE_SPEECH"
+        HARM_CATEGORY_DANGEROUS_CONTENT = "HARM_CATEGORY_DANGEROUS_CONTENT"
+        HARM_CATEGORY_SEXUALLY_EXPLICIT = "HARM_CATEGORY_SEXUALLY_EXPLICIT"
+        HARM_CATEGORY_HARASSMENT = "HARM_CATEGORY_HARASSMENT"
+
+    class HarmBlockThreshold:
+        OFF = "OFF"
+
+    def __init__(self, category=None, threshold=None):
+        self.category = category
+        self.threshold = threshold
+
+
+def _vertexai_init(**kwargs):
+    return None
+
+
+class FakePdfKit:
+    """Replacement for pdfkit: the "PDF" is a copy of the HTML, after a fixed render time."""
+
+    render_latency_ms = 200
+
+    @classmethod
+    def from_file(cls, input_path, output_path, options=None):
+        _sleep_ms(cls.render_latency_ms)
+        with open(input_path, "rb") as source, open(output_path, "wb") as target:
+            target.write(source.read())
+        return True
+
+
+class FakeRenderable:
+    """Stand-in for ydata-profiling's presentation renderables: content dict, name, anchor_id and render()."""
+
+    def __init__(self, content, name=None, anchor_id=None, sequence_type=None):
+        self.content = dict(content)
+        if name is not None:
+            self.content["name"] = name
+        if anchor_id is not None:
+            self.content["anchor_id"] = anchor_id
+        if sequence_type is not None:
+            self.sequence_type = sequence_type
+
+    @property
+    def name(self):
+        return self.content["name"]
+
+    @property
+    def anchor_id(self):
+        return self.content["anchor_id"]
+
+    def render(self):
+        if "html" in self.content:
+            return self.content["html"]
+        if "item" in self.content:
+            return self.content["item"].render()
+        if "body" in self.content:
+            return "".join(
+                f'<h2 id="{section.anchor_id}">{section.name}</h2>{section.render()}'
+                for section in self.content["body"].content["items"]
+            )
+        return "".join(f"<div>{item.render()}</div>" for item in self.content["items"])
+
+
+def FakeHTML(content, name=None, anchor_id=None):
+    return FakeRenderable({"html": content}, name=name, anchor_id=anchor_id)
+
+
+def FakeHTMLReport(structure):
+    # The fake renderables already render HTML, so there is no flavour to convert to
+    return structure
+
+
+class FakeProfileReport:
+    """
+    Replacement for ydata_profiling.ProfileReport with a per-row rendering cost.
+
+    Its report has ydata's section layout (overview, variables dropdown,
+    correlation tabs, sample), so the EDA stage splits it into sections.
+    """
+
+    seconds_per_thousand_rows = 0.05
+
+    def __init__(self, df, title="", explorative=False, **kwargs):
+        self.df = df
+        self.title = title
+        self._report = None
+
+    @property
+    def report(self):
+        if self._report is None:
+            describe = self.df.describe(include="all")
+            variables = FakeRenderable({"items": [
+                FakeHTML(f'<div class="variable">{describe[column].to_frame().to_html()}</div>', anchor_id=f"v{index}")
+                for index, column in enumerate(self.df.columns)
+            ]}, sequence_type="accordion", name="Variables", anchor_id="variables")
+            numeric = self.df.select_dtypes("number")
+            correlations = FakeRenderable({"items": [
+                FakeHTML(numeric.corr(method=method).to_html(), name=method.title(), anchor_id=f"{method}_table")
+                for method in ("pearson", "spearman")
+            ]}, sequence_type="tabs", name="Correlations", anchor_id="correlations_tab")
+            sections = [
+                FakeHTML(describe.to_html(), name="Overview", anchor_id="overview"),
+                FakeRenderable({"items": list(self.df.columns), "item": variables},
+                               name="Variables", anchor_id="variables-dropdown"),
+                correlations,
+                FakeRenderable({"items": [FakeHTML(self.df.head(10).to_html(), name="First rows", anchor_id="head")]},
+                               sequence_type="tabs", name="Sample", anchor_id="sample"),
+            ]
+            body = FakeRenderable({"items": sections}, sequence_type="sections", name="Root")
+            self._report = FakeRenderable({"body": body}, name="Root")
+        return self._report
+
+    def _render_html(self):
+        return (
+            f"<html><head><title>{self.title}</title></head><body><h1>{self.title}</h1>"
+            f"{self.report.render()}</body></html>"
+        )
+
+    def to_html(self):
+        time.sleep(len(self.df) / 1000.0 * self.seconds_per_thousand_rows)
+        return self._render_html()
+
+
+def fake_modules():
+    """
+    Modules standing in for ydata_profiling (with the presentation modules the
+    EDA section split imports), pdfkit and the Vertex AI SDK.
+
+    api.services imports these on first use, so registering them in
+    sys.modules before the first request is enough to swap them in.
+    """
+    ydata_profiling = types.ModuleType("ydata_profiling")
+    ydata_profiling.ProfileReport = FakeProfileReport
+    presentation_core = types.ModuleType("ydata_profiling.report.presentation.core")
+    presentation_core.HTML = FakeHTML
+    presentation_flavours = types.ModuleType("ydata_profiling.report.presentation.flavours")
+    presentation_flavours.HTMLReport = FakeHTMLReport
+    pdfkit = types.ModuleType("pdfkit")
+    pdfkit.from_file = FakePdfKit.from_file
+    vertexai = types.ModuleType("vertexai")
+    vertexai.init = _vertexai_init
+    generative_models = types.ModuleType("vertexai.generative_models")
+    generative_models.GenerativeModel = FakeGenerativeModel
+    generative_models.Part = FakePart
+    generative_models.SafetySetting = FakeSafetySetting
+    vertexai.generative_models = generative_models
+    return {
+        "ydata_profiling": ydata_profiling,
+        "ydata_profiling.report.presentation.core": presentation_core,
+        "ydata_profiling.report.presentation.flavours": presentation_flavours,
+        "pdfkit": pdfkit,
+        "vertexai": vertexai,
+        "vertexai.generative_models": generative_models,
+    }
@@ -0,0 +1,106 @@
+"""
+Measure how long a fresh interpreter takes to import the app, and what it imports.
+
+Runs ``python -X importtime -c "import app"`` in a subprocess, then reports
+the wall time, peak RSS and the slowest top-level imports. It also checks
+that none of the heavy SDKs (which are imported on first use) are loaded
+at boot. Example, from the backend folder:
+
+    python -m benchmarks.import_time --output import_time.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must not be imported while the app boots
+HEAVY_MODULES = (
+    "pandas", "numpy", "ydata_profiling", "pdfkit", "vertexai", "google.cloud.aiplatform",
+    "google.cloud.storage", "meridian", "tensorflow",
+)
+
+
+def parse_importtime(stderr):
+    """
+    Parse -X importtime output.
+
+    Returns:
+        dict: module -> (self microseconds, cumulative microseconds, nesting depth)
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # Header line
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return modules
+
+
+def measure(statement="import app"):
+    with tempfile.TemporaryDirectory() as work_dir:
+        env = dict(
+            os.environ,
+            DATABASE_URL=os.environ.get("DATABASE_URL", f"sqlite:///{os.path.join(work_dir, 'import_time.db')}"),
+            PYTHONDONTWRITEBYTECODE="1",
+        )
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", statement],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+        )
+        wall_seconds = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"'{statement}' failed:\n{completed.stderr[-2000:]}")
+    modules = parse_importtime(completed.stderr)
+    return {
+        "statement": statement,
+        "wall_seconds": round(wall_seconds, 3),
+        # ru_maxrss is in KB on Linux and covers the largest child so far
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        "modules_imported": len(modules),
+        "modules": modules,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the import time of the backend app")
+    parser.add_argument("--statement", default="import app", help="Python statement to time")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest packages to list")
+    parser.add_argument("--output", default=None, help="Optional path of a JSON report")
+    args = parser.parse_args(argv)
+
+    result = measure(args.statement)
+    modules = result.pop("modules")
+    # Self time summed per top-level package attributes every module exactly once
+    per_package = {}
+    for name, (self_us, _, _) in modules.items():
+        package = name.split(".")[0]
+        per_package[package] = per_package.get(package, 0) + self_us
+    slowest = sorted(per_package.items(), key=lambda item: item[1], reverse=True)[:args.top]
+    heavy = sorted(name for name in HEAVY_MODULES if name in modules)
+    result["slowest_packages_ms"] = {name: round(self_us / 1000, 1) for name, self_us in slowest}
+    result["heavy_modules_loaded"] = heavy
+
+    print(f"{result['statement']}: {result['wall_seconds']}s wall, {result['peak_rss_mb']} MB peak RSS, "
+          f"{result['modules_imported']} modules")
+    for name, milliseconds in result["slowest_packages_ms"].items():
+        print(f"  {milliseconds:>9.1f} ms  {name}")
+    if heavy:
+        print(f"Heavy modules imported at boot: {', '.join(heavy)}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    return 1 if heavy else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
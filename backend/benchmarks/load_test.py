@@ -0,0 +1,354 @@
+"""
+Load-test the API against local fakes of GCS, the training job service and Gemini.
+
+Serves the Flask app from a threaded werkzeug server, seeds users and
+projects, then drives a weighted mix of uploads, EDA generation, report
+fetches (full and sectioned EDA reports), project listings and summary
+fetches at increasing concurrency.
+Reports p50/p95/p99 latency and throughput per endpoint. Example, from the
+backend folder:
+
+    python -m benchmarks.load_test --concurrency 1,4,16 --duration 30 --output load_test_results.json
+"""
+import io
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import tempfile
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import (  # noqa: E402
+    FakeStorageClient, FakeJobService, FakeGenerativeModel, FakePdfKit, FakeProfileReport, fake_modules,
+)
+
+DEFAULT_MIX = "list_projects:40,get_report:20,eda_sections:10,summaries:15,upload:10,eda:5"
+BENCH_BUCKET = "bench-bucket"
+# Admission control rejections, reported apart from errors
+REJECTED_STATUSES = (429, 503)
+
+
+def install_fakes(work_dir, args):
+    """
+    Import the app with every external service replaced by a local fake.
+
+    Returns:
+        tuple: (Flask app, api.services module, FakeJobService)
+    """
+    os.environ["BUCKET_NAME"] = BENCH_BUCKET
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(work_dir, 'bench.db')}"
+    os.environ["TRAINING_EXECUTOR"] = "vertex"
+    os.environ["STORAGE_BACKEND"] = "gcs"
+    os.environ["STORAGE_CACHE_DIR"] = os.path.join(work_dir, "storage_cache")
+    os.environ["STORAGE_CACHE_MAX_BYTES"] = str(int(args.storage_cache_mb * 1024 ** 2))
+    os.environ.setdefault("LOG_LEVEL", args.log_level)
+
+    storage_client = FakeStorageClient(os.path.join(work_dir, "buckets"), latency_ms=args.storage_latency_ms)
+    mock.patch("google.cloud.storage.Client", return_value=storage_client).start()
+    mock.patch.dict(sys.modules, fake_modules()).start()
+
+    FakeGenerativeModel.chunks = args.llm_chunks
+    FakeGenerativeModel.chunk_latency_ms = args.llm_chunk_latency_ms
+    FakeGenerativeModel.first_chunk_latency_ms = args.llm_first_chunk_latency_ms
+    FakePdfKit.render_latency_ms = args.pdf_latency_ms
+    FakeProfileReport.seconds_per_thousand_rows = args.eda_seconds_per_thousand_rows
+
+    import app as app_module
+    from api import services
+
+    job_service = FakeJobService(args.job_latency_ms, args.job_queue_seconds, args.job_run_seconds)
+    services._training_executors["vertex"] = job_service
+
+    upload_folder = os.path.join(work_dir, "uploaded_files")
+    os.makedirs(upload_folder, exist_ok=True)
+    app_module.app.config["UPLOAD_FOLDER"] = upload_folder
+    return app_module.app, services, job_service
+
+
+def synthetic_csv(rows, seed=0):
+    """A small geo x week media dataset as CSV text."""
+    rng = random.Random(seed)
+    lines = ["geo,time,population,conversions,Channel0_impression,Channel0_spend,Channel1_impression,Channel1_spend"]
+    for index in range(rows):
+        lines.append(
+            f"Geo{index % 10},2023-{1 + index // 280 % 12:02d}-{1 + index // 10 % 28:02d},"
+            f"{rng.randint(10_000, 1_000_000)},{rng.uniform(100, 10_000):.2f},"
+            f"{rng.uniform(1e4, 1e6):.1f},{rng.uniform(100, 1e4):.2f},"
+            f"{rng.uniform(1e4, 1e6):.1f},{rng.uniform(100, 1e4):.2f}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def seed_data(app, services, job_service, args):
+    """
+    Create users with finished and in-flight projects and their report blobs.
+
+    Returns:
+        list: (user email, project id) of the finished projects
+    """
+    import pandas as pd
+    from api.eda_sections import write_eda_sections
+    from api.manifest import ManifestStage
+
+    storage = services.get_storage()
+    data = synthetic_csv(args.upload_rows)
+    finished = []
+    with app.app_context():
+        for user_index in range(args.users):
+            email = f"bench-user-{user_index}@example.com"
+            for project_index in range(args.projects_per_user + args.active_per_user):
+                folder = f"result/bench-{user_index}-{project_index}"
+                active = project_index >= args.projects_per_user
+                project_id = services.store_or_update_user_and_project(
+                    email, f"bench-{user_index}-{project_index}", folder, "data.csv",
+                    status="RUNNING" if active else "SUCCESS",
+                )
+                storage.write(f"{folder}/data.csv", data)
+                if active:
+                    job_id = str(uuid.uuid4().int)[:19]
+                    project = services.Project.query.get(project_id)
+                    project.job_id = job_id
+                    services.db.session.commit()
+                    job_service.register(job_id)
+                    continue
+                storage.write(
+                    f"{folder}/eda_report.html",
+                    "<html><body><h1>Pandas Profiling Report</h1>" + "<p>variable</p>" * 2000 + "</body></html>",
+                )
+                write_eda_sections(ManifestStage(folder, "eda"),
+                                   FakeProfileReport(pd.read_csv(io.StringIO(data)), "Pandas Profiling Report"))
+                for html_name, summary_name in (("model_summary.html", "MMM_summary.md"),
+                                                ("optimization_output.html", "MSO_summary.md")):
+                    storage.write(
+                        f"{folder}/{html_name}",
+                        "<html><body>" + "<p>channel contribution</p>" * 2000 + "</body></html>",
+                    )
+                    if random.random() < args.summary_hit_rate:
+                        storage.write(f"{folder}/{summary_name}", "**Summary**\n* cached")
+                finished.append((email, project_id))
+    return finished
+
+
+class TrafficDriver:
+    """Issues the requests of each traffic scenario and records their latencies."""
+
+    def __init__(self, base_url, projects, upload_csv):
+        self.base_url = base_url
+        self.projects = projects
+        self.upload_csv = upload_csv.encode("utf-8")
+        self.samples = defaultdict(list)  # endpoint -> [(latency seconds, HTTP status or 0)]
+        self._lock = threading.Lock()
+
+    def _request(self, endpoint, method, path, params=None, body=None, headers=None):
+        url = f"{self.base_url}{path}"
+        if params:
+            url = f"{url}?{urllib.parse.urlencode(params)}"
+        request = urllib.request.Request(url, data=body, method=method, headers=headers or {})
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=300) as response:
+                payload, status = response.read(), response.status
+        except urllib.error.HTTPError as e:
+            payload, status = e.read(), e.code
+        except (urllib.error.URLError, OSError):
+            payload, status = b"", 0
+        with self._lock:
+            self.samples[endpoint].append((time.perf_counter() - started, status))
+        return payload, 0 < status < 400
+
+    def upload(self):
+        boundary = uuid.uuid4().hex
+        filename = f"bench_{uuid.uuid4().hex[:8]}.csv"
+        body = (
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"data_source\"\r\n\r\ncsv_file\r\n"
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: text/csv\r\n\r\n"
+        ).encode("utf-8") + self.upload_csv + f"\r\n--{boundary}--\r\n".encode("utf-8")
+        payload, ok = self._request(
+            "upload", "POST", "/api/upload", body=body,
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+        )
+        return json.loads(payload)["file_name"] if ok else None
+
+    def eda(self):
+        file_name = self.upload()
+        if file_name is None:
+            return
+        email, _ = random.choice(self.projects)
+        self._request(
+            "eda", "POST", "/api/generate-eda-report",
+            body=json.dumps({"dataSource": file_name, "projectName": "bench-eda", "userEmail": email}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+
+    def get_report(self):
+        email, project_id = random.choice(self.projects)
+        self._request("get_report", "GET", "/api/get-report",
+                      {"project_id": project_id, "email": email, "filename": "eda_report.html"})
+
+    def eda_sections(self):
+        """Open the sectioned EDA report: its overview page, then one fragment as the client would."""
+        email, project_id = random.choice(self.projects)
+        params = {"project_id": project_id, "email": email}
+        page, ok = self._request("eda_page", "GET", "/api/eda-report", params)
+        keys = re.findall(rb'data-fragment="([^"]+)"', page) if ok else []
+        if keys:
+            self._request("eda_section", "GET", "/api/eda-report",
+                          dict(params, section=random.choice(keys).decode("utf-8")))
+
+    def list_projects(self):
+        email, _ = random.choice(self.projects)
+        self._request("list_projects", "GET", "/api/get-user-projects", {"email": email})
+
+    def summaries(self):
+        email, project_id = random.choice(self.projects)
+        self._request("summaries", "GET", "/api/genai-summary-files", {
+            "project_id": project_id, "email": email,
+            "filename": random.choice(["MMM_summary.md", "MSO_summary.md"]),
+        })
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def run_level(driver, mix, concurrency, duration):
+    """Run the traffic mix with `concurrency` clients for `duration` seconds and summarise it."""
+    scenarios, weights = zip(*mix.items())
+    deadline = time.monotonic() + duration
+    driver.samples.clear()
+
+    def client_loop():
+        while time.monotonic() < deadline:
+            getattr(driver, random.choices(scenarios, weights)[0])()
+
+    started = time.monotonic()
+    clients = [threading.Thread(target=client_loop, daemon=True) for _ in range(concurrency)]
+    for client_thread in clients:
+        client_thread.start()
+    for client_thread in clients:
+        client_thread.join()
+    elapsed = time.monotonic() - started
+
+    endpoints = {}
+    for endpoint, samples in sorted(driver.samples.items()):
+        latencies = sorted(latency * 1000 for latency, _ in samples)
+        rejected = sum(1 for _, status in samples if status in REJECTED_STATUSES)
+        endpoints[endpoint] = {
+            "requests": len(samples),
+            "rejected": rejected,
+            "errors": sum(1 for _, status in samples if not 0 < status < 400) - rejected,
+            "throughput_rps": round(len(samples) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 0.50), 1),
+            "p95_ms": round(percentile(latencies, 0.95), 1),
+            "p99_ms": round(percentile(latencies, 0.99), 1),
+            "max_ms": round(latencies[-1], 1),
+        }
+    total = sum(endpoint["requests"] for endpoint in endpoints.values())
+    return {
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 2),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 2),
+        "endpoints": endpoints,
+    }
+
+
+def print_level(level):
+    print(f"\nconcurrency={level['concurrency']}  requests={level['requests']}  "
+          f"throughput={level['throughput_rps']} req/s")
+    print(f"  {'endpoint':<14}{'reqs':>7}{'rejected':>10}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'p99 ms':>10}")
+    for endpoint, stats in level["endpoints"].items():
+        print(f"  {endpoint:<14}{stats['requests']:>7}{stats['rejected']:>10}{stats['errors']:>8}"
+              f"{stats['throughput_rps']:>9}"
+              f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+
+
+def parse_mix(value):
+    """Parse "scenario:weight,..." into a dict of positive weights."""
+    mix = {}
+    for item in value.split(","):
+        scenario, _, weight = item.partition(":")
+        if not hasattr(TrafficDriver, scenario):
+            raise argparse.ArgumentTypeError(f"Unknown scenario '{scenario}'")
+        mix[scenario] = float(weight or 1)
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the API against local fakes of GCP services")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated client counts, run in order")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of traffic per concurrency level")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"Weighted scenarios, default {DEFAULT_MIX}")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--projects_per_user", type=int, default=5)
+    parser.add_argument("--active_per_user", type=int, default=2, help="In-flight training jobs per user")
+    parser.add_argument("--upload_rows", type=int, default=2000, help="Rows of the uploaded CSV")
+    parser.add_argument("--summary_hit_rate", type=float, default=0.5,
+                        help="Fraction of seeded projects whose Gemini summaries already exist")
+    parser.add_argument("--storage_latency_ms", type=float, default=20)
+    parser.add_argument("--storage_cache_mb", type=float, default=256,
+                        help="Size of the API's disk cache in front of the bucket, 0 disables it")
+    parser.add_argument("--job_latency_ms", type=float, default=150)
+    parser.add_argument("--job_queue_seconds", type=float, default=60)
+    parser.add_argument("--job_run_seconds", type=float, default=600)
+    parser.add_argument("--llm_first_chunk_latency_ms", type=float, default=800)
+    parser.add_argument("--llm_chunk_latency_ms", type=float, default=60)
+    parser.add_argument("--llm_chunks", type=int, default=30)
+    parser.add_argument("--pdf_latency_ms", type=float, default=300)
+    parser.add_argument("--eda_seconds_per_thousand_rows", type=float, default=0.5)
+    parser.add_argument("--log_level", default="WARNING", help="LOG_LEVEL of the app under test")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="load_test_results.json", help="Path of the JSON report")
+    args = parser.parse_args(argv)
+    random.seed(args.seed)
+
+    import logging
+    from werkzeug.serving import make_server
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        app, services, job_service = install_fakes(work_dir, args)
+        projects = seed_data(app, services, job_service, args)
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        logging.getLogger("werkzeug").setLevel(args.log_level)  # Per-request access lines drown the report
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        driver = TrafficDriver(f"http://127.0.0.1:{server.server_port}", projects, synthetic_csv(args.upload_rows))
+
+        report = {
+            "config": {key: value for key, value in vars(args).items() if key != "output"},
+            "levels": [],
+        }
+        try:
+            for concurrency in [int(value) for value in args.concurrency.split(",") if value]:
+                level = run_level(driver, args.mix, concurrency, args.duration)
+                # Cumulative since the server started
+                level["admission"] = json.loads(driver._request("metrics", "GET", "/api/metrics")[0])["admission"]
+                report["levels"].append(level)
+                print_level(level)
+                with open(args.output, "w") as f:
+                    json.dump(report, f, indent=2)
+        finally:
+            server.shutdown()
+    print(f"\nLoad test report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
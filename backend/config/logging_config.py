@@ -1,6 +1,12 @@
 import os
+import json
+import queue
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import threading
+import contextvars
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 
 # Create logs directory if it doesn't exist
 LOGS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
@@ -10,22 +16,175 @@ if not os.path.exists(LOGS_DIR):
 # Log file path
 LOG_FILE = os.path.join(LOGS_DIR, 'app.log')
 
+# Runtime configuration
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json').lower()  # "json" or "text"
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+# Fraction of INFO (and lower) records kept per call site, e.g. 0.1 keeps every 10th
+LOG_INFO_SAMPLE_RATE = float(os.getenv('LOG_INFO_SAMPLE_RATE', '1.0'))
+
+# Context fields attached to every record emitted while they are bound
+CONTEXT_FIELDS = ('request_id', 'project_id', 'job_id')
+_log_context = contextvars.ContextVar('log_context', default={})
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+def bind_log_context(**fields):
+    """
+    Bind request-scoped fields (request_id, project_id, job_id) to the current context.
+
+    Returns:
+        contextvars.Token: token that can be passed to reset_log_context
+    """
+    context = dict(_log_context.get())
+    context.update({key: value for key, value in fields.items() if value is not None})
+    return _log_context.set(context)
+
+
+def reset_log_context(token=None):
+    """Restore the context fields to their state before bind_log_context."""
+    if token is not None:
+        _log_context.reset(token)
+    else:
+        _log_context.set({})
+
+
+class ContextFilter(logging.Filter):
+    """Copy the bound context fields onto the record in the calling thread."""
+
+    def filter(self, record):
+        context = _log_context.get()
+        for field in CONTEXT_FIELDS:
+            if not hasattr(record, field):
+                setattr(record, field, context.get(field))
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a fixed fraction of INFO and lower records per call site.
+
+    Warnings and errors are never dropped, and a record can opt out of
+    sampling with ``extra={'sample': False}``.
+    """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = min(max(rate, 0.0), 1.0)
+        self._credit = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.rate >= 1.0 or record.levelno > logging.INFO or not getattr(record, 'sample', True):
+            return True
+        key = (record.pathname, record.lineno)
+        with self._lock:
+            credit = self._credit.get(key, 1.0 - self.rate) + self.rate
+            if credit >= 1.0:
+                self._credit[key] = credit - 1.0
+                return True
+            self._credit[key] = credit
+            return False
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Enqueue records without formatting them.
+
+    The stock QueueHandler formats the message in the calling thread; here only
+    the message arguments are merged so formatting and I/O happen on the
+    listener thread. When the queue is full the record is dropped instead of
+    blocking the request.
+    """
+
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Render records as single-line JSON documents."""
+
+    def format(self, record):
+        payload = {
+            'timestamp': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                payload[field] = value
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+def _build_formatter():
+    if LOG_FORMAT == 'text':
+        return logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
+        )
+    return JsonFormatter()
+
+
+def stop_logging():
+    """Flush queued records and stop the background listener."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
 def setup_logging():
-    """Configure logging settings"""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            RotatingFileHandler(
+    """
+    Configure asynchronous, structured logging.
+
+    Records are pushed onto an in-memory queue by the request threads and
+    written to the rotating log file and the console by a background
+    listener. Safe to call more than once.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is None:
+            formatter = _build_formatter()
+            file_handler = RotatingFileHandler(
                 LOG_FILE,
                 maxBytes=10000000,  # 10MB
                 backupCount=5
-            ),
-            logging.StreamHandler()  # This will also print logs to console
-        ]
-    )
+            )
+            stream_handler = logging.StreamHandler()  # This will also print logs to console
+            for handler in (file_handler, stream_handler):
+                handler.setFormatter(formatter)
+
+            log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+            queue_handler = DeferredQueueHandler(log_queue)
+            queue_handler.addFilter(SamplingFilter(LOG_INFO_SAMPLE_RATE))
+            queue_handler.addFilter(ContextFilter())
+
+            root = logging.getLogger()
+            for handler in list(root.handlers):
+                root.removeHandler(handler)
+            root.addHandler(queue_handler)
+            root.setLevel(LOG_LEVEL)
+
+            _listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+            _listener.start()
+            atexit.register(stop_logging)
 
     # Create a logger instance
     logger = logging.getLogger(__name__)
-    
-    return logger
\ No newline at end of file
+
+    return logger
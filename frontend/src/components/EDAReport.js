@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import { Paper, Box, CircularProgress, Typography, Button } from '@mui/material';
 import { Error as ErrorIcon, Download as DownloadIcon } from '@mui/icons-material';
 
@@ -8,11 +8,26 @@ const EDAReport = ({ selectedProject }) => {
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState(null);
   const [prevSelectedProject, setPrevSelectedProject] = useState(null);
+  const reportRef = useRef(null);
 
-  const handleDownload = () => {
+  const reportUrl = (path, params = {}) => {
+    const url = new URL(path, window.location.origin);
+    url.searchParams.append("project_id", selectedProject);
+    if (user) {
+      url.searchParams.append("email", user.email);
+    }
+    Object.entries(params).forEach(([key, value]) => url.searchParams.append(key, value));
+    return url;
+  };
+
+  const handleDownload = async () => {
     try {
-      // Create a Blob containing the HTML content
-      const blob = new Blob([htmlContent], { type: 'text/html' });
+      // The page only holds the overview, so download the full report
+      const response = await fetch(reportUrl("/api/get-report", { filename: "eda_report.html" }));
+      if (!response.ok) {
+        throw new Error(`Failed to fetch the EDA report for project ${selectedProject}`);
+      }
+      const blob = new Blob([await response.text()], { type: 'text/html' });
       
       // Create a temporary URL for the Blob
       const url = window.URL.createObjectURL(blob);
@@ -96,14 +111,8 @@ const EDAReport = ({ selectedProject }) => {
     setError(null);
     setPrevSelectedProject(selectedProject);
 
-    const url = new URL("/api/get-report", window.location.origin);
-    url.searchParams.append("project_id", selectedProject);
-    url.searchParams.append("filename", "eda_report.html");
-    if (user) {
-      url.searchParams.append("email", user.email);
-    }
-
-    fetch(url)
+    // Overview page; the other sections are placeholders loaded when they are shown
+    fetch(reportUrl("/api/eda-report"))
       .then((response) => {
         if (!response.ok) {
           throw new Error(`Failed to fetch the EDA report for project ${selectedProject}`);
@@ -132,6 +141,39 @@ const EDAReport = ({ selectedProject }) => {
     }
   }, [htmlContent]);
 
+  useEffect(() => {
+    if (!htmlContent || !reportRef.current) {
+      return;
+    }
+
+    // Hidden tabs have no size, so a fragment loads when its tab is opened or scrolled to
+    const observer = new IntersectionObserver((entries) => {
+      entries.filter(entry => entry.isIntersecting).forEach(({ target }) => {
+        observer.unobserve(target);
+        fetch(reportUrl("/api/eda-report", { section: target.dataset.fragment }))
+          .then((response) => {
+            if (!response.ok) {
+              throw new Error(`Failed to fetch section ${target.dataset.name}`);
+            }
+            return response.text();
+          })
+          .then((fragment) => {
+            target.innerHTML = fragment;
+          })
+          .catch((error) => {
+            console.error("Error fetching EDA section:", error);
+            target.textContent = error.message;
+          });
+      });
+    }, { rootMargin: "200px" });
+
+    reportRef.current.querySelectorAll(".eda-fragment").forEach((placeholder) => {
+      placeholder.style.minHeight = "1px";
+      observer.observe(placeholder);
+    });
+    return () => observer.disconnect();
+  }, [htmlContent]); // eslint-disable-line react-hooks/exhaustive-deps
+
   if (isLoading) {
     return (
       <Paper 
@@ -242,6 +284,7 @@ const EDAReport = ({ selectedProject }) => {
         </Button>
       </Box>
       <Box
+        ref={reportRef}
         dangerouslySetInnerHTML={{ __html: htmlContent }}
         sx={{
           p: 3,
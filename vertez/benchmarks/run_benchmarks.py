@@ -0,0 +1,229 @@
+"""
+Benchmark the vertez/train.py stages on synthetic data.
+
+Runs data loading, data preparation, posterior sampling and the
+post-training stages on CPU with small sampling budgets for a grid of
+dataset sizes, and writes the wall time and peak RSS of every stage to a
+JSON report. Example, from the vertez folder:
+
+    python -m benchmarks.run_benchmarks --geos 5,20 --weeks 52,104 --channels 3,6 \
+        --output benchmark_results.json --baseline previous_results.json
+"""
+import os
+
+# Benchmarks are comparable only on the same device, so hide GPUs before TensorFlow loads
+os.environ.setdefault('CUDA_VISIBLE_DEVICES', '')
+
+import argparse
+import itertools
+import json
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import train  # noqa: E402
+from benchmarks.synthetic_data import generate_dataset, column_mapping  # noqa: E402
+
+# Stages faster than this are too noisy to flag as regressions
+MIN_COMPARABLE_SECONDS = 1.0
+
+
+def _current_rss():
+    """Resident set size of this process in bytes, or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class PeakMemorySampler:
+    """Sample the process RSS in a background thread and keep the peak seen since start()."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        rss = _current_rss()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self.peak = None
+        self._stop.clear()
+        self._sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def measure(stage, results, fn, *args, **kwargs):
+    """Run one stage and record its wall time, starting RSS and peak RSS in results."""
+    rss_before = _current_rss()
+    started = time.perf_counter()
+    with PeakMemorySampler() as sampler:
+        value = fn(*args, **kwargs)
+    wall_seconds = time.perf_counter() - started
+    peak = sampler.peak
+    if peak is None:
+        # ru_maxrss is the process-wide peak in KB on Linux, so it can only bound the stage from above
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    results[stage] = {
+        'wall_seconds': round(wall_seconds, 3),
+        'rss_before_mb': round(rss_before / 1024 ** 2, 1) if rss_before is not None else None,
+        'peak_rss_mb': round(peak / 1024 ** 2, 1),
+    }
+    train.logger.info(f"Benchmark stage '{stage}': {wall_seconds:.2f}s, peak RSS {peak / 1024 ** 2:.0f} MB")
+    return value
+
+
+def run_case(n_geos, n_weeks, n_channels, n_controls, sampling, seed, work_dir):
+    """Benchmark every stage for one dataset size."""
+    stages = {}
+    mapping = column_mapping(n_channels, n_controls)
+    data_path = os.path.join(work_dir, 'data.csv')
+    generate_dataset(n_geos, n_weeks, n_channels, n_controls, seed=seed).to_csv(data_path, index=False)
+
+    key_columns, numeric_columns = train.mapped_columns(
+        mapping['time'], mapping['geo'], mapping['controls'], mapping['population'],
+        mapping['kpi'], mapping['revenue_per_kpi'], mapping['media'], mapping['media_spend'],
+    )
+    df = measure('load data', stages, train.load_data_from_gcs, work_dir, data_path, key_columns, numeric_columns)
+    input_data = measure(
+        'prepare data', stages,
+        lambda: train.prepare_data_loader(df, **mapping).load(),
+    )
+    mmm = measure('train model', stages, train.train_meridian_model, input_data, **sampling)
+
+    # The pipeline runs these concurrently; here they run one at a time so each is measured alone
+    measure('save model', stages, train._save_model, mmm, work_dir)
+    measure('model summary', stages, train._write_model_summary, mmm, work_dir)
+    measure('budget optimization', stages, train._write_optimization_summary, mmm, work_dir)
+    measure('compact artifacts', stages, train.export_compact_artifacts, mmm, work_dir)
+
+    return {
+        'n_geos': n_geos,
+        'n_weeks': n_weeks,
+        'n_channels': n_channels,
+        'n_controls': n_controls,
+        'rows': n_geos * n_weeks,
+        'sampling': sampling,
+        'stages': stages,
+        'total_seconds': round(sum(stage['wall_seconds'] for stage in stages.values()), 3),
+    }
+
+
+def _case_key(case):
+    return (case['n_geos'], case['n_weeks'], case['n_channels'], case['n_controls'])
+
+
+def compare_to_baseline(report, baseline, tolerance):
+    """
+    List the stages that got slower than the baseline by more than tolerance.
+
+    Returns:
+        list: one dict per regressed stage
+    """
+    baseline_cases = {_case_key(case): case for case in baseline.get('cases', [])}
+    regressions = []
+    for case in report['cases']:
+        previous = baseline_cases.get(_case_key(case))
+        if previous is None or previous.get('sampling') != case['sampling']:
+            continue
+        for stage, current in case['stages'].items():
+            before = previous['stages'].get(stage)
+            if not before or before['wall_seconds'] < MIN_COMPARABLE_SECONDS:
+                continue
+            ratio = current['wall_seconds'] / before['wall_seconds']
+            if ratio > 1 + tolerance:
+                regressions.append({
+                    'case': dict(zip(('n_geos', 'n_weeks', 'n_channels', 'n_controls'), _case_key(case))),
+                    'stage': stage,
+                    'baseline_seconds': before['wall_seconds'],
+                    'current_seconds': current['wall_seconds'],
+                    'ratio': round(ratio, 2),
+                })
+    return regressions
+
+
+def _int_list(value):
+    return [int(item) for item in value.split(',') if item]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the Meridian training stages on synthetic data')
+    parser.add_argument('--geos', type=_int_list, default=[5], help='Comma-separated geo counts')
+    parser.add_argument('--weeks', type=_int_list, default=[104], help='Comma-separated week counts')
+    parser.add_argument('--channels', type=_int_list, default=[3], help='Comma-separated media channel counts')
+    parser.add_argument('--controls', type=_int_list, default=[2], help='Comma-separated control variable counts')
+    parser.add_argument('--n_chains', type=int, default=1, help='Number of MCMC chains')
+    parser.add_argument('--n_adapt', type=int, default=20, help='Number of adaptation steps per chain')
+    parser.add_argument('--n_burnin', type=int, default=20, help='Number of burn-in steps per chain')
+    parser.add_argument('--n_keep', type=int, default=50, help='Number of posterior draws kept per chain')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic data')
+    parser.add_argument('--output', default='benchmark_results.json', help='Path of the JSON report')
+    parser.add_argument('--baseline', default=None, help='Previous JSON report to compare wall times against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed slowdown against the baseline, as a fraction')
+    args = parser.parse_args(argv)
+
+    sampling = {
+        'n_chains': args.n_chains,
+        'n_adapt': args.n_adapt,
+        'n_burnin': args.n_burnin,
+        'n_keep': args.n_keep,
+    }
+    report = {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'tensorflow': train.tf.__version__,
+        },
+        'cases': [],
+    }
+
+    for n_geos, n_weeks, n_channels, n_controls in itertools.product(args.geos, args.weeks, args.channels, args.controls):
+        train.logger.info(f"Benchmarking {n_geos} geos x {n_weeks} weeks x {n_channels} channels x {n_controls} controls")
+        with tempfile.TemporaryDirectory() as work_dir:
+            report['cases'].append(run_case(n_geos, n_weeks, n_channels, n_controls, sampling, args.seed, work_dir))
+        # Write after every case so a crash on a large size keeps the smaller results
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+        report['regressions'] = regressions
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        for regression in regressions:
+            train.logger.warning(f"Regression in '{regression['stage']}' for {regression['case']}: "
+                                 f"{regression['baseline_seconds']}s -> {regression['current_seconds']}s")
+
+    train.logger.info(f"Benchmark report written to {args.output}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+
+def generate_dataset(n_geos=5, n_weeks=104, n_channels=3, n_controls=2, seed=0, start_date='2021-01-04'):
+    """
+    Generate a synthetic geo x week media mix dataset.
+
+    Spend follows a seasonal pattern per channel and geo, impressions are
+    spend divided by a channel CPM, and the KPI is a saturating response to
+    impressions plus control effects and noise, scaled by geo population.
+
+    Args:
+        n_geos (int): Number of geos.
+        n_weeks (int): Number of weekly time periods.
+        n_channels (int): Number of media channels.
+        n_controls (int): Number of control variables.
+        seed (int): Random seed.
+        start_date (str): First week (YYYY-MM-DD).
+
+    Returns:
+        pd.DataFrame: one row per geo and week
+    """
+    rng = np.random.default_rng(seed)
+    weeks = pd.date_range(start_date, periods=n_weeks, freq='W-MON')
+    geos = [f'Geo{i}' for i in range(n_geos)]
+
+    population = rng.integers(50_000, 5_000_000, size=n_geos).astype(float)
+    season = 1 + 0.3 * np.sin(2 * np.pi * np.arange(n_weeks) / 52)
+    cpm = rng.uniform(2, 20, size=n_channels)
+    effect = rng.uniform(0.1, 1.0, size=n_channels)
+
+    # (geo, week, channel)
+    spend = (
+        rng.gamma(2.0, 1_000.0, size=(n_geos, n_weeks, n_channels))
+        * season[None, :, None]
+        * (population / population.mean())[:, None, None]
+    )
+    impressions = spend / cpm[None, None, :] * 1_000
+    controls = rng.normal(0, 1, size=(n_geos, n_weeks, n_controls))
+
+    per_capita_impressions = impressions / population[:, None, None]
+    response = (effect[None, None, :] * (1 - np.exp(-per_capita_impressions))).sum(axis=2)
+    kpi = population[:, None] * (
+        0.01 + 0.005 * response + 0.001 * controls.sum(axis=2) + rng.normal(0, 0.0005, size=(n_geos, n_weeks))
+    )
+
+    frame = {
+        'geo': np.repeat(geos, n_weeks),
+        'time': np.tile(weeks.strftime('%Y-%m-%d'), n_geos),
+        'population': np.repeat(population, n_weeks),
+        'conversions': np.clip(kpi, 0, None).ravel(),
+        'revenue_per_conversion': rng.uniform(0.5, 2.0, size=n_geos * n_weeks),
+    }
+    for channel in range(n_channels):
+        frame[f'Channel{channel}_impression'] = impressions[:, :, channel].ravel()
+        frame[f'Channel{channel}_spend'] = spend[:, :, channel].ravel()
+    for control in range(n_controls):
+        frame[f'control_{control}'] = controls[:, :, control].ravel()
+    return pd.DataFrame(frame)
+
+
+def column_mapping(n_channels=3, n_controls=2):
+    """
+    Build the train.py column mapping arguments for a generated dataset.
+
+    Returns:
+        dict: keyword arguments for train.mapped_columns / train.prepare_data_loader
+    """
+    media = [f'Channel{channel}_impression' for channel in range(n_channels)]
+    media_spend = [f'Channel{channel}_spend' for channel in range(n_channels)]
+    return {
+        'time': 'time',
+        'geo': 'geo',
+        'controls': ','.join(f'control_{control}' for control in range(n_controls)),
+        'population': 'population',
+        'kpi': 'conversions',
+        'revenue_per_kpi': 'revenue_per_conversion',
+        'media': ','.join(media),
+        'media_spend': ','.join(media_spend),
+        'correct_media_to_channel': json.dumps({column: f'Channel_{i}' for i, column in enumerate(media)}),
+        'correct_media_spend_to_channel': json.dumps({column: f'Channel_{i}' for i, column in enumerate(media_spend)}),
+    }
@@ -1,4 +1,6 @@
 import argparse
+import contextlib
+import itertools
 import os
 import numpy as np
 import pandas as pd
@@ -6,10 +8,20 @@ import tensorflow as tf
 import tensorflow_probability as tfp
 import io
 import json
+import hashlib
+from google.api_core import exceptions as api_exceptions
 from google.cloud import storage
+from google.cloud.storage import transfer_manager
+from google.cloud.storage.retry import DEFAULT_RETRY
 import logging
+import random
+import shutil
 import sys
 import tempfile
+import threading
+import time as time_module
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
 
 # Configure logging
 logging.basicConfig(
@@ -22,6 +34,37 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Upload tuning: chunk size must be a multiple of 256 KB
+RESUMABLE_UPLOAD_THRESHOLD = 8 * 1024 * 1024
+PARALLEL_UPLOAD_THRESHOLD = 256 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 32 * 1024 * 1024
+PARALLEL_UPLOAD_WORKERS = 8
+UPLOAD_TIMEOUT = 300
+UPLOAD_MAX_ATTEMPTS = 5
+UPLOAD_MAX_BACKOFF = 60
+NON_RETRYABLE_UPLOAD_ERRORS = (
+    FileNotFoundError,
+    api_exceptions.BadRequest,
+    api_exceptions.Unauthorized,
+    api_exceptions.Forbidden,
+    api_exceptions.NotFound,
+)
+
+# "gcs", or "local" when --bucket_name is a local directory standing in for the bucket
+STORAGE_BACKEND = 'gcs'
+
+# Artifact index in the project folder, shared with the backend (backend/api/manifest.py)
+MANIFEST_FILE_NAME = 'manifest.json'
+MANIFEST_WRITE_ATTEMPTS = 5
+# Packages whose versions must match wherever the saved model is unpickled (backend/api/scenarios.py)
+MODEL_RUNTIME_PACKAGES = ('google-meridian', 'tensorflow', 'tensorflow-probability')
+
+_storage_client = None
+_storage_client_lock = threading.Lock()
+
+# Sweep configurations with a larger maximum R-hat are treated as not converged
+SWEEP_RHAT_THRESHOLD = 1.2
+
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '0'
 
 from meridian import constants
@@ -32,37 +75,74 @@ from meridian.model import prior_distribution
 from meridian.analysis import summarizer
 from meridian.analysis import optimizer
 
-def load_data_from_gcs(bucket_name, data_path):
-    """Load CSV data from Google Cloud Storage bucket."""
+def _split_columns(value):
+    """Split a comma-separated column argument into a list of names."""
+    return [column for column in value.split(',') if column] if value else []
+
+
+def mapped_columns(time, geo, controls, population, kpi, revenue_per_kpi, media, media_spend):
+    """
+    Return the dataset columns referenced by the column mapping.
+
+    Returns:
+        tuple: (key columns read as strings, numeric columns read as float64)
+    """
+    key_columns = _split_columns(time) + _split_columns(geo)
+    numeric_columns = []
+    for value in (controls, population, kpi, revenue_per_kpi, media, media_spend):
+        for column in _split_columns(value):
+            if column not in numeric_columns and column not in key_columns:
+                numeric_columns.append(column)
+    return key_columns, numeric_columns
+
+
+def combine_dataset_parts(frames, key_columns):
+    """
+    Concatenate a base dataset and its appended deltas.
+
+    Rows of a later part replace rows of earlier parts with the same key
+    (time, geo); duplicates within one part are left for Meridian to reject.
+    """
+    if len(frames) == 1:
+        return frames[0]
+    combined = pd.concat([frame.assign(_part=index) for index, frame in enumerate(frames)], ignore_index=True)
+    if key_columns:
+        latest = combined.groupby(key_columns, sort=False, dropna=False)["_part"].transform("max")
+        combined = combined[combined["_part"] == latest]
+    return combined.drop(columns="_part").reset_index(drop=True)
+
+
+def load_data_from_gcs(bucket_name, data_path, key_columns=None, numeric_columns=None):
+    """
+    Load the dataset from Google Cloud Storage into memory.
+
+    Only the mapped columns are parsed, with explicit dtypes: key columns
+    (time, geo) as strings and everything else as float64. Parquet files are
+    read column-wise; anything else is parsed as CSV. data_path may list a
+    base file and its deltas, comma-separated, which are combined by key.
+    """
     try:
-        full_path = data_path
-        df = pd.read_csv(full_path)
-        df.to_csv("geo_media.csv", index=False)
-        logger.info("Direct GCS loading successful")
+        columns = list(key_columns or []) + list(numeric_columns or []) or None
+        dtypes = {column: str for column in key_columns or []}
+        dtypes.update({column: 'float64' for column in numeric_columns or []})
+
+        frames = []
+        for full_path in _split_columns(data_path):
+            if full_path.endswith('.parquet'):
+                frames.append(pd.read_parquet(full_path, columns=columns).astype(dtypes))
+            else:
+                frames.append(pd.read_csv(full_path, usecols=columns, dtype=dtypes or None))
+        df = combine_dataset_parts(frames, list(key_columns or []))
+        logger.info(f"Direct GCS loading successful: {len(df)} rows, {len(df.columns)} columns from {len(frames)} parts")
         return df
     except Exception as e:
         logger.error(f"Failed to load data from GCS: {e}")
         raise
 
 def prepare_data_loader(df, time, geo, controls, population, kpi, revenue_per_kpi, media, media_spend, correct_media_to_channel, correct_media_spend_to_channel):
-    """Prepare data loader for Meridian model using dynamic column mapping."""
+    """Prepare an in-memory data loader for Meridian model using dynamic column mapping."""
     logger.info("Preparing data loader with dynamic column mapping...")
 
-    # Convert JSON strings to Python dictionaries
-    # media = json.loads(media_json)
-    # media_spend = json.loads(media_spend_json)
-
-    # Set up CoordToColumns using the column_mapping
-    # coord_to_columns = load.CoordToColumns(
-    #     time=time,
-    #     geo=geo,
-    #     controls=controls.split(','),
-    #     population=population,
-    #     kpi=kpi,
-    #     revenue_per_kpi=revenue_per_kpi,
-    #     media=media.split(','),
-    #     media_spend=media_spend.split(','),
-    # )
     coord_to_columns = load.CoordToColumns(
     **{
         key: value
@@ -83,64 +163,592 @@ def prepare_data_loader(df, time, geo, controls, population, kpi, revenue_per_kp
 
     correct_media_to_channel = json.loads(correct_media_to_channel)
     correct_media_spend_to_channel = json.loads(correct_media_spend_to_channel)
-    # Create media to channel mappings
-  
-    return load.CsvDataLoader(
-        csv_path="geo_media.csv",
+
+    # Build the input data straight from the frame instead of re-parsing a CSV copy
+    return load.DataFrameDataLoader(
+        df=df,
         kpi_type='non_revenue',
         coord_to_columns=coord_to_columns,
         media_to_channel=correct_media_to_channel,
         media_spend_to_channel=correct_media_spend_to_channel
     )
 
+def load_warm_start_model(model_uri):
+    """Download and unpickle a previously saved Meridian model from a gs:// URI or local path."""
+    if not model_uri.startswith('gs://'):
+        return model.load_mmm(model_uri)
+    bucket_name, blob_name = model_uri.removeprefix('gs://').split('/', 1)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        local_path = os.path.join(tmp_dir, 'warm_start_mmm.pkl')
+        get_storage_client().bucket(bucket_name).blob(blob_name).download_to_filename(local_path)
+        logger.info(f"Downloaded warm start model from {model_uri}")
+        return model.load_mmm(local_path)
+
+
+def build_warm_start_state(previous_mmm, mmm, n_chains):
+    """
+    Build the initial sampler state and step size from a previous fit.
+
+    Each chain starts from the last posterior draw of a previous chain.
+    Variables whose shape changed (e.g. new geos or knots) start from the
+    new model's prior draws instead.
+
+    Returns:
+        tuple: (dict of initial state tensors, initial step size or None)
+    """
+    posterior = previous_mmm.inference_data.posterior
+    prior = mmm.inference_data.prior
+    chain_index = np.arange(n_chains)
+
+    current_state = {}
+    reused = []
+    for name in prior.data_vars:
+        prior_values = prior[name].values[0]  # (draw, ...)
+        if name in posterior.data_vars and posterior[name].values.shape[2:] == prior_values.shape[1:]:
+            last_draws = posterior[name].values[:, -1]  # (chain, ...)
+            values = last_draws[chain_index % last_draws.shape[0]]
+            reused.append(name)
+        else:
+            values = prior_values[chain_index % prior_values.shape[0]]
+        current_state[name] = tf.convert_to_tensor(values, dtype=tf.float32)
+    logger.info(f"Warm start reuses {len(reused)}/{len(current_state)} variables: {reused}")
+
+    init_step_size = None
+    sample_stats = getattr(previous_mmm.inference_data, 'sample_stats', None)
+    if sample_stats is not None and 'step_size' in sample_stats:
+        init_step_size = float(np.mean(sample_stats['step_size'].values[:, -1]))
+        logger.info(f"Warm start initial step size: {init_step_size}")
+    return current_state, init_step_size
+
+
+def _sample_posterior_warm(mmm, previous_mmm, n_chains, n_adapt, n_burnin, n_keep):
+    """Run posterior sampling seeded from a previous fit, degrading gracefully."""
+    current_state, init_step_size = build_warm_start_state(previous_mmm, mmm, n_chains)
+    attempts = [
+        {'current_state': current_state, 'init_step_size': init_step_size},
+        {'init_step_size': init_step_size},
+    ]
+    for warm_kwargs in attempts:
+        warm_kwargs = {key: value for key, value in warm_kwargs.items() if value is not None}
+        try:
+            mmm.sample_posterior(n_chains=n_chains, n_adapt=n_adapt, n_burnin=n_burnin, n_keep=n_keep, **warm_kwargs)
+            return
+        except (TypeError, ValueError, KeyError, tf.errors.InvalidArgumentError) as e:
+            logger.warning(f"Warm start with {sorted(warm_kwargs)} failed, falling back: {e}")
+    mmm.sample_posterior(n_chains=n_chains, n_adapt=n_adapt, n_burnin=n_burnin, n_keep=n_keep)
+
+
 def train_meridian_model(data_loader, roi_mu=0.2, roi_sigma=0.9, 
-                          n_chains=3, n_adapt=200, n_burnin=200, n_keep=500):
+                          n_chains=3, n_adapt=200, n_burnin=200, n_keep=500, n_prior_draws=None,
+                          warm_start_mmm=None):
     """
-    Train Meridian Model with reduced parameters for faster testing
+    Train Meridian Model with the given ROI prior and sampling budget.
+
+    n_prior_draws defaults to n_keep. When warm_start_mmm is given, the
+    sampler is seeded from that model's final posterior state.
     """
-    logger.info("Initializing model training")
+    logger.info(f"Initializing model training (roi_mu={roi_mu}, roi_sigma={roi_sigma}, n_chains={n_chains}, "
+                f"n_adapt={n_adapt}, n_burnin={n_burnin}, n_keep={n_keep})")
     prior = prior_distribution.PriorDistribution(
         roi_m=tfp.distributions.LogNormal(roi_mu, roi_sigma, name=constants.ROI_M)
     )
     model_spec = spec.ModelSpec(prior=prior)
 
     mmm = model.Meridian(input_data=data_loader, model_spec=model_spec)
-    mmm.sample_prior(n_keep)
+    mmm.sample_prior(n_prior_draws or n_keep)
     logger.info("Starting model posterior sampling...")
-    mmm.sample_posterior(n_chains=n_chains, n_adapt=n_adapt, n_burnin=n_burnin, n_keep=n_keep)
+    if warm_start_mmm is not None:
+        _sample_posterior_warm(mmm, warm_start_mmm, n_chains, n_adapt, n_burnin, n_keep)
+    else:
+        mmm.sample_posterior(n_chains=n_chains, n_adapt=n_adapt, n_burnin=n_burnin, n_keep=n_keep)
     
     logger.info("Model posterior sampling completed")
     return mmm
 
 
+def get_storage_client():
+    """Return the storage client shared by all downloads and uploads of this process."""
+    global _storage_client
+    with _storage_client_lock:
+        if _storage_client is None:
+            _storage_client = storage.Client()
+        return _storage_client
+
+
 def upload_to_gcs(local_file_path, bucket_name, destination_blob_name):
     """
     Uploads a file to Google Cloud Storage.
 
+    Files above RESUMABLE_UPLOAD_THRESHOLD use chunked resumable uploads and
+    files above PARALLEL_UPLOAD_THRESHOLD are uploaded as concurrent parts
+    composed server-side. Transient failures are retried with exponential
+    backoff.
+
     Args:
         local_file_path (str): Path to the local file.
         bucket_name (str): Name of the GCS bucket.
         destination_blob_name (str): Destination path in the GCS bucket.
+
+    Returns:
+        int: generation of the uploaded object
     """
+    file_size = os.path.getsize(local_file_path)
+    if STORAGE_BACKEND == 'local':
+        # bucket_name is a local directory standing in for the bucket
+        destination_path = os.path.join(bucket_name, destination_blob_name)
+        os.makedirs(os.path.dirname(destination_path), exist_ok=True)
+        temp_path = f'{destination_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        shutil.copyfile(local_file_path, temp_path)
+        os.replace(temp_path, destination_path)
+        logger.info(f"File successfully copied to {destination_path} ({file_size} bytes)")
+        return _local_generation(os.stat(destination_path))
+
+    bucket = get_storage_client().bucket(bucket_name)
+
+    for attempt in range(1, UPLOAD_MAX_ATTEMPTS + 1):
+        try:
+            if file_size >= PARALLEL_UPLOAD_THRESHOLD:
+                blob = bucket.blob(destination_blob_name)
+                transfer_manager.upload_chunks_concurrently(
+                    local_file_path, blob,
+                    chunk_size=UPLOAD_CHUNK_SIZE,
+                    worker_type=transfer_manager.THREAD,
+                    max_workers=PARALLEL_UPLOAD_WORKERS,
+                )
+                blob.reload()  # The composed object's generation is not returned by the upload
+            else:
+                chunk_size = UPLOAD_CHUNK_SIZE if file_size >= RESUMABLE_UPLOAD_THRESHOLD else None
+                blob = bucket.blob(destination_blob_name, chunk_size=chunk_size)
+                blob.upload_from_filename(local_file_path, retry=DEFAULT_RETRY, timeout=UPLOAD_TIMEOUT)
+            logger.info(f"File successfully uploaded to gs://{bucket_name}/{destination_blob_name} ({file_size} bytes)")
+            return blob.generation
+        except NON_RETRYABLE_UPLOAD_ERRORS as e:
+            logger.error(f"Error uploading file to GCS: {e}")
+            raise
+        except Exception as e:
+            if attempt == UPLOAD_MAX_ATTEMPTS:
+                logger.error(f"Error uploading file to GCS after {attempt} attempts: {e}")
+                raise
+            delay = min(UPLOAD_MAX_BACKOFF, 2 ** attempt) + random.uniform(0, 1)
+            logger.warning(f"Upload of {destination_blob_name} failed (attempt {attempt}/{UPLOAD_MAX_ATTEMPTS}), "
+                           f"retrying in {delay:.1f}s: {e}")
+            time_module.sleep(delay)
+
+
+def file_sha256(local_path):
+    digest = hashlib.sha256()
+    with open(local_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def upload_artifact(local_path, bucket_name, result_dir, name, artifacts):
+    """
+    Upload a file as <result_dir>/<name> and describe it in artifacts for the manifest.
+
+    Args:
+        artifacts (dict): name -> size, sha256, generation, write time and upload seconds
+    """
+    started = time_module.perf_counter()
+    generation = upload_to_gcs(local_path, bucket_name, f'{result_dir}/{name}')
+    artifacts[name] = {
+        'size': os.path.getsize(local_path),
+        'sha256': file_sha256(local_path),
+        'generation': str(generation) if generation is not None else None,
+        'content_type': None,
+        'written_at': datetime.utcnow().isoformat(),
+        'seconds': round(time_module.perf_counter() - started, 3),
+    }
+
+
+@contextlib.contextmanager
+def _directory_lock(directory):
+    """Exclusive lock on a local bucket directory, held against every process writing under it."""
+    import fcntl
+
+    fd = os.open(directory, os.O_RDONLY)
     try:
-        # Initialize a storage client
-        client = storage.Client()
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _local_generation(info):
+    """Generation of a local file: inode and mtime, as in the backend's LocalStorage."""
+    return (info.st_ino << 64) | info.st_mtime_ns
+
+
+def _read_manifest(bucket_name, blob_name):
+    """Return (manifest, generation) of a project manifest; generation 0 if it does not exist yet."""
+    if STORAGE_BACKEND == 'local':
+        path = os.path.join(bucket_name, blob_name)
+        if not os.path.exists(path):
+            return None, 0
+        with _directory_lock(os.path.dirname(path)):
+            generation = _local_generation(os.stat(path))
+            with open(path) as f:
+                return json.load(f), generation
+    blob = get_storage_client().bucket(bucket_name).get_blob(blob_name)
+    if blob is None:
+        return None, 0
+    return json.loads(blob.download_as_bytes(if_generation_match=blob.generation)), blob.generation
+
+
+def _write_manifest(bucket_name, blob_name, manifest, generation):
+    """Write a manifest only if it is still at generation; raises PreconditionFailed otherwise."""
+    data = json.dumps(manifest, indent=2)
+    if STORAGE_BACKEND == 'local':
+        path = os.path.join(bucket_name, blob_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Same lock as the backend's LocalStorage, so check and replace are atomic against the API
+        with _directory_lock(os.path.dirname(path)):
+            current = _local_generation(os.stat(path)) if os.path.exists(path) else 0
+            if current != generation:
+                raise api_exceptions.PreconditionFailed(f'{blob_name} changed while it was updated')
+            temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(temp_path, 'w') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        return
+    get_storage_client().bucket(bucket_name).blob(blob_name).upload_from_string(
+        data, content_type='application/json', if_generation_match=generation
+    )
+
 
-        # Access the bucket
-        bucket = client.bucket(bucket_name)
+def update_manifest(bucket_name, result_dir, stage, artifacts, started_at, finished_at, **details):
+    """
+    Record a stage and its artifacts in <result_dir>/manifest.json.
 
-        # Create a blob object for the model file
-        blob = bucket.blob(destination_blob_name)
+    The backend extends the same manifest with the upload, EDA and
+    summarization stages, so the update is conditional on the generation
+    that was read and retried when another stage wrote in between.
 
-        # Upload the file to GCS
-        blob.upload_from_filename(local_file_path)
-        logger.info(f"File successfully uploaded to gs://{bucket_name}/{destination_blob_name}")
+    The manifest only indexes artifacts that are already uploaded, so a
+    failed update is logged rather than failing the job, as the backend's
+    record_stage does; readers fall back to listing the project folder.
+    """
+    blob_name = f'{result_dir}/{MANIFEST_FILE_NAME}'
+    record = {
+        'started_at': started_at.isoformat(),
+        'finished_at': finished_at.isoformat(),
+        'seconds': round((finished_at - started_at).total_seconds(), 3),
+        **details,
+    }
+    try:
+        for attempt in range(1, MANIFEST_WRITE_ATTEMPTS + 1):
+            try:
+                manifest, generation = _read_manifest(bucket_name, blob_name)
+                manifest = manifest or {'project_folder': result_dir, 'stages': {}, 'artifacts': {}}
+                previous = manifest['stages'].get(stage, {})
+                manifest['stages'][stage] = dict(record, artifacts=sorted(set(previous.get('artifacts', [])) | set(artifacts)))
+                for name, entry in artifacts.items():
+                    manifest['artifacts'][name] = dict(entry, stage=stage)
+                manifest['updated_at'] = datetime.utcnow().isoformat()
+                _write_manifest(bucket_name, blob_name, manifest, generation)
+                logger.info(f"Recorded stage '{stage}' with {len(artifacts)} artifacts in {blob_name}")
+                return
+            except api_exceptions.PreconditionFailed:
+                if attempt == MANIFEST_WRITE_ATTEMPTS:
+                    raise
+                time_module.sleep(random.uniform(0.05, 0.2) * attempt)
     except Exception as e:
-        logger.error(f"Error uploading file to GCS: {e}")
-        raise
+        logger.error(f"Failed to record stage '{stage}' in {blob_name}: {e}")
+
+
+SAMPLING_OPTIONS = ('roi_mu', 'roi_sigma', 'n_chains', 'n_adapt', 'n_burnin', 'n_keep', 'n_prior_draws')
+
+
+def coerce_sampling_value(name, value):
+    """Convert a sweep value to the type train_meridian_model expects: int for n_* options, float otherwise."""
+    if name not in SAMPLING_OPTIONS:
+        raise ValueError(f"Unknown sampling option '{name}'")
+    try:
+        return int(value) if name.startswith('n_') else float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid value for sampling option '{name}': {value!r}")
+
+
+def expand_sweep_grid(sweep_config, base_sampling):
+    """
+    Expand a sweep grid into one sampling configuration per combination.
+
+    Args:
+        sweep_config (dict): option name to list of values, e.g.
+            {"roi_mu": [0.1, 0.2], "roi_sigma": [0.5, 0.9]}
+        base_sampling (dict): values used for options not in the grid
+
+    Returns:
+        list: sampling configurations accepted by train_meridian_model
+
+    Raises:
+        ValueError: for an unknown option or a value of the wrong type
+    """
+    names = sorted(sweep_config)
+    grids = [[coerce_sampling_value(name, value) for value in (values if isinstance(values, list) else [values])]
+             for name, values in ((name, sweep_config[name]) for name in names)]
+    return [dict(base_sampling, **dict(zip(names, combination))) for combination in itertools.product(*grids)]
+
+
+def compute_diagnostics(mmm):
+    """Collect convergence diagnostics (R-hat, ESS) and fit metrics of a fitted model."""
+    import arviz as az
+    from meridian.analysis import analyzer
+
+    mmm_analyzer = analyzer.Analyzer(mmm)
+    rhat = {name: float(np.nanmax(np.asarray(value))) for name, value in mmm_analyzer.get_rhat().items()}
+    ess_dataset = az.ess(mmm.inference_data.posterior)
+    ess = {name: float(np.nanmin(ess_dataset[name].values)) for name in ess_dataset.data_vars}
+
+    accuracy = mmm_analyzer.predictive_accuracy()['value'].to_dataframe().reset_index()
+    r_squared = accuracy.loc[accuracy['metric'] == 'R_Squared', 'value']
+
+    return {
+        'max_rhat': max(rhat.values()) if rhat else None,
+        'min_ess': min(ess.values()) if ess else None,
+        'rhat': rhat,
+        'ess': ess,
+        'r_squared': float(r_squared.mean()) if len(r_squared) else None,
+        'fit_metrics': json.loads(accuracy.to_json(orient='records')),
+    }
+
+
+def _sweep_score(diagnostics):
+    """Rank configurations: converged fits first, then by R-squared."""
+    converged = diagnostics['max_rhat'] is not None and diagnostics['max_rhat'] < SWEEP_RHAT_THRESHOLD
+    return (converged, diagnostics['r_squared'] if diagnostics['r_squared'] is not None else float('-inf'))
 
 
-def main(project_id, bucket_name, data_path, result_dir,output_path, time, geo, controls, population, kpi, revenue_per_kpi, media, media_spend, correct_media_to_channel, correct_media_spend_to_channel):
+def run_sweep(input_data, configs, bucket_name, result_dir, work_dir, warm_start_mmm=None, parallelism=0,
+              artifacts=None):
+    """
+    Fit one model per configuration on the already loaded data and keep the best.
+
+    Fits are spread round-robin over the visible GPUs and run concurrently,
+    up to one per accelerator unless parallelism is given. Per-config
+    diagnostics and a summary marking the best configuration are uploaded
+    to <result_dir>/sweep/ and described in artifacts for the manifest.
+    A configuration that fails is recorded with its error and skipped.
+
+    Returns:
+        fitted model of the best configuration
+
+    Raises:
+        RuntimeError: if every configuration failed
+    """
+    devices = [device.name for device in tf.config.list_logical_devices('GPU')] or [None]
+    parallelism = parallelism or len(devices)
+    logger.info(f"Running sweep of {len(configs)} configurations on {devices} with parallelism {parallelism}")
+    sweep_dir = os.path.join(work_dir, 'sweep')
+    os.makedirs(sweep_dir, exist_ok=True)
+    artifacts = {} if artifacts is None else artifacts
+
+    def fit(index, config):
+        device = devices[index % len(devices)]
+        started = time_module.perf_counter()
+        mmm = None
+        try:
+            with tf.device(device) if device else contextlib.nullcontext():
+                mmm = train_meridian_model(input_data, warm_start_mmm=warm_start_mmm, **config)
+                diagnostics = compute_diagnostics(mmm)
+        except Exception as e:
+            logger.exception(f"Sweep config {index} failed")
+            mmm, diagnostics = None, {'max_rhat': None, 'min_ess': None, 'r_squared': None, 'error': repr(e)}
+        diagnostics.update(config_index=index, config=config, device=device,
+                           fit_seconds=round(time_module.perf_counter() - started, 1))
+        local_path = os.path.join(sweep_dir, f'config_{index}.json')
+        try:
+            with open(local_path, 'w') as f:
+                json.dump(diagnostics, f, indent=2)
+            upload_artifact(local_path, bucket_name, result_dir, f'sweep/config_{index}.json', artifacts)
+        except Exception as e:
+            logger.error(f"Failed to upload diagnostics of sweep config {index}: {e}")
+        if mmm is not None:
+            logger.info(f"Sweep config {index}: max R-hat {diagnostics['max_rhat']}, "
+                        f"min ESS {diagnostics['min_ess']}, R-squared {diagnostics['r_squared']}")
+            # Only the best model is kept; a losing one is dropped as soon as it is scored
+            with best_lock:
+                if best['diagnostics'] is None or _sweep_score(diagnostics) > _sweep_score(best['diagnostics']):
+                    best.update(mmm=mmm, diagnostics=diagnostics)
+        return diagnostics
+
+    best, best_lock, results = {'mmm': None, 'diagnostics': None}, threading.Lock(), []
+    with ThreadPoolExecutor(max_workers=parallelism) as pool:
+        futures = [pool.submit(fit, index, config) for index, config in enumerate(configs)]
+        for future in as_completed(futures):
+            results.append(future.result())
+    best_mmm, best_diagnostics = best['mmm'], best['diagnostics']
+
+    best_index = best_diagnostics['config_index'] if best_diagnostics else None
+    summary = {
+        'best_config_index': best_index,
+        'rhat_threshold': SWEEP_RHAT_THRESHOLD,
+        'failed_configs': sum('error' in result for result in results),
+        'configs': [
+            {key: result[key] for key in ('config_index', 'config', 'max_rhat', 'min_ess', 'r_squared', 'fit_seconds')}
+            | {'best': result['config_index'] == best_index}
+            | ({'error': result['error']} if 'error' in result else {})
+            for result in sorted(results, key=lambda result: result['config_index'])
+        ],
+    }
+    summary_path = os.path.join(sweep_dir, 'summary.json')
+    with open(summary_path, 'w') as f:
+        json.dump(summary, f, indent=2)
+    upload_artifact(summary_path, bucket_name, result_dir, 'sweep/summary.json', artifacts)
+    if best_diagnostics is None:
+        raise RuntimeError(f"All {len(configs)} sweep configurations failed")
+    logger.info(f"Best sweep configuration: {best_diagnostics['config']} "
+                f"({summary['failed_configs']} of {len(configs)} failed)")
+    return best_mmm
+
+
+def model_runtime_versions():
+    """Installed versions of the packages the saved model is pickled with, None for a missing one."""
+    from importlib import metadata
+
+    versions = {}
+    for package in MODEL_RUNTIME_PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+
+def _timed(stage, fn, *args, **kwargs):
+    """Run one pipeline stage and log how long it took."""
+    started = time_module.perf_counter()
+    result = fn(*args, **kwargs)
+    logger.info(f"Stage '{stage}' finished in {time_module.perf_counter() - started:.1f}s")
+    return result
+
+
+def _save_model(mmm, work_dir):
+    local_model_path = os.path.join(work_dir, 'saved_mmm.pkl')
+    model.save_mmm(mmm, local_model_path)
+    logger.info(f"Model saved locally: {local_model_path}")
+    return local_model_path
+
+
+def _write_model_summary(mmm, work_dir, start_date=None, end_date=None):
+    summary_dir = os.path.join(work_dir, 'summary')
+    os.makedirs(summary_dir, exist_ok=True)
+    mmm_summarizer = summarizer.Summarizer(mmm)
+    mmm_summarizer.output_model_results_summary('model_summary.html', summary_dir, start_date, end_date)
+    return os.path.join(summary_dir, 'model_summary.html')
+
+
+def _write_optimization_summary(mmm, work_dir):
+    optimization_dir = os.path.join(work_dir, 'optimization_output')
+    os.makedirs(optimization_dir, exist_ok=True)
+    budget_optimizer = optimizer.BudgetOptimizer(mmm)
+    optimization_results = budget_optimizer.optimize()
+    optimization_results.output_optimization_summary('optimization_output.html', optimization_dir)
+    return os.path.join(optimization_dir, 'optimization_output.html')
+
+
+def export_compact_artifacts(mmm, work_dir, confidence_level=0.9):
+    """
+    Export posterior summaries, response curves and ROI intervals as compact files.
+
+    Writes posterior_summary.parquet (per-channel summary metrics),
+    response_curves.parquet (incremental outcome by spend multiplier),
+    roi_intervals.parquet (ROI mean, median and credible interval per channel)
+    and roi_draws.npz (float32 ROI posterior draws with channel names).
+
+    Returns:
+        list: paths of the written files
+    """
+    from meridian.analysis import analyzer
+
+    artifacts_dir = os.path.join(work_dir, 'artifacts')
+    os.makedirs(artifacts_dir, exist_ok=True)
+    mmm_analyzer = analyzer.Analyzer(mmm)
+
+    summary = mmm_analyzer.summary_metrics(confidence_level=confidence_level).to_dataframe().reset_index()
+    summary_path = os.path.join(artifacts_dir, 'posterior_summary.parquet')
+    summary.to_parquet(summary_path, index=False)
+
+    response_curves = mmm_analyzer.response_curves(confidence_level=confidence_level).to_dataframe().reset_index()
+    response_curves_path = os.path.join(artifacts_dir, 'response_curves.parquet')
+    response_curves.to_parquet(response_curves_path, index=False)
+
+    index_columns = [column for column in ('channel', 'distribution') if column in summary.columns]
+    roi_intervals = summary.pivot_table(index=index_columns, columns='metric', values='roi').reset_index()
+    roi_intervals.columns.name = None
+    roi_intervals_path = os.path.join(artifacts_dir, 'roi_intervals.parquet')
+    roi_intervals.to_parquet(roi_intervals_path, index=False)
+
+    roi_draws = mmm.inference_data.posterior[constants.ROI_M]
+    roi_draws_path = os.path.join(artifacts_dir, 'roi_draws.npz')
+    np.savez_compressed(
+        roi_draws_path,
+        roi=roi_draws.values.astype(np.float32),  # (chain, draw, channel)
+        channel=np.asarray(roi_draws[roi_draws.dims[-1]].values, dtype=str),
+    )
+    return [summary_path, response_curves_path, roi_intervals_path, roi_draws_path]
+
+
+def run_post_training_pipeline(mmm, bucket_name, result_dir, work_dir, summary_start_date=None, summary_end_date=None,
+                               max_workers=4, artifacts=None):
+    """
+    Save, summarise and optimise a fitted model concurrently and upload the artifacts.
+
+    The pickle, the model summary, the budget optimisation and the compact
+    artifacts only read the fitted model, so they run in parallel, and each
+    artifact is uploaded as soon as it has been written while the remaining
+    stages keep computing. Everything is written under result_dir.
+
+    Args:
+        mmm: fitted Meridian model
+        bucket_name (str): Name of the GCS bucket.
+        result_dir (str): Project folder in the bucket.
+        work_dir (str): Local scratch directory for the artifacts.
+        artifacts (dict): filled with the manifest entry of every uploaded file
+
+    Returns:
+        dict: seconds spent computing each stage
+    """
+    artifacts = {} if artifacts is None else artifacts
+    # Stage name -> (function writing one or more local files, its arguments, folder under result_dir)
+    stages = {
+        'save model': (_save_model, (mmm, work_dir), ''),
+        'model summary': (_write_model_summary, (mmm, work_dir, summary_start_date, summary_end_date), ''),
+        'budget optimization': (_write_optimization_summary, (mmm, work_dir), ''),
+        'compact artifacts': (export_compact_artifacts, (mmm, work_dir), 'artifacts/'),
+    }
+    timings = {}
+
+    def compute(stage, fn, *args):
+        started = time_module.perf_counter()
+        result = _timed(stage, fn, *args)
+        timings[stage] = round(time_module.perf_counter() - started, 1)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        compute_futures = {
+            pool.submit(compute, stage, fn, *args): stage
+            for stage, (fn, args, _) in stages.items()
+        }
+        upload_futures = []
+        for future in as_completed(compute_futures):
+            stage = compute_futures[future]
+            local_paths = future.result()
+            for local_path in local_paths if isinstance(local_paths, list) else [local_paths]:
+                name = f'{stages[stage][2]}{os.path.basename(local_path)}'
+                upload_futures.append(pool.submit(
+                    _timed, f'upload {name}',
+                    upload_artifact, local_path, bucket_name, result_dir, name, artifacts
+                ))
+        for future in upload_futures:
+            future.result()
+    return timings
+
+
+def main(project_id, bucket_name, data_path, result_dir,output_path, time, geo, controls, population, kpi, revenue_per_kpi, media, media_spend, correct_media_to_channel, correct_media_spend_to_channel,
+         sampling=None, warm_start_model=None, summary_start_date=None, summary_end_date=None,
+         sweep_config=None, sweep_parallelism=0):
     # Log the received arguments for debugging
     logger.info(f"Received project_id: {project_id}")
     logger.info(f"Received bucket_name: {bucket_name}")
@@ -171,52 +779,37 @@ def main(project_id, bucket_name, data_path, result_dir,output_path, time, geo,
    
     
     """Main function to train and save the Meridian Media Mix Model."""
+    started_at = datetime.utcnow()
     os.makedirs(output_path, exist_ok=True)
     logger.info("Loading data...")
-    df = load_data_from_gcs(bucket_name, data_path)
+    key_columns, numeric_columns = mapped_columns(time, geo, controls, population, kpi, revenue_per_kpi, media, media_spend)
+    df = load_data_from_gcs(bucket_name, data_path, key_columns, numeric_columns)
 
     # Prepare column mapping
     data_loader = prepare_data_loader(df, time, geo, controls, population, kpi, revenue_per_kpi, media, media_spend, correct_media_to_channel, correct_media_spend_to_channel)
     data_loader = data_loader.load()
 
-    # Train model
-    mmm = train_meridian_model(data_loader)
-
-    # Save model
+    artifacts = {}
     with tempfile.TemporaryDirectory() as tmp_dir:
-        local_model_path = os.path.join(tmp_dir, 'saved_mmm.pkl')
-        
-        # Save the model locally first
-        model.save_mmm(mmm, local_model_path)
-        logger.info(f"Model saved locally: {local_model_path}")
-
-        # Upload model to GCS
-        destination_model_blob = f'{result_dir}/saved_mmm.pkl'
-        upload_to_gcs(local_model_path, bucket_name, destination_model_blob)
-
-        # Create and save model summary
-        logger.info("Generating and saving model summary...")
-        mmm_summarizer = summarizer.Summarizer(mmm)
-        local_summary_path = os.path.join( '2021-01-25/model_summary.html')
-        start_date = '2021-01-25'
-        end_date = '2024-01-15'
-        mmm_summarizer.output_model_results_summary('model_summary.html', start_date, end_date)
-
-        # Upload summary to GCS
-        # summary_destination_blob = 'result/model_summary.html'
-        summary_destination_blob = f'result/{os.path.basename(result_dir)}/model_summary.html'
-
-        upload_to_gcs(local_summary_path, bucket_name, summary_destination_blob)
-        summary_destination_blob = 'result/optimization_output.html'
-        budget_optimizer = optimizer.BudgetOptimizer(mmm)
-        optimization_results = budget_optimizer.optimize()
-        local_optimization_output_path = os.path.join( 'optimization_output/')
-        # optimization_destination_blob = f'result/{os.path.basename(result_dir)}/'
-        optimization_destination_blob = f'result/{os.path.basename(result_dir)}/optimization_output.html'
-        optimization_results.output_optimization_summary('optimization_output.html', local_optimization_output_path)
-        upload_to_gcs(local_optimization_output_path+'optimization_output.html', bucket_name, optimization_destination_blob)
-
-    logger.info(f"Model and summary uploaded to GCS bucket '{bucket_name}' in 'model' and 'result' folders.")
+        # Train model, or every configuration of the sweep grid on the same data
+        fit_started = time_module.perf_counter()
+        warm_start_mmm = load_warm_start_model(warm_start_model) if warm_start_model else None
+        if sweep_config:
+            configs = expand_sweep_grid(json.loads(sweep_config), sampling or {})
+            mmm = run_sweep(data_loader, configs, bucket_name, result_dir, tmp_dir, warm_start_mmm, sweep_parallelism,
+                            artifacts)
+        else:
+            mmm = train_meridian_model(data_loader, warm_start_mmm=warm_start_mmm, **(sampling or {}))
+        fit_seconds = round(time_module.perf_counter() - fit_started, 1)
+
+        # Save, summarise, optimise and upload
+        stage_seconds = run_post_training_pipeline(mmm, bucket_name, result_dir, tmp_dir, summary_start_date,
+                                                   summary_end_date, artifacts=artifacts)
+
+    update_manifest(bucket_name, result_dir, 'training', artifacts, started_at, datetime.utcnow(),
+                    data_path=data_path, fit_seconds=fit_seconds, stage_seconds=stage_seconds,
+                    model_runtime=model_runtime_versions())
+    logger.info(f"Model and summary uploaded to GCS bucket '{bucket_name}' in '{result_dir}'.")
     logger.info("Meridian Media Mix Model Training completed successfully.")
 
 
@@ -226,7 +819,8 @@ if __name__ == '__main__':
     # Required arguments
     parser.add_argument('--project_id', required=True, help='Google Cloud Project ID')
     parser.add_argument('--bucket_name', required=True, help='GCS Bucket Name')
-    parser.add_argument('--data_path', required=True, help='Path to input CSV in GCS bucket')
+    parser.add_argument('--data_path', required=True,
+                        help='Path to input CSV or Parquet file in GCS bucket, or comma-separated base and delta files')
     parser.add_argument('--result_dir', required=True, help='Path to save all the artifacts related to model in GCS bucket')
     parser.add_argument('--output_path', required=True, help='Path to save model and results')
     
@@ -242,8 +836,27 @@ if __name__ == '__main__':
     parser.add_argument('--correct_media_to_channel', required=True, help='JSON string for correct media to channel mapping')
     parser.add_argument('--correct_media_spend_to_channel', required=True, help='JSON string for correct media spend to channel mapping')
 
+    # Sampling budget and ROI prior
+    parser.add_argument('--n_chains', type=int, default=3, help='Number of MCMC chains')
+    parser.add_argument('--n_adapt', type=int, default=200, help='Number of adaptation steps per chain')
+    parser.add_argument('--n_burnin', type=int, default=200, help='Number of burn-in steps per chain')
+    parser.add_argument('--n_keep', type=int, default=500, help='Number of posterior draws kept per chain')
+    parser.add_argument('--n_prior_draws', type=int, default=None, help='Number of prior draws (defaults to n_keep)')
+    parser.add_argument('--roi_mu', type=float, default=0.2, help='Mean of the LogNormal ROI prior')
+    parser.add_argument('--roi_sigma', type=float, default=0.9, help='Standard deviation of the LogNormal ROI prior')
+    parser.add_argument('--warm_start_model', default=None, help='gs:// URI of a saved model whose posterior seeds the sampler')
+    parser.add_argument('--summary_start_date', default=None, help='First date (YYYY-MM-DD) covered by the model summary')
+    parser.add_argument('--summary_end_date', default=None, help='Last date (YYYY-MM-DD) covered by the model summary')
+    parser.add_argument('--sweep_config', default=None,
+                        help='JSON grid of sampling/prior options to sweep, e.g. {"roi_mu": [0.1, 0.2], "roi_sigma": [0.5, 0.9]}')
+    parser.add_argument('--storage_backend', choices=['gcs', 'local'], default='gcs',
+                        help='Write artifacts to GCS, or to the local directory given as --bucket_name')
+    parser.add_argument('--sweep_parallelism', type=int, default=0,
+                        help='Number of sweep fits run concurrently (defaults to the number of GPUs)')
+
     # Parse arguments
     args = parser.parse_args()
+    STORAGE_BACKEND = args.storage_backend
 
     # Call main function with parsed arguments
     try:
@@ -251,7 +864,21 @@ if __name__ == '__main__':
             args.project_id, args.bucket_name, args.data_path,args.result_dir, args.output_path, 
             args.time, args.geo, args.controls, 
             args.population, args.kpi, args.revenue_per_kpi, args.media, 
-            args.media_spend, args.correct_media_to_channel, args.correct_media_spend_to_channel
+            args.media_spend, args.correct_media_to_channel, args.correct_media_spend_to_channel,
+            sampling={
+                'roi_mu': args.roi_mu,
+                'roi_sigma': args.roi_sigma,
+                'n_chains': args.n_chains,
+                'n_adapt': args.n_adapt,
+                'n_burnin': args.n_burnin,
+                'n_keep': args.n_keep,
+                'n_prior_draws': args.n_prior_draws,
+            },
+            warm_start_model=args.warm_start_model,
+            summary_start_date=args.summary_start_date,
+            summary_end_date=args.summary_end_date,
+            sweep_config=args.sweep_config,
+            sweep_parallelism=args.sweep_parallelism,
         )
     except Exception as e:
         logger.error(f"Training process failed: {e}", exc_info=True)